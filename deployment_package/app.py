@@ -3,32 +3,40 @@ FastAPI Web Application for Occupational History Assistant
 Serves the HTML frontend and provides API endpoints for chat functionality
 """
 
-from fastapi import FastAPI, HTTPException, Request
+from fastapi import FastAPI, HTTPException, Request, WebSocket
 from fastapi.staticfiles import StaticFiles
-from fastapi.responses import HTMLResponse, FileResponse
+from fastapi.responses import HTMLResponse, StreamingResponse
 from fastapi.middleware.cors import CORSMiddleware
 from pydantic import BaseModel
 from typing import List, Dict, Optional
 import uvicorn
+import asyncio
 import os
 import sys
 import uuid
 import json
 from datetime import datetime
-import smtplib
-from email.mime.multipart import MIMEMultipart
-from email.mime.text import MIMEText
-from email.mime.base import MIMEBase
-from email import encoders
 
 # Add src to path for imports
 sys.path.append(os.path.join(os.path.dirname(__file__), 'src'))
 
 from ai.conversation import ConversationManager
+from ai.usage import usage_scope, begin_usage_scope, get_usage_ledger, TokenBudgetExceeded
 from reports.pdf_generator import PDFGenerator
+from reports.markdown_ast import parse_markdown, render_html, extract_jobs
+from reports.artifact_store import ArtifactStore
+from reports.email_delivery import send_pdf_email
+from sessions.store import create_session_store
+from api.downloads import artifact_response, ArtifactAwareGZipMiddleware
+from api.static_assets import StaticAssetCache
+from api.interview_ws import InterviewChannel
+from evaluation.turn_checker import TurnMonitor, LLMTurnEvaluator
 
 app = FastAPI(title="Occupational History Assistant", version="1.0.0")
 
+# Compress JSON API responses (pre-encoded static pages and PDF downloads pass through untouched)
+app.add_middleware(ArtifactAwareGZipMiddleware, minimum_size=1000)
+
 # Add CORS middleware
 app.add_middleware(
     CORSMiddleware,
@@ -41,9 +49,30 @@ app.add_middleware(
 # Initialize managers
 conversation_manager = ConversationManager()
 pdf_generator = PDFGenerator()
+artifact_store = ArtifactStore()
+session_store = create_session_store()
+usage_ledger = get_usage_ledger()
+
+# Every Dr. O turn is checked locally; ambiguous turns go to the LLM evaluator
+# only when TURN_EVAL_ESCALATE is enabled
+turn_monitor = TurnMonitor(
+    LLMTurnEvaluator(conversation_manager.llm_client)
+    if os.getenv("TURN_EVAL_ESCALATE", "false").lower() == "true" else None
+)
+
+@app.on_event("startup")
+async def start_background_tasks():
+    """Start the artifact sweeper"""
+    artifact_store.start_sweeper()
+
+@app.on_event("shutdown")
+async def stop_background_tasks():
+    """Stop the artifact sweeper and the summary pipeline workers"""
+    artifact_store.stop_sweeper()
+    conversation_manager.summary_pipeline.shutdown()
 
-# Simplified: Browser storage handles persistence, backend is stateless
-# No server-side session storage needed
+# Browser storage remains the source of truth for reconnects; the session
+# store lets the client send only new messages (delta chat protocol)
 
 # Email configuration
 SMTP_SERVER = "smtp.gmail.com"  # Gmail SMTP server
@@ -58,12 +87,15 @@ class ChatMessage(BaseModel):
 class ChatRequest(BaseModel):
     message: str
     session_id: Optional[str] = None
-    conversation_history: List[Dict[str, str]] = []  # Always required now
+    conversation_history: List[Dict[str, str]] = []  # Full history (stateless mode / resync)
+    seq: Optional[int] = None  # Delta mode: transcript length from the last response
 
 class ChatResponse(BaseModel):
     response: str
     session_id: str
     is_complete: bool = False
+    seq: Optional[int] = None  # Server transcript length after this turn
+    usage: Optional[Dict] = None  # Tokens and cost of this request
 
 class SendSummaryRequest(BaseModel):
     session_id: str
@@ -76,87 +108,124 @@ class SendSummaryRequest(BaseModel):
 # Mount static files
 app.mount("/static", StaticFiles(directory="html_version"), name="static")
 
+# Frontend pages are held in memory with precompressed variants and ETags
+static_assets = StaticAssetCache("html_version")
+
 # Serve static HTML files
 @app.get("/", response_class=HTMLResponse)
-async def read_root():
+async def read_root(request: Request):
     """Serve the landing page"""
-    return FileResponse('html_version/index.html')
+    return static_assets.response(request, 'index.html')
 
 @app.get("/index.html", response_class=HTMLResponse)
-async def index_html():
+async def index_html(request: Request):
     """Serve the landing page with .html extension"""
-    return FileResponse('html_version/index.html')
+    return static_assets.response(request, 'index.html')
 
 @app.get("/chat", response_class=HTMLResponse)
-async def chat_page():
+async def chat_page(request: Request):
     """Serve the chat interface"""
-    return FileResponse('html_version/chat.html')
+    return static_assets.response(request, 'chat.html')
 
 @app.get("/chat.html", response_class=HTMLResponse)
-async def chat_html():
+async def chat_html(request: Request):
     """Serve the chat interface with .html extension"""
-    return FileResponse('html_version/chat.html')
+    return static_assets.response(request, 'chat.html')
 
 @app.get("/review", response_class=HTMLResponse)
-async def review_page():
+async def review_page(request: Request):
     """Serve the review page"""
-    return FileResponse('html_version/review.html')
+    return static_assets.response(request, 'review.html')
 
 @app.get("/review.html", response_class=HTMLResponse)
-async def review_html():
+async def review_html(request: Request):
     """Serve the review page with .html extension"""
-    return FileResponse('html_version/review.html')
+    return static_assets.response(request, 'review.html')
 
 @app.get("/success", response_class=HTMLResponse)
-async def success_page():
+async def success_page(request: Request):
     """Serve the success page"""
-    return FileResponse('html_version/success.html')
+    return static_assets.response(request, 'success.html')
 
 @app.get("/success.html", response_class=HTMLResponse)
-async def success_html():
+async def success_html(request: Request):
     """Serve the success page with .html extension"""
-    return FileResponse('html_version/success.html')
+    return static_assets.response(request, 'success.html')
 
 @app.get("/debug", response_class=HTMLResponse)
-async def debug_page():
+async def debug_page(request: Request):
     """Serve the debug/testing interface"""
-    return FileResponse('html_version/debug.html')
+    return static_assets.response(request, 'debug.html')
 
 @app.get("/debug.html", response_class=HTMLResponse)
-async def debug_html():
+async def debug_html(request: Request):
     """Serve the debug page with .html extension"""
-    return FileResponse('html_version/debug.html')
+    return static_assets.response(request, 'debug.html')
 
 @app.post("/api/chat", response_model=ChatResponse)
 async def chat_endpoint(request: ChatRequest):
     """
-    Stateless chat endpoint - conversation history comes from browser
+    Chat endpoint with two modes:
+    - Delta: client sends only the new message plus `seq`; transcript comes from the session store
+    - Stateless: conversation history comes from browser (fallback, also used to resync)
     """
     try:
         # Generate session ID if needed
         session_id = request.session_id or str(uuid.uuid4())
+        delta_mode = request.seq is not None and not request.conversation_history
         
         # For new conversations (empty message or no history)
-        if request.message == '' or len(request.conversation_history) == 0:
+        if request.message == '' or (len(request.conversation_history) == 0 and not delta_mode):
             print(f"🆕 Starting new conversation with session {session_id}")
-            opening_response = conversation_manager.start_interview()
+            with usage_scope(session_id, "chat") as usage:
+                opening_response = await asyncio.to_thread(conversation_manager.start_interview, session_id)
+            seq = session_store.replace(session_id, [opening_response])
             
             return ChatResponse(
                 response=opening_response['content'],
                 session_id=session_id,
-                is_complete=False
+                is_complete=False,
+                seq=seq,
+                usage=usage.to_dict()
             )
         
-        # For continuing conversations
-        print(f"💬 Continuing conversation {session_id} with {len(request.conversation_history)} messages")
-        
-        # Add user message to conversation history
-        conversation_history = request.conversation_history.copy()
         user_message = {"role": "user", "content": request.message}
-        conversation_history.append(user_message)
         
-        # Get AI response using full conversation history
-        ai_response = conversation_manager.continue_interview(conversation_history)
+        if delta_mode:
+            conversation_history = session_store.get_messages(session_id)
+            if conversation_history is None or len(conversation_history) != request.seq:
+                # Client must resend its browser-held history
+                server_seq = len(conversation_history) if conversation_history is not None else None
+                print(f"🔁 Session {session_id} out of sync (client seq {request.seq}, server seq {server_seq})")
+                raise HTTPException(
+                    status_code=409,
+                    detail={"error": "resync_required", "server_seq": server_seq}
+                )
+            print(f"💬 Continuing conversation {session_id} (delta, seq {request.seq})")
+        else:
+            # For continuing conversations
+            print(f"💬 Continuing conversation {session_id} with {len(request.conversation_history)} messages")
+            conversation_history = request.conversation_history.copy()
+        
+        # Add user message to conversation history (the browser may already include it)
+        if not conversation_history or conversation_history[-1] != user_message:
+            conversation_history.append(user_message)
+        
+        # Get AI response using full conversation history (refused before the call if over budget);
+        # LLM calls run in a thread (with this context's usage scope) so the event loop stays free
+        with usage_scope(session_id, "chat") as usage:
+            ai_response = await asyncio.to_thread(
+                conversation_manager.continue_interview, conversation_history, session_id=session_id
+            )
+        
+        # Keep the server transcript current so the next turn can be a delta
+        if delta_mode:
+            seq = session_store.append(session_id, [user_message, ai_response])
+        else:
+            seq = _sync_transcript(session_id, conversation_history + [ai_response])
+        
+        # Quality monitoring (local rules, microseconds per turn)
+        turn_monitor.observe(session_id, conversation_history + [ai_response])
         
         # Check if interview is complete
         is_complete = conversation_manager.is_interview_complete(ai_response['content'])
@@ -164,13 +233,49 @@ async def chat_endpoint(request: ChatRequest):
         return ChatResponse(
             response=ai_response['content'],
             session_id=session_id,
-            is_complete=is_complete
+            is_complete=is_complete,
+            seq=seq,
+            usage=usage.to_dict()
         )
         
+    except HTTPException:
+        raise
+    except TokenBudgetExceeded as e:
+        raise _budget_error(e)
     except Exception as e:
         print(f"Error in chat endpoint: {e}")
         raise HTTPException(status_code=500, detail=str(e))
 
+def _sync_transcript(session_id: str, messages: List[Dict[str, str]]) -> int:
+    """
+    Store a full browser-held transcript, writing only what is new
+
+    When the stored transcript is a prefix of `messages` only the tail is
+    appended; otherwise (unknown session, edited or diverged history) the
+    transcript is replaced.
+    """
+    stored = session_store.get_messages(session_id)
+    if stored is not None and len(stored) <= len(messages) and messages[:len(stored)] == stored:
+        new_messages = messages[len(stored):]
+        return session_store.append(session_id, new_messages) if new_messages else len(stored)
+    return session_store.replace(session_id, messages)
+
+def _budget_error(error: TokenBudgetExceeded) -> HTTPException:
+    """413 for requests refused by the token budget"""
+    print(f"🛑 {error}")
+    return HTTPException(
+        status_code=413,
+        detail={"error": "token_budget_exceeded", "detail": str(error), "tokens": error.tokens, "budget": error.budget}
+    )
+
+@app.websocket("/ws/interview/{session_id}")
+async def interview_socket(websocket: WebSocket, session_id: str):
+    """
+    Persistent interview channel: streamed Dr. O tokens, completion and
+    summary-ready events, heartbeat, and resume from the last acknowledged index
+    """
+    await InterviewChannel(websocket, session_id, conversation_manager, session_store, turn_monitor).run()
+
 class SummaryRequest(BaseModel):
     session_id: str
     conversation_history: List[Dict[str, str]]
@@ -187,23 +292,89 @@ async def get_summary(request: SummaryRequest):
         
         print(f"📋 Generating summary for session {session_id} with {len(conversation_history)} messages")
         
-        # Generate summary using conversation history from browser
-        summary_text = conversation_manager.generate_summary(conversation_history)
+        # Generate summary and structured jobs in a single LLM call
+        with usage_scope(session_id, "summary") as usage:
+            structured = await asyncio.to_thread(conversation_manager.generate_structured_summary, conversation_history)
+        summary_text = structured.markdown
+        
+        # Recorded only for sessions the server already knows about
+        session_store.set_metadata(
+            session_id, 'summary_key',
+            conversation_manager.summary_cache_key_for(conversation_history)
+        )
         
         return {
             'session_id': session_id,
             'summary': {
                 'raw_text': summary_text,
-                'jobs': extract_jobs_from_summary(summary_text),
+                'html': render_html(parse_markdown(summary_text)),
+                'jobs': [job.model_dump() for job in structured.jobs],
                 'generated_at': datetime.now().isoformat()
             },
-            'conversation_length': len(conversation_history)
+            'conversation_length': len(conversation_history),
+            'usage': usage.to_dict()
         }
         
+    except TokenBudgetExceeded as e:
+        raise _budget_error(e)
     except Exception as e:
         print(f"Error generating summary: {e}")
         raise HTTPException(status_code=500, detail=str(e))
 
+def _sse_event(event: str, data: Dict) -> str:
+    """Format a server-sent event"""
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+@app.post("/api/summary/stream")
+async def stream_summary(request: SummaryRequest):
+    """
+    Stream the patient summary as server-sent events
+    
+    Emits a `section` event per completed markdown section, then a `complete`
+    event with the structured jobs and the summary cache key.
+    """
+    session_id = request.session_id
+    conversation_history = request.conversation_history
+    
+    print(f"📋 Streaming summary for session {session_id} with {len(conversation_history)} messages")
+    
+    # The body is generated after this handler returns, in this request's context
+    usage = begin_usage_scope(session_id, "summary_stream")
+    
+    def event_stream():
+        try:
+            for kind, payload in conversation_manager.stream_summary(conversation_history):
+                if kind == "section":
+                    yield _sse_event("section", {
+                        'markdown': payload,
+                        'html': render_html(parse_markdown(payload))
+                    })
+                else:
+                    structured, cache_key = payload
+                    # Recorded only for sessions the server already knows about
+                    session_store.set_metadata(session_id, 'summary_key', cache_key)
+                    yield _sse_event("complete", {
+                        'session_id': session_id,
+                        'cache_key': cache_key,
+                        'summary': {
+                            'raw_text': structured.markdown,
+                            'html': render_html(parse_markdown(structured.markdown)),
+                            'jobs': [job.model_dump() for job in structured.jobs],
+                            'generated_at': datetime.now().isoformat()
+                        },
+                        'conversation_length': len(conversation_history),
+                        'usage': usage.to_dict()
+                    })
+        except Exception as e:
+            print(f"Error streaming summary: {e}")
+            yield _sse_event("error", {'detail': str(e)})
+    
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
 @app.post("/api/send-summary")
 async def send_summary(request: SendSummaryRequest):
     """
@@ -216,7 +387,10 @@ async def send_summary(request: SendSummaryRequest):
         print(f"📧 Generating doctor summary for session {session_id} with {len(conversation_history)} messages")
         
         # Generate doctor-specific summary using the advanced prompt (ALWAYS the same regardless of notes)
-        doctor_summary_text = conversation_manager.generate_doctor_summary(conversation_history)
+        with usage_scope(session_id, "doctor_summary") as usage:
+            doctor_summary_text = await asyncio.to_thread(
+                conversation_manager.generate_doctor_summary, conversation_history, session_id=session_id
+            )
         
         # Append additional notes if provided (simple string append - no AI involvement)
         if request.additional_notes and request.additional_notes.strip():
@@ -230,43 +404,44 @@ async def send_summary(request: SendSummaryRequest):
         # Generate PDF with doctor summary (now includes appended notes if any)
         pdf_filename = f"occupational_health_analysis_{request.session_id}_{int(datetime.now().timestamp())}.pdf"
         
-        # Create temp directory for PDFs if it doesn't exist
-        temp_dir = "temp_pdfs"
-        os.makedirs(temp_dir, exist_ok=True)
-        pdf_path = os.path.join(temp_dir, pdf_filename)
+        # Generate PDF (content-addressed: resends of the same summary hit the cache)
+        pdf_key, pdf_bytes = await asyncio.to_thread(pdf_generator.generate_pdf_with_key, doctor_summary_text)
         
-        # Generate PDF
-        pdf_bytes = pdf_generator.generate_pdf(doctor_summary_text)
-        with open(pdf_path, 'wb') as f:
-            f.write(pdf_bytes)
+        # Store in the bounded artifact store (atomic write, swept after TTL)
+        artifact = artifact_store.put(session_id, pdf_filename, pdf_bytes)
+        pdf_path = artifact.path
         
-        # Send email with PDF attachment (if password is set)
+        # Send email with PDF attachment (if password is set), straight from the rendered bytes
         if SMTP_PASSWORD:
-            email_sent = send_email_with_pdf(
+            email_sent = await asyncio.to_thread(
+                send_email_with_pdf,
                 recipient_email=request.doctor_email,
                 doctor_name=request.doctor_name,
                 doctor_clinic=request.doctor_clinic,
-                pdf_path=pdf_path
+                pdf_bytes=pdf_bytes,
+                filename=pdf_filename
             )
             
             if not email_sent:
                 print("⚠️ Email sending failed, but PDF was generated")
             else:
                 # Clean up PDF file after successful email send
-                try:
-                    os.remove(pdf_path)
-                    print("🗑️ Temporary PDF file cleaned up")
-                except Exception as e:
-                    print(f"⚠️ Could not delete temp PDF: {e}")
+                artifact_store.remove(artifact)
+                print("🗑️ Temporary PDF file cleaned up")
         else:
             print("⚠️ No email password set - PDF generated but not sent")
             print(f"📄 PDF saved to: {pdf_path}")
             print(f"📧 To enable email: export EMAIL_PASSWORD='your_app_password'")
             print(f"📧 Then restart the server")
-            print("⚠️ PDF will remain in temp_pdfs/ until email is configured")
+            print(f"⚠️ PDF will remain in {artifact_store.root}/ for up to {artifact_store.ttl_seconds}s")
         
-        # Note: In stateless mode, send information is not stored server-side
-        print(f"📧 Summary sent to {request.doctor_name} ({request.doctor_email}) at {datetime.now().isoformat()}")
+        sent_at = datetime.now().isoformat()
+        session_store.set_metadata(session_id, 'sent_to', {
+            'doctor_name': request.doctor_name,
+            'doctor_email': request.doctor_email,
+            'sent_at': sent_at
+        })
+        print(f"📧 Summary sent to {request.doctor_name} ({request.doctor_email}) at {sent_at}")
         
         # Note: In stateless mode, no server-side cleanup needed
         # Conversation data is stored in browser and cleaned by success.html
@@ -277,28 +452,69 @@ async def send_summary(request: SendSummaryRequest):
             'doctor_name': request.doctor_name,
             'doctor_clinic': request.doctor_clinic,
             'doctor_email': request.doctor_email,
-            'pdf_path': pdf_path
+            'pdf_path': pdf_path,
+            'pdf_key': pdf_key,
+            'download_url': f'/api/pdf/{pdf_key}',
+            'usage': usage.to_dict()
         }
         
+    except TokenBudgetExceeded as e:
+        raise _budget_error(e)
     except Exception as e:
         print(f"Error sending summary: {e}")
         raise HTTPException(status_code=500, detail=str(e))
 
+@app.get("/api/pdf/{pdf_key}")
+async def download_pdf(pdf_key: str, request: Request):
+    """
+    Download a generated PDF by content key
+    Supports ETag/If-None-Match and byte Range requests
+    """
+    pdf_bytes = pdf_generator.get_cached_pdf(pdf_key)
+    if pdf_bytes is None:
+        raise HTTPException(status_code=404, detail="PDF not found or expired")
+    
+    return artifact_response(
+        request,
+        pdf_bytes,
+        etag_key=pdf_key,
+        filename=f"occupational_health_analysis_{pdf_key[:12]}.pdf"
+    )
+
+@app.get("/api/metrics")
+async def get_metrics():
+    """
+    Operational metrics for caches and stored artifacts
+    """
+    return {
+        'artifact_store': artifact_store.metrics(),
+        'pdf_cache': pdf_generator.cache.stats(),
+        'session_store': session_store.stats(),
+        'summary_pipeline': conversation_manager.summary_pipeline.stats(),
+        'turn_monitor': turn_monitor.stats(),
+        'usage': dict(usage_ledger.stats(), guardrails=conversation_manager.token_budget.stats())
+    }
+
+def _format_timestamp(timestamp: Optional[float]) -> Optional[str]:
+    return datetime.fromtimestamp(timestamp).isoformat() if timestamp else None
+
 @app.get("/api/session/{session_id}")
 async def get_session(session_id: str):
     """
     Get session information
     """
-    if session_id not in sessions:
+    session_info = session_store.info(session_id)
+    if session_info is None:
         raise HTTPException(status_code=404, detail="Session not found")
     
-    session_data = sessions[session_id]
+    metadata = session_info['metadata']
     return {
         'session_id': session_id,
-        'created_at': session_data['created_at'].isoformat(),
-        'conversation_length': len(session_data['conversation_history']),
-        'has_summary': 'summary' in session_data,
-        'sent_to': session_data.get('sent_to')
+        'created_at': _format_timestamp(session_info['created_at']),
+        'conversation_length': session_info['length'],
+        'has_summary': 'summary_key' in metadata,
+        'sent_to': metadata.get('sent_to'),
+        'usage': usage_ledger.session_usage(session_id)
     }
 
 # DEBUG/TESTING ENDPOINTS - Remove in production
@@ -307,17 +523,19 @@ async def debug_session(session_id: str):
     """
     Debug endpoint to see what's actually in a session
     """
-    if session_id not in sessions:
+    session_info = session_store.info(session_id)
+    conversation_history = session_store.get_messages(session_id)
+    if session_info is None or conversation_history is None:
         raise HTTPException(status_code=404, detail="Session not found")
     
-    session_data = sessions[session_id]
     return {
         'session_id': session_id,
-        'conversation_length': len(session_data.get('conversation_history', [])),
-        'first_user_message': session_data.get('conversation_history', [{}])[1].get('content', 'No messages') if len(session_data.get('conversation_history', [])) > 1 else 'No messages',
-        'has_summary': bool(session_data.get('summary')),
-        'created_at': session_data.get('created_at'),
-        'full_conversation': session_data.get('conversation_history', [])
+        'conversation_length': len(conversation_history),
+        'first_user_message': conversation_history[1].get('content', 'No messages') if len(conversation_history) > 1 else 'No messages',
+        'has_summary': 'summary_key' in session_info['metadata'],
+        'created_at': _format_timestamp(session_info['created_at']),
+        'metadata': session_info['metadata'],
+        'full_conversation': conversation_history
     }
 
 @app.post("/api/debug/create-test-session")
@@ -354,11 +572,7 @@ async def create_test_session():
         {"role": "assistant", "content": "---INTERVIEW_COMPLETE---"}
     ]
     
-    sessions[session_id] = {
-        'conversation_history': test_conversation,
-        'created_at': datetime.now(),
-        'summary': None
-    }
+    session_store.replace(session_id, test_conversation)
     
     return {
         'message': 'Test session created successfully',
@@ -375,12 +589,10 @@ async def debug_doctor_summary_preview(session_id: str):
     """
     Debug endpoint to preview what conversation data would be sent to AI for doctor summary
     """
-    if session_id not in sessions:
+    conversation_history = session_store.get_messages(session_id)
+    if conversation_history is None:
         raise HTTPException(status_code=404, detail="Session not found")
     
-    session_data = sessions[session_id]
-    conversation_history = session_data['conversation_history']
-    
     # Convert conversation to text exactly like generate_doctor_summary does
     conversation_text = ""
     for message in conversation_history:
@@ -411,11 +623,15 @@ async def load_conversation(conversation_data: dict):
     if not conversation_history:
         raise HTTPException(status_code=400, detail="No conversation data provided")
     
-    sessions[session_id] = {
-        'conversation_history': conversation_history,
-        'created_at': datetime.now(),
-        'summary': None
-    }
+    try:
+        conversation_history = [
+            {'role': str(message['role']), 'content': str(message['content'])}
+            for message in conversation_history
+        ]
+    except (KeyError, TypeError):
+        raise HTTPException(status_code=400, detail="Each message needs a role and content")
+    
+    session_store.replace(session_id, conversation_history)
     
     return {
         'message': 'Custom conversation loaded successfully',
@@ -427,17 +643,12 @@ async def load_conversation(conversation_data: dict):
         }
     }
 
-def send_email_with_pdf(recipient_email: str, doctor_name: str, doctor_clinic: str, pdf_path: str):
+def send_email_with_pdf(recipient_email: str, doctor_name: str, doctor_clinic: str, pdf_bytes, filename: str):
     """
     Send email with PDF attachment to doctor
+    The PDF bytes (or a memoryview of them) are streamed to the SMTP server without copies
     """
     try:
-        # Create message
-        msg = MIMEMultipart()
-        msg['From'] = SMTP_USERNAME
-        msg['To'] = recipient_email
-        msg['Subject'] = f"Occupational Health Summary - {doctor_name}"
-        
         # Email body
         body = f"""
 Dear {doctor_name},
@@ -456,27 +667,14 @@ Best regards,
 Occupational Health Assistant System
         """
         
-        msg.attach(MIMEText(body, 'plain'))
-        
-        # Attach PDF
-        with open(pdf_path, "rb") as attachment:
-            part = MIMEBase('application', 'octet-stream')
-            part.set_payload(attachment.read())
-        
-        encoders.encode_base64(part)
-        part.add_header(
-            'Content-Disposition',
-            f'attachment; filename= {os.path.basename(pdf_path)}'
-        )
-        msg.attach(part)
-        
         # Send email
-        server = smtplib.SMTP(SMTP_SERVER, SMTP_PORT)
-        server.starttls()
-        server.login(SMTP_USERNAME, SMTP_PASSWORD)
-        text = msg.as_string()
-        server.sendmail(SMTP_USERNAME, recipient_email, text)
-        server.quit()
+        send_pdf_email(
+            SMTP_SERVER, SMTP_PORT, SMTP_USERNAME, SMTP_PASSWORD, recipient_email,
+            subject=f"Occupational Health Summary - {doctor_name}",
+            body=body,
+            pdf=pdf_bytes,
+            filename=filename
+        )
         
         print(f"✅ Email sent successfully to {recipient_email}")
         return True
@@ -488,27 +686,9 @@ Occupational Health Assistant System
 def extract_jobs_from_summary(summary_text: str) -> List[Dict]:
     """
     Extract job information from summary text
-    This is a simplified parser - you could make this more sophisticated
+    Uses the shared markdown document tree (parsed once per summary)
     """
-    # For now, return mock data based on the UI design
-    # In production, you'd parse the actual summary text
-    jobs = [
-        {
-            'title': 'Construction Worker',
-            'dates': '2015-2018',
-            'industry': 'Residential Construction',
-            'tasks': [
-                'Framing wooden structures for houses',
-                'Installing drywall and finishing surfaces', 
-                'Basic electrical work and wiring',
-                'Site preparation and cleanup'
-            ],
-            'exposures': ['Wood Dust', 'Crystalline Silica Dust', 'Loud Noise', 'Electrical Hazards']
-        }
-    ]
-    
-    # You could implement actual parsing logic here based on your summary format
-    return jobs
+    return extract_jobs(parse_markdown(summary_text))
 
 if __name__ == "__main__":
     print("🏥 Starting Occupational History Assistant Server...")
@@ -0,0 +1,65 @@
+"""
+Gunicorn configuration: multi-worker serving
+Runs one preloaded app per CPU with uvicorn workers:
+
+    gunicorn app:app -c gunicorn.conf.py
+
+The app (prompts, keyword index, static pages, ReportLab) is imported once
+in the master and forked, so workers start fast and share those pages.
+With more than one worker, summaries, PDFs and sessions go through a
+SQLite file on this host unless SHARED_CACHE_URL / SESSION_STORE_URL
+point elsewhere (e.g. Redis, for several hosts).
+
+Environment:
+    WEB_CONCURRENCY      worker count (default: CPUs available, at most MAX_WORKERS)
+    MAX_WORKERS          cap on the default worker count (default 8)
+    PORT                 listen port (default 8000)
+"""
+
+import os
+import tempfile
+
+# Defaults (override with environment variables)
+MAX_WORKERS = int(os.getenv("MAX_WORKERS", "8"))
+SHARED_DB_PATH = os.path.join(tempfile.gettempdir(), "ohs_shared.sqlite3")
+
+
+def default_workers() -> int:
+    """One worker per CPU this process may run on (container-aware), capped"""
+    try:
+        cpus = len(os.sched_getaffinity(0))
+    except AttributeError:
+        cpus = os.cpu_count() or 1
+    return max(1, min(cpus, MAX_WORKERS))
+
+
+bind = f"0.0.0.0:{os.getenv('PORT', '8000')}"
+workers = int(os.getenv("WEB_CONCURRENCY", "0")) or default_workers()
+worker_class = "uvicorn_worker.UvicornWorker"
+preload_app = True
+
+# LLM calls, PDF rendering and email run in threads, so a worker's event
+# loop (and so its heartbeat) stays responsive; a worker silent for this
+# long is stuck and is restarted
+timeout = int(os.getenv("GUNICORN_TIMEOUT", "60"))
+graceful_timeout = 30
+keepalive = 5
+
+# Must be set before the app is preloaded, since stores are created at import
+if workers > 1:
+    os.environ.setdefault("SHARED_CACHE_URL", f"sqlite://{SHARED_DB_PATH}")
+    os.environ.setdefault("SESSION_STORE_URL", f"sqlite://{SHARED_DB_PATH}")
+    # Summary pipeline notes are per-process; the final summary rarely lands
+    # on the worker that made them, so don't spend map calls on them
+    os.environ.setdefault("SUMMARY_PIPELINE_ENABLED", "false")
+
+
+def when_ready(server):
+    print(f"🚀 Serving with {server.cfg.workers} workers "
+          f"(shared cache: {os.getenv('SHARED_CACHE_URL') or 'per process'})")
+
+
+def post_fork(server, worker):
+    # API connections must not be shared across processes
+    from ai.llm_client import reset_connections
+    reset_connections()
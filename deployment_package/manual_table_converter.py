@@ -5,15 +5,28 @@ Manually reconstructs the tables from the specific markdown format.
 """
 
 from reportlab.lib.pagesizes import A4
-from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer, Table, TableStyle
+from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer, Table, LongTable, TableStyle
 from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
 from reportlab.lib.units import inch
 from reportlab.lib.colors import HexColor, black, white
 from reportlab.lib.enums import TA_CENTER, TA_LEFT, TA_JUSTIFY
+from reportlab.pdfbase.pdfmetrics import stringWidth
 from pathlib import Path
+from io import BytesIO
+from concurrent.futures import ProcessPoolExecutor, as_completed
+import glob
+import hashlib
+import json
 import re
+import os
+import sys
+import time
 from datetime import datetime
 
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), 'src'))
+
+from reports import markdown_ast
+
 def create_styles():
     """Create paragraph styles."""
     styles = getSampleStyleSheet()
@@ -71,12 +84,30 @@ def create_styles():
         textColor=black
     )
     
+    # Bullet style
+    bullet_style = ParagraphStyle(
+        'Bullet',
+        parent=normal_style,
+        leftIndent=16,
+        alignment=TA_LEFT
+    )
+    
+    # High-risk exposure style (flagged with (!) by the LLM)
+    high_risk_style = ParagraphStyle(
+        'HighRisk',
+        parent=bullet_style,
+        fontName='Times-Bold',
+        textColor=HexColor('#c0392b')
+    )
+    
     return {
         'title': title_style,
         'section': section_style,
         'normal': normal_style,
         'table_header': table_header_style,
-        'table_cell': table_cell_style
+        'table_cell': table_cell_style,
+        'bullet': bullet_style,
+        'high_risk': high_risk_style
     }
 
 def clean_text(text):
@@ -102,31 +133,116 @@ def clean_text(text):
 
 # Hardcoded table functions removed - now using dynamic LLM content parsing
 
-def create_table_element(table_data, styles):
-    """Create a reportlab Table element."""
+# Page margins (left + right) and table cell padding (left + right)
+PAGE_SIDE_MARGINS = 1.6*inch
+TABLE_CELL_PADDING = 12
+
+# Tables with more data rows than this are built as LongTable
+LONG_TABLE_ROWS = int(os.getenv("PDF_LONG_TABLE_ROWS", "40"))
+
+def _text_width(text, style):
+    """Width of cleaned cell text set on one line, ignoring inline markup."""
+    return stringWidth(re.sub(r'<[^>]+>', '', text), style.fontName, style.fontSize)
+
+def _word_width(text, style):
+    """Width of the longest word, the narrowest the cell can wrap to."""
+    words = re.sub(r'<[^>]+>', '', text).split()
+    return max((stringWidth(word, style.fontName, style.fontSize) for word in words), default=0)
+
+def compute_column_widths(rows, styles, available_width=None):
+    """
+    Column widths from header and content statistics.
+    
+    Every column gets at least its longest word (capped at an even share of
+    the page); the remaining width goes to the columns whose typical (mean)
+    text is wider than that, never beyond their widest cell. When everything
+    fits on one line the natural widths are stretched to the page width.
+    
+    Args:
+        rows: Cleaned cell text, header row first
+        styles: Styles from create_styles()
+        available_width: Width to fill (defaults to the A4 frame width)
+        
+    Returns:
+        List of column widths in points
+    """
+    available_width = available_width or A4[0] - PAGE_SIDE_MARGINS
+    columns = len(rows[0])
+    share = available_width / columns
+    
+    minimum, typical, natural = [], [], []
+    for column in range(columns):
+        header = rows[0][column]
+        cells = [row[column] for row in rows[1:]]
+        widths = [_text_width(cell, styles['table_cell']) for cell in cells]
+        words = max([_word_width(header, styles['table_header'])] +
+                    [_word_width(cell, styles['table_cell']) for cell in cells])
+        widest = max([_text_width(header, styles['table_header'])] + widths) + TABLE_CELL_PADDING
+        minimum.append(min(words + TABLE_CELL_PADDING, share))
+        natural.append(max(widest, minimum[-1]))
+        typical.append(min(max(sum(widths) / len(widths) + TABLE_CELL_PADDING, minimum[-1]), natural[-1]))
+    
+    if sum(natural) <= available_width:
+        scale = available_width / sum(natural)
+        return [width * scale for width in natural]
+    
+    # Share what is left after the minimums in proportion to how much wider
+    # each column typically is, re-sharing anything a capped column gives back
+    widths = list(minimum)
+    open_columns = [column for column in range(columns) if natural[column] > widths[column]]
+    while open_columns:
+        remaining = available_width - sum(widths)
+        demand = {column: typical[column] - minimum[column] or 1.0 for column in open_columns}
+        total = sum(demand.values())
+        capped = [column for column in open_columns
+                  if widths[column] + remaining * demand[column] / total >= natural[column]]
+        if not capped:
+            for column in open_columns:
+                widths[column] += remaining * demand[column] / total
+            break
+        for column in capped:
+            widths[column] = natural[column]
+            open_columns.remove(column)
+    return widths
+
+def _table_cell(text, style, plain_width):
+    """
+    A table cell: a Paragraph, or a plain string drawn by the table itself
+    when it has no markup and fits on one line within plain_width (compact mode).
+    """
+    if (plain_width and '<' not in text and '&' not in text
+            and stringWidth(text, style.fontName, style.fontSize) <= plain_width):
+        return text
+    return Paragraph(text, style)
+
+def create_table_element(table_data, styles, compact=False):
+    """
+    Create a reportlab Table element.
+    
+    Column widths are precomputed from the cell text, so the table never
+    measures its Paragraphs to size columns. Long tables are built as a
+    LongTable, and rows taller than a page split across pages.
+    """
     if not table_data or len(table_data) < 2:
         return None
     
+    rows = [[clean_text(cell) for cell in row] for row in table_data]
+    col_widths = compute_column_widths(rows, styles)
+    
     # Prepare table data
-    formatted_data = []
-    
-    # Header row
-    header_row = []
-    for cell in table_data[0]:
-        clean_cell = clean_text(cell)
-        header_row.append(Paragraph(clean_cell, styles['table_header']))
-    formatted_data.append(header_row)
-    
-    # Data rows
-    for row in table_data[1:]:
-        data_row = []
-        for cell in row:
-            clean_cell = clean_text(cell)
-            data_row.append(Paragraph(clean_cell, styles['table_cell']))
-        formatted_data.append(data_row)
+    formatted_data = [[Paragraph(cell, styles['table_header']) for cell in rows[0]]]
+    
+    # Data rows (every cell shares the one table_cell style); in compact mode
+    # cells that fit their column on one line need no Paragraph
+    for row in rows[1:]:
+        formatted_data.append([
+            _table_cell(cell, styles['table_cell'], width - TABLE_CELL_PADDING if compact else 0)
+            for cell, width in zip(row, col_widths)
+        ])
     
     # Create table
-    table = Table(formatted_data, repeatRows=1)
+    table_class = LongTable if len(formatted_data) - 1 > LONG_TABLE_ROWS else Table
+    table = table_class(formatted_data, colWidths=col_widths, repeatRows=1, splitInRow=1)
     
     # Apply styling
     table.setStyle(TableStyle([
@@ -154,7 +270,110 @@ def create_table_element(table_data, styles):
     
     return table
 
-def convert_markdown_to_pdf(markdown_file, output_file=None):
+def merge_flowables(story, styles):
+    """
+    Merge adjacent flowables that render the same way.
+    
+    Consecutive Spacers become one Spacer, and runs of plain bullets become
+    one Paragraph with line breaks, so the layout engine handles far fewer
+    flowables for long bullet lists.
+    """
+    merged = []
+    bullet_run = []
+    
+    def flush_bullets():
+        if len(bullet_run) == 1:
+            merged.append(bullet_run[0])
+        elif bullet_run:
+            merged.append(Paragraph('<br/>'.join(p.text for p in bullet_run), styles['bullet']))
+        bullet_run.clear()
+    
+    for flowable in story:
+        if isinstance(flowable, Paragraph) and flowable.style is styles['bullet']:
+            bullet_run.append(flowable)
+            continue
+        flush_bullets()
+        if isinstance(flowable, Spacer) and merged and isinstance(merged[-1], Spacer):
+            merged[-1] = Spacer(1, merged[-1].height + flowable.height)
+        else:
+            merged.append(flowable)
+    flush_bullets()
+    return merged
+
+def build_story(document, styles, compact=False):
+    """Build the reportlab story from a parsed summary Document."""
+    story = []
+    
+    for block in document.blocks:
+        # Main title
+        if isinstance(block, markdown_ast.Heading) and block.level == 1:
+            story.append(Paragraph(clean_text(block.text), styles['title']))
+            story.append(Spacer(1, 0.3*inch))
+            
+        # Section and subsection headers
+        elif isinstance(block, markdown_ast.Heading):
+            story.append(Paragraph(clean_text(block.text), styles['section']))
+            
+        # Tables of any width (header + at least one row)
+        elif isinstance(block, markdown_ast.Table):
+            table_element = create_table_element([block.header] + list(block.rows), styles, compact)
+            if table_element:
+                story.append(table_element)
+                story.append(Spacer(1, 0.2*inch))
+                
+        # Bullets, with (!) high-risk exposures highlighted
+        elif isinstance(block, markdown_ast.Bullet):
+            if block.high_risk:
+                story.append(Paragraph(f"<b>(!)</b> {clean_text(block.text)}", styles['high_risk']))
+            else:
+                story.append(Paragraph(f"• {clean_text(block.text)}", styles['bullet']))
+                
+        # Regular paragraph
+        elif isinstance(block, markdown_ast.Paragraph):
+            story.append(Paragraph(clean_text(block.text), styles['normal']))
+            
+        # Blank lines and horizontal rules carry no content
+    
+    # Footer space
+    story.append(Spacer(1, 0.2*inch))
+    
+    return merge_flowables(story, styles) if compact else story
+
+def render_pdf(content, output, styles=None, compact=False):
+    """
+    Render markdown text to a PDF path or binary file object.
+    
+    Compact mode always compresses page streams (whatever the local
+    rl_config says), writes reproducible bytes, merges adjacent flowables
+    (bullet runs are set as one block, without the gap between items) and
+    draws short table cells as plain strings. The report fonts are
+    PDF base-14 fonts, which are referenced rather than embedded, so there
+    are no font programs to subset.
+    """
+    styles = styles or create_styles()
+    
+    # Create PDF
+    options = {'pageCompression': 1, 'invariant': 1} if compact else {}
+    doc = SimpleDocTemplate(
+        output,
+        pagesize=A4,
+        rightMargin=PAGE_SIDE_MARGINS / 2,
+        leftMargin=PAGE_SIDE_MARGINS / 2,
+        topMargin=1*inch,
+        bottomMargin=1*inch,
+        **options
+    )
+    
+    # Parse the actual LLM markdown content (cached per summary)
+    doc.build(build_story(markdown_ast.parse_markdown(content), styles, compact))
+
+def markdown_to_pdf_bytes(content, compact=False):
+    """Convert markdown text straight to PDF bytes without touching disk."""
+    buffer = BytesIO()
+    render_pdf(content, buffer, compact=compact)
+    return buffer.getvalue()
+
+def convert_markdown_to_pdf(markdown_file, output_file=None, compact=False):
     """Convert markdown to PDF using actual LLM content."""
     try:
         with open(markdown_file, 'r', encoding='utf-8') as f:
@@ -167,138 +386,7 @@ def convert_markdown_to_pdf(markdown_file, output_file=None):
         output_file = Path(markdown_file).with_suffix('.pdf')
     
     try:
-        styles = create_styles()
-        
-        # Create PDF
-        doc = SimpleDocTemplate(
-            str(output_file),
-            pagesize=A4,
-            rightMargin=0.8*inch,
-            leftMargin=0.8*inch,
-            topMargin=1*inch,
-            bottomMargin=1*inch
-        )
-        
-        story = []
-        
-        # Parse the actual LLM markdown content
-        lines = content.strip().split('\n')
-        
-        current_section = None
-        table_data = []
-        in_table = False
-        
-        for line in lines:
-            line = line.strip()
-            
-            if not line:
-                continue
-                
-            # Main title
-            if line.startswith('# '):
-                title_text = clean_text(line[2:])
-                story.append(Paragraph(title_text, styles['title']))
-                story.append(Spacer(1, 0.3*inch))
-                
-            # Section headers
-            elif line.startswith('## '):
-                # Finalize any current table before adding heading
-                if in_table and table_data:
-                    table_element = create_table_element(table_data, styles)
-                    if table_element:
-                        story.append(table_element)
-                        story.append(Spacer(1, 0.2*inch))
-                    table_data = []
-                    in_table = False
-                    
-                section_text = clean_text(line[3:])
-                story.append(Paragraph(section_text, styles['section']))
-                current_section = section_text
-                
-            # Subsection headers  
-            elif line.startswith('### '):
-                # Finalize any current table before adding heading
-                if in_table and table_data:
-                    table_element = create_table_element(table_data, styles)
-                    if table_element:
-                        story.append(table_element)
-                        story.append(Spacer(1, 0.2*inch))
-                    table_data = []
-                    in_table = False
-                    
-                subsection_text = clean_text(line[4:])
-                story.append(Paragraph(subsection_text, styles['section']))
-                
-            # Table separator detection (ignore markdown table separators)
-            elif '|' in line and ('---' in line or ':---' in line or '---:' in line):
-                # Skip markdown table separator lines like |---|---|---| or |:---|:---|:---|
-                continue
-                
-            # Table detection
-            elif '|' in line:
-                # Parse table row
-                cells = [cell.strip() for cell in line.split('|')]
-                # Remove empty cells at start/end
-                if cells and not cells[0]:
-                    cells = cells[1:]
-                if cells and not cells[-1]:
-                    cells = cells[:-1]
-                
-                # Check if this is a valid table row (must have at least 4 columns)
-                if cells and len(cells) >= 4:
-                    # If we're not in a table, or if column count changed, finalize previous table
-                    if in_table and table_data and len(table_data[0]) != len(cells):
-                        # Column count changed - finalize previous table
-                        print(f"🔄 Column count changed from {len(table_data[0])} to {len(cells)} - finalizing previous table")
-                        table_element = create_table_element(table_data, styles)
-                        if table_element:
-                            story.append(table_element)
-                            story.append(Spacer(1, 0.2*inch))
-                        table_data = []
-                    
-                    # Start new table or continue current one
-                    if not in_table:
-                        table_data = []
-                        in_table = True
-                        print(f"🆕 Starting new table with {len(cells)} columns")
-                    
-                    print(f"✅ Adding table row with {len(cells)} columns: {cells[0][:30]}...")
-                    table_data.append(cells)
-                else:
-                    print(f"❌ SKIPPING incomplete table row with {len(cells)} columns: {line[:60]}...")
-                    
-            # Table separator (ignore lines starting with ---)
-            elif line.startswith('---'):
-                continue
-                
-            # End of table or regular text
-            else:
-                # If we were in a table, create it now
-                if in_table and table_data:
-                    table_element = create_table_element(table_data, styles)
-                    if table_element:
-                        story.append(table_element)
-                        story.append(Spacer(1, 0.2*inch))
-                    table_data = []
-                    in_table = False
-                
-                # Regular paragraph
-                if line:
-                    clean_line = clean_text(line)
-                    story.append(Paragraph(clean_line, styles['normal']))
-        
-        # Handle final table if exists
-        if in_table and table_data:
-            table_element = create_table_element(table_data, styles)
-            if table_element:
-                story.append(table_element)
-                story.append(Spacer(1, 0.2*inch))
-        
-        # Footer space
-        story.append(Spacer(1, 0.2*inch))
-        
-        # Build PDF
-        doc.build(story)
+        render_pdf(content, str(output_file), compact=compact)
         
         print(f"✅ Successfully converted '{markdown_file}' to '{output_file}'")
         return True
@@ -309,21 +397,191 @@ def convert_markdown_to_pdf(markdown_file, output_file=None):
         traceback.print_exc()
         return False
 
+# Bulk conversion
+
+# Bump when the rendering changes, so bulk runs re-export unchanged markdown
+CONVERTER_VERSION = "1"
+MANIFEST_NAME = ".pdf_manifest.json"
+
+# Per-process styles, built once by the pool initializer
+_worker_styles = None
+
+def _init_worker():
+    """Pool initializer: build the paragraph styles once per worker process."""
+    global _worker_styles
+    _worker_styles = create_styles()
+
+def _convert_worker(content, output_file, compact=False):
+    """Render one document in a worker; returns the output size in bytes."""
+    os.makedirs(os.path.dirname(os.path.abspath(output_file)), exist_ok=True)
+    temp_file = f"{output_file}.tmp"
+    render_pdf(content, temp_file, _worker_styles, compact)
+    os.replace(temp_file, output_file)
+    return os.path.getsize(output_file)
+
+def _glob_root(pattern):
+    """The directory part of a glob pattern before its first wildcard."""
+    parts = []
+    for part in Path(pattern).parts:
+        if glob.has_magic(part):
+            break
+        parts.append(part)
+    return str(Path(*parts)) if parts else '.'
+
+def expand_inputs(inputs):
+    """
+    Markdown files named by paths, directories (searched recursively) or glob patterns.
+    
+    Returns (file, root) pairs, where root is the directory the file's
+    output path is taken relative to: the searched directory, the glob's
+    fixed prefix, or the file's own directory.
+    """
+    files = {}
+    for pattern in inputs:
+        if os.path.isdir(pattern):
+            for markdown_file in sorted(glob.glob(os.path.join(pattern, '**', '*.md'), recursive=True)):
+                files.setdefault(markdown_file, pattern)
+        elif glob.has_magic(pattern):
+            for markdown_file in sorted(glob.glob(pattern, recursive=True)):
+                files.setdefault(markdown_file, _glob_root(pattern))
+        else:
+            files.setdefault(pattern, os.path.dirname(pattern) or '.')
+    # Keep order, drop duplicates
+    return list(files.items())
+
+def _output_path(markdown_file, output_dir, root='.'):
+    """PDF path: next to the markdown, or mirrored under output_dir relative to its input root."""
+    if output_dir is None:
+        return str(Path(markdown_file).with_suffix('.pdf'))
+    relative = os.path.relpath(markdown_file, root)
+    return os.path.join(output_dir, str(Path(relative).with_suffix('.pdf')))
+
+def _manifest_path(files, output_dir):
+    """Manifest lives in the output directory, or the inputs' common directory."""
+    if output_dir:
+        base = output_dir
+    elif files:
+        base = os.path.commonpath([os.path.dirname(os.path.abspath(f)) for f in files])
+    else:
+        base = '.'
+    return os.path.join(base, MANIFEST_NAME)
+
+def _load_manifest(path):
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+def _save_manifest(path, manifest):
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    with open(f"{path}.tmp", 'w', encoding='utf-8') as f:
+        json.dump(manifest, f, indent=0, sort_keys=True)
+    os.replace(f"{path}.tmp", path)
+
+def convert_many(inputs, output_dir=None, workers=None, force=False, progress_every=1.0, compact=False):
+    """
+    Convert many markdown files across a process pool.
+    
+    Outputs whose markdown (and converter version) hash matches the manifest
+    from an earlier run are skipped unless `force` is set. Progress and
+    throughput are printed at most every `progress_every` seconds.
+    
+    Returns a dict of counts, elapsed seconds and documents per second.
+    """
+    inputs = expand_inputs(inputs)
+    files = [markdown_file for markdown_file, _ in inputs]
+    manifest_path = _manifest_path(files, output_dir)
+    manifest = {} if force else _load_manifest(manifest_path)
+    
+    counts = {'total': len(files), 'converted': 0, 'skipped': 0, 'failed': 0, 'bytes': 0}
+    start = time.perf_counter()
+    jobs = []
+    claimed = {}
+    for markdown_file, root in inputs:
+        output_file = _output_path(markdown_file, output_dir, root)
+        key = os.path.abspath(output_file)
+        # Two inputs must never render to (and race on) the same PDF
+        if key in claimed:
+            print(f"❌ {markdown_file}: output {output_file} already used by {claimed[key]}")
+            counts['failed'] += 1
+            continue
+        claimed[key] = markdown_file
+        try:
+            with open(markdown_file, 'r', encoding='utf-8') as f:
+                content = f.read()
+        except OSError as e:
+            print(f"❌ {markdown_file}: {e}")
+            counts['failed'] += 1
+            continue
+        mode = 'compact' if compact else 'standard'
+        digest = hashlib.sha256((CONVERTER_VERSION + mode + content).encode('utf-8')).hexdigest()
+        if not force and manifest.get(key) == digest and os.path.exists(output_file):
+            counts['skipped'] += 1
+            continue
+        jobs.append((markdown_file, output_file, key, digest, content))
+    
+    print(f"📚 {counts['total']} markdown files: {len(jobs)} to convert, {counts['skipped']} unchanged")
+    
+    last_report = start
+    if jobs:
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker) as pool:
+            futures = {pool.submit(_convert_worker, content, output_file, compact): (markdown_file, key, digest)
+                       for markdown_file, output_file, key, digest, content in jobs}
+            for done, future in enumerate(as_completed(futures), 1):
+                markdown_file, key, digest = futures[future]
+                try:
+                    counts['bytes'] += future.result()
+                    counts['converted'] += 1
+                    manifest[key] = digest
+                except Exception as e:
+                    counts['failed'] += 1
+                    print(f"❌ {markdown_file}: {e}")
+                
+                now = time.perf_counter()
+                if now - last_report >= progress_every or done == len(jobs):
+                    last_report = now
+                    rate = done / (now - start)
+                    print(f"📄 {done}/{len(jobs)} converted ({counts['failed']} failed), {rate:.1f} docs/s")
+        
+        _save_manifest(manifest_path, manifest)
+    
+    elapsed = time.perf_counter() - start
+    counts['elapsed_s'] = round(elapsed, 2)
+    counts['docs_per_s'] = round(counts['converted'] / elapsed, 1) if elapsed else 0.0
+    print(f"✅ {counts['converted']} converted, {counts['skipped']} skipped, {counts['failed']} failed "
+          f"in {elapsed:.1f}s ({counts['docs_per_s']} docs/s, {counts['bytes'] / 1e6:.1f} MB)")
+    return counts
+
 if __name__ == "__main__":
-    import sys
-    if len(sys.argv) < 2:
-        print("Usage: python3 manual_table_converter.py <markdown_file> [output_file]")
-        sys.exit(1)
+    import argparse
     
-    input_file = sys.argv[1]
-    output_file = sys.argv[2] if len(sys.argv) > 2 else None
+    parser = argparse.ArgumentParser(
+        description="Convert markdown summaries to PDF",
+        usage="python3 manual_table_converter.py <markdown_file> [output_file]\n"
+              "       python3 manual_table_converter.py <file|directory|glob> ... [-o OUTPUT_DIR] [-j WORKERS] [--force]"
+    )
+    parser.add_argument("inputs", nargs="+")
+    parser.add_argument("-o", "--output-dir", help="Write PDFs here, mirroring input subdirectories, instead of next to each markdown file")
+    parser.add_argument("-j", "--workers", type=int, default=None, help="Worker processes (default: CPU count)")
+    parser.add_argument("--force", action="store_true", help="Convert even if the markdown is unchanged")
+    parser.add_argument("--compact", action="store_true", help="Smaller PDFs (see render_pdf)")
+    args = parser.parse_args()
     
-    success = convert_markdown_to_pdf(input_file, output_file)
-    if success:
-        print("🎉 PDF conversion completed successfully!")
+    # Original single-file form: <markdown_file> [output_file]
+    single = (len(args.inputs) == 1 and os.path.isfile(args.inputs[0])) or \
+             (len(args.inputs) == 2 and args.inputs[1].endswith('.pdf'))
+    if single and not args.output_dir:
+        output_file = args.inputs[1] if len(args.inputs) > 1 else None
+        success = convert_markdown_to_pdf(args.inputs[0], output_file, args.compact)
+        if success:
+            print("🎉 PDF conversion completed successfully!")
+        else:
+            print("❌ PDF conversion failed.")
+            sys.exit(1)
     else:
-        print("❌ PDF conversion failed.")
-        sys.exit(1)
+        counts = convert_many(args.inputs, args.output_dir, args.workers, args.force, compact=args.compact)
+        sys.exit(1 if counts['failed'] else 0)
 
 
 
@@ -0,0 +1,202 @@
+"""
+LLM Cassettes
+Record/replay of LLM calls. In record mode every request fingerprint
+(model, generation config, prompt hash) is stored with its response and
+timing in a compact gzipped JSON-lines file; replay mode serves those
+responses deterministically, with the original latency or a scaled one.
+
+Enable with environment variables (read once, by get_cassette):
+
+    LLM_CASSETTE_MODE=record|replay
+    LLM_CASSETTE_PATH=cassettes/interview.jsonl.gz
+    LLM_CASSETTE_LATENCY_SCALE=1.0   (0 = instant, 2 = twice as slow)
+"""
+
+from collections import defaultdict
+from typing import Callable, Dict, Iterator, Optional, Tuple
+import gzip
+import hashlib
+import json
+import os
+import threading
+import time
+
+RECORD = "record"
+REPLAY = "replay"
+
+DEFAULT_CASSETTE_PATH = os.path.join(os.path.dirname(__file__), '..', '..', 'cassettes', 'llm.jsonl.gz')
+
+
+class CassetteMiss(KeyError):
+    """Replay mode was asked for a request that was never recorded"""
+
+
+def _config_key(config):
+    """JSON-able form of a generation config (genai pydantic model, Vertex config or dict)"""
+    if config is None:
+        return None
+    if hasattr(config, "model_dump"):
+        return config.model_dump(mode="json", exclude_none=True)
+    if hasattr(config, "to_dict"):
+        return config.to_dict()
+    return config
+
+
+def fingerprint(model_name: str, config, prompt: str, stream: bool = False) -> str:
+    """Stable key for one request"""
+    prompt_hash = hashlib.sha256(prompt.encode("utf-8")).hexdigest()
+    payload = json.dumps([model_name, _config_key(config), prompt_hash, stream], sort_keys=True, default=str)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()[:32]
+
+
+def _open(path: str, mode: str):
+    if path.endswith(".gz"):
+        return gzip.open(path, mode + "t", encoding="utf-8")
+    return open(path, mode, encoding="utf-8")
+
+
+class Cassette:
+    """
+    One cassette file in record or replay mode
+
+    Identical requests are replayed in the order they were recorded; once
+    a fingerprint's recordings run out, the last one keeps being served.
+    """
+
+    def __init__(self, path: str = DEFAULT_CASSETTE_PATH, mode: str = REPLAY, latency_scale: float = 1.0):
+        if mode not in (RECORD, REPLAY):
+            raise ValueError(f"Cassette mode must be '{RECORD}' or '{REPLAY}', got '{mode}'")
+        self.path = path
+        self.mode = mode
+        self.latency_scale = latency_scale
+        self._lock = threading.Lock()
+        self._entries = defaultdict(list)
+        self._positions = defaultdict(int)
+        self.counts = {"recorded": 0, "replayed": 0, "misses": 0}
+
+        if mode == REPLAY:
+            self._load()
+        else:
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        print(f"📼 LLM cassette in {mode} mode: {path}")
+
+    def _load(self):
+        if not os.path.exists(self.path):
+            raise FileNotFoundError(f"Cassette not found: {self.path}")
+        with _open(self.path, "r") as f:
+            for line in f:
+                if line.strip():
+                    entry = json.loads(line)
+                    self._entries[entry["fp"]].append(entry)
+
+    def _append(self, entry: Dict):
+        # Appending gzip members keeps a crashed recording readable up to the last call
+        with self._lock:
+            with _open(self.path, "a") as f:
+                f.write(json.dumps(entry, ensure_ascii=False, separators=(",", ":")) + "\n")
+            self.counts["recorded"] += 1
+
+    def _next(self, key: str) -> Dict:
+        with self._lock:
+            entries = self._entries.get(key)
+            if not entries:
+                self.counts["misses"] += 1
+                raise CassetteMiss(f"No recorded response for request {key} in {self.path}")
+            position = self._positions[key]
+            self._positions[key] = position + 1
+            self.counts["replayed"] += 1
+            return entries[min(position, len(entries) - 1)]
+
+    def _sleep(self, seconds: float):
+        if seconds > 0 and self.latency_scale > 0:
+            time.sleep(seconds * self.latency_scale)
+
+    def call(
+        self,
+        model_name: str,
+        config,
+        prompt: str,
+        invoke: Callable[[], Tuple[str, Optional[Dict[str, int]]]]
+    ) -> Tuple[str, Optional[Dict[str, int]]]:
+        """
+        Record or replay one generate call
+
+        Args:
+            invoke: Makes the real call; returns (text, usage)
+
+        Returns:
+            (text, usage) as recorded or as just received
+        """
+        key = fingerprint(model_name, config, prompt)
+        if self.mode == REPLAY:
+            entry = self._next(key)
+            self._sleep(entry["latency_s"])
+            return entry["text"], entry.get("usage")
+
+        start = time.perf_counter()
+        text, usage = invoke()
+        self._append({
+            "fp": key,
+            "model": model_name,
+            "latency_s": round(time.perf_counter() - start, 4),
+            "text": text,
+            "usage": usage
+        })
+        return text, usage
+
+    def stream(self, model_name: str, config, prompt: str, invoke: Callable[[], Iterator[str]]) -> Iterator[str]:
+        """Record or replay a streamed call, keeping each chunk's arrival time"""
+        key = fingerprint(model_name, config, prompt, stream=True)
+        if self.mode == REPLAY:
+            entry = self._next(key)
+            elapsed = 0.0
+            for offset, text in entry["chunks"]:
+                self._sleep(offset - elapsed)
+                elapsed = offset
+                yield text
+            return
+
+        start = time.perf_counter()
+        chunks = []
+        for text in invoke():
+            chunks.append([round(time.perf_counter() - start, 4), text])
+            yield text
+        # Only complete streams are recorded; an abandoned one would replay truncated
+        self._append({
+            "fp": key,
+            "model": model_name,
+            "latency_s": round(time.perf_counter() - start, 4),
+            "chunks": chunks
+        })
+
+    def stats(self) -> Dict:
+        with self._lock:
+            return dict(self.counts, mode=self.mode, path=self.path, latency_scale=self.latency_scale,
+                        requests=len(self._entries))
+
+
+# Process-wide cassette, configured from the environment on first use
+_cassette = None
+_configured = False
+
+
+def get_cassette() -> Optional[Cassette]:
+    """The active cassette, or None when LLM calls go straight to the API"""
+    global _cassette, _configured
+    if not _configured:
+        _configured = True
+        mode = os.getenv("LLM_CASSETTE_MODE", "").strip().lower()
+        if mode and mode != "off":
+            _cassette = Cassette(
+                os.getenv("LLM_CASSETTE_PATH", DEFAULT_CASSETTE_PATH),
+                mode,
+                float(os.getenv("LLM_CASSETTE_LATENCY_SCALE", "1.0"))
+            )
+    return _cassette
+
+
+def set_cassette(cassette: Optional[Cassette]):
+    """Install (or with None, remove) the process-wide cassette, overriding the environment"""
+    global _cassette, _configured
+    _cassette = cassette
+    _configured = True
@@ -3,13 +3,37 @@ Conversation Management System
 Handles conversation state, prompts, and interview logic
 """
 
-from typing import List, Dict, Optional
+from typing import List, Dict, Optional, Iterator, Tuple
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
 from .llm_client import get_gemini_client, get_vertex_ai_client
+from .schemas import Job, StructuredSummary
+from .keyword_matcher import get_default_matcher, OCCUPATION, TRANSITION
+from .jem import get_jem_index, compact_doctor_prompt
+from .summary_pipeline import IncrementalSummaryPipeline, NOTES
+from .transcript import TranscriptSlice, ChunkState, new_chunk
+from .usage import TokenBudget
+from reports.markdown_ast import parse_markdown, extract_jobs, SectionStreamer
+from sessions.shared_cache import get_shared_cache
 import os
 import json
-import re
+import hashlib
+import contextvars
+import threading
 from datetime import datetime
 
+# Concurrent occupation summaries in generate_comprehensive_summary
+COMPREHENSIVE_SUMMARY_FANOUT = int(os.getenv("COMPREHENSIVE_SUMMARY_FANOUT", "4"))
+
+# Maximum number of structured summaries kept in memory
+SUMMARY_CACHE_SIZE = 64
+
+# Sessions whose occupation chunks are kept in memory (least recently used dropped first)
+CHUNK_STATE_SESSIONS = int(os.getenv("CHUNK_STATE_SESSIONS", "200"))
+
+# Streamed summaries (jobs parsed from markdown) are cached apart from structured ones
+STREAMED_KEY_SUFFIX = ":streamed"
+
 class ConversationManager:
     """Manages the occupational history interview conversation"""
     
@@ -18,11 +42,65 @@ class ConversationManager:
         self.summary_client = get_vertex_ai_client()  # For summaries (Gemini 2.5 Pro via Vertex AI)
         self.interview_prompt = self._load_interview_prompt()
         self.summary_prompt = self._load_summary_prompt()
+        self.occupation_notes_prompt = self._load_occupation_notes_prompt()
+        
+        # Structured patient summaries keyed by transcript hash (the shared
+        # tier, when configured, makes them visible to every worker process)
+        self.summary_cache = OrderedDict()
+        self.shared_cache = get_shared_cache()
         
-        # Occupation-based chunking
-        self.current_occupation = None
-        self.occupation_chunks = {}
-        self.conversation_history = []
+        # Per-session occupation notes, summarized in the background during the interview
+        self.summary_pipeline = IncrementalSummaryPipeline(self._summarize_occupation_segment)
+        
+        # Prompt guardrails: compact or refuse oversized requests before the provider call
+        self.token_budget = TokenBudget()
+        
+        # Occupation-based chunking, keyed by session like the summary pipeline;
+        # each session's chunks are (start, end) offsets into its own immutable transcript
+        self.keyword_matcher = get_default_matcher()
+        self._default_chunks = ChunkState()  # requests without a session id
+        self._chunk_states = OrderedDict()
+        self._chunk_lock = threading.Lock()
+    
+    def _chunks(self, session_id: Optional[str] = None, reset: bool = False) -> ChunkState:
+        """A session's chunk state (created or reset on demand; LRU-bounded)"""
+        if session_id is None:
+            if reset:
+                self._default_chunks = ChunkState()
+            return self._default_chunks
+        with self._chunk_lock:
+            state = self._chunk_states.get(session_id)
+            if state is None or reset:
+                state = self._chunk_states[session_id] = ChunkState()
+                while len(self._chunk_states) > CHUNK_STATE_SESSIONS:
+                    self._chunk_states.popitem(last=False)
+            self._chunk_states.move_to_end(session_id)
+            return state
+    
+    def _observe_history(self, conversation_history: List[Dict[str, str]], session_id: Optional[str]) -> ChunkState:
+        """Record a session's latest transcript; a shorter (resynced) one restarts its chunks"""
+        state = self._chunks(session_id)
+        if len(conversation_history) < state.chunk_start:
+            state = self._chunks(session_id, reset=True)
+        state.conversation_history = tuple(conversation_history)
+        return state
+    
+    # Chunk state of requests without a session id (single-interview use, benchmarks)
+    @property
+    def occupation_chunks(self) -> Dict[str, Dict]:
+        return self._default_chunks.occupation_chunks
+    
+    @occupation_chunks.setter
+    def occupation_chunks(self, value: Dict[str, Dict]):
+        self._default_chunks.occupation_chunks = value
+    
+    @property
+    def conversation_history(self) -> Tuple[Dict[str, str], ...]:
+        return self._default_chunks.conversation_history
+    
+    @conversation_history.setter
+    def conversation_history(self, value):
+        self._default_chunks.conversation_history = tuple(value)
     
     def _load_interview_prompt(self) -> str:
         """Load the main interview system prompt - prioritize the advanced v3.3 prompt"""
@@ -93,89 +171,87 @@ class ConversationManager:
         except FileNotFoundError:
             raise FileNotFoundError(f"Summary prompt not found at {prompt_path}")
     
-    def _detect_occupation_transition(self, message_content: str) -> Optional[str]:
-        """
-        Detect when Dr. O transitions to a new occupation
-        Returns the new occupation name if detected, None otherwise
-        """
-        # Common transition phrases
-        transition_patterns = [
-            r"Now, let's talk about the job you had (?:right )?before",
-            r"Let's move to your (?:previous|earlier) job",
-            r"Now, let's discuss your time",
-            r"Let's move on to the job you had",
-            r"Now, let's move on to",
-            r"Let's talk about your (?:previous|earlier) work"
-        ]
-        
-        for pattern in transition_patterns:
-            if re.search(pattern, message_content, re.IGNORECASE):
-                # Try to extract occupation name from the message
-                # Look for job titles in the patient's response
-                return self._extract_occupation_from_context()
+    def _load_occupation_notes_prompt(self) -> str:
+        """Load the per-occupation notes prompt used by the summary pipeline"""
+        current_dir = os.path.dirname(os.path.abspath(__file__))
+        prompt_path = os.path.join(os.path.dirname(current_dir), "prompts", "occupation_notes_prompt.md")
         
-        return None
+        try:
+            with open(prompt_path, 'r', encoding='utf-8') as f:
+                return f.read()
+        except FileNotFoundError:
+            raise FileNotFoundError(f"Occupation notes prompt not found at {prompt_path}")
     
-    def _extract_occupation_from_context(self) -> Optional[str]:
+    def _extract_occupation_from_context(self, conversation_history: Optional[List[Dict[str, str]]] = None) -> Optional[str]:
         """
         Extract occupation name from recent conversation context
         """
+        if conversation_history is None:
+            conversation_history = self.conversation_history
+        
         # Look at the last few messages to find occupation mentions
-        recent_messages = self.conversation_history[-6:]  # Last 6 messages
+        recent_messages = conversation_history[-6:]  # Last 6 messages
         
         for message in reversed(recent_messages):
             if message["role"] == "user":  # Patient response
-                content = message["content"].lower()
-                
-                # Common occupation keywords
-                occupation_keywords = [
-                    "welder", "welding", "construction", "miner", "mining", 
-                    "mechanic", "farming", "farmer", "carpenter", "electrician",
-                    "plumber", "painter", "machinist", "operator", "supervisor",
-                    "foreman", "contractor", "renovation", "demolition"
-                ]
-                
-                for keyword in occupation_keywords:
-                    if keyword in content:
-                        # Try to get more context
-                        words = content.split()
-                        for i, word in enumerate(words):
-                            if keyword in word:
-                                # Get surrounding words for context
-                                start = max(0, i-2)
-                                end = min(len(words), i+3)
-                                context = " ".join(words[start:end])
-                                return context.strip()
+                content = message["content"]
+                match = self.keyword_matcher.first(content, OCCUPATION)
+                if match:
+                    # Keep two words either side for context
+                    before = content[:match.start].split()[-2:]
+                    after = content[match.end:].split()[:2]
+                    context = " ".join(before + [content[match.start:match.end]] + after)
+                    return context.lower().strip()
         
         return None
     
-    def _chunk_conversation_by_occupation(self, message_content: str):
+    def _chunk_conversation_by_occupation(self, message_content: str, session_id: Optional[str] = None,
+                                          conversation_history: Optional[List[Dict[str, str]]] = None):
         """
-        Chunk conversation by occupation transitions
+        Close the open occupation chunk when Dr. O moves on to another job
+        
+        The chunk ends before the reply and is labelled with the occupation
+        the patient described in it. The session's chunk state is the only
+        segmentation: with a session id, the same chunk (same label and
+        offsets) is handed to the summary pipeline so its notes are ready
+        before the interview ends.
         """
-        # Check if this is a transition to a new occupation
-        new_occupation = self._detect_occupation_transition(message_content)
+        if not self.keyword_matcher.first(message_content, TRANSITION):
+            return
         
-        if new_occupation and new_occupation != self.current_occupation:
-            # Save current occupation chunk
-            if self.current_occupation:
-                self.occupation_chunks[self.current_occupation] = {
-                    "messages": self.conversation_history.copy(),
-                    "start_time": datetime.now().isoformat(),
-                    "summary": None
-                }
-                print(f"📋 Chunked conversation for occupation: {self.current_occupation}")
-            
-            # Start new occupation
-            self.current_occupation = new_occupation
-            print(f"🔄 Transitioning to new occupation: {new_occupation}")
+        state = self._chunks(session_id)
+        history = state.conversation_history
+        start, end = state.chunk_start, len(history)
+        if end <= start:
+            return
+        
+        label = self._close_chunk(state, start, end)
+        print(f"📋 Chunked conversation for occupation: {label} (messages {start}-{end - 1})")
+        
+        if session_id:
+            self.summary_pipeline.submit(session_id, history, label, start, end)
+    
+    def _close_chunk(self, state: ChunkState, start: int, end: int) -> str:
+        """Record messages [start, end) as a chunk labelled by the occupation discussed in them"""
+        label = self._extract_occupation_from_context(TranscriptSlice(state.conversation_history, start, end)) \
+            or f"Job {len(state.occupation_chunks) + 1}"
+        if label in state.occupation_chunks:
+            label = f"{label} ({len(state.occupation_chunks) + 1})"
+        state.occupation_chunks[label] = new_chunk(start, end, datetime.now().isoformat())
+        state.chunk_start = end
+        return label
     
-    def start_interview(self) -> Dict[str, str]:
-        """Start a new interview conversation"""
+    def start_interview(self, session_id: Optional[str] = None) -> Dict[str, str]:
+        """
+        Start a new interview conversation
+        
+        Args:
+            session_id: Interview session whose chunk state is reset
+        """
         # Reset conversation state
-        self.current_occupation = "initial"
-        self.occupation_chunks = {}
-        self.conversation_history = []
+        state = self._chunks(session_id, reset=True)
+        if session_id:
+            self.summary_pipeline.discard(session_id)
         
         # Generate the opening message from Dr. O
         opening_messages = []
@@ -191,27 +267,31 @@ class ConversationManager:
         }
         
         # Add to conversation history
-        self.conversation_history.append(result)
+        state.conversation_history = (result,)
         
         return result
     
-    def continue_interview(self, conversation_history: List[Dict[str, str]]) -> Dict[str, str]:
+    def continue_interview(self, conversation_history: List[Dict[str, str]], session_id: Optional[str] = None) -> Dict[str, str]:
         """
         Continue the interview conversation
         
         Args:
             conversation_history: List of message dictionaries with 'role' and 'content'
+            session_id: Interview session, enabling background occupation summaries
             
         Returns:
             Next response from Dr. O
         """
-        # Update internal conversation history
-        self.conversation_history = conversation_history.copy()
+        # Update the session's conversation history (one snapshot; its chunks hold offsets into it)
+        self._observe_history(conversation_history, session_id)
         
         # Safety is handled by the LLM system prompt - no backend filtering needed
         
+        # The browser can send any history; oversized ones are compacted or refused
+        messages = self.token_budget.fit(self.interview_prompt, conversation_history, session_id)
+        
         response = self.llm_client.generate_response(
-            messages=conversation_history,
+            messages=messages,
             system_prompt=self.interview_prompt
         )
         
@@ -221,36 +301,69 @@ class ConversationManager:
         }
         
         # Check for occupation transitions
-        self._chunk_conversation_by_occupation(response)
+        self._chunk_conversation_by_occupation(response, session_id, conversation_history)
         
         return result
     
-    def generate_occupation_summary(self, occupation_name: str) -> str:
+    def stream_interview(self, conversation_history: List[Dict[str, str]], session_id: Optional[str] = None) -> Iterator[str]:
+        """
+        Continue the interview, yielding Dr. O's reply as it is generated
+        
+        Occupation transitions are detected once the full reply is known,
+        exactly as in continue_interview.
+        
+        Args:
+            conversation_history: List of message dictionaries with 'role' and 'content'
+            session_id: Interview session, enabling background occupation summaries
+            
+        Yields:
+            Text chunks of Dr. O's next response
+        """
+        self._observe_history(conversation_history, session_id)
+        messages = self.token_budget.fit(self.interview_prompt, conversation_history, session_id)
+        
+        response = ""
+        for chunk in self.llm_client.stream_response(
+            messages=messages,
+            system_prompt=self.interview_prompt
+        ):
+            response += chunk
+            yield chunk
+        
+        # Check for occupation transitions
+        self._chunk_conversation_by_occupation(response.strip(), session_id, conversation_history)
+    
+    def chunk_messages(self, occupation_name: str, session_id: Optional[str] = None) -> TranscriptSlice:
+        """
+        Messages of one occupation chunk, as a zero-copy view of the transcript
+        
+        Args:
+            occupation_name: Name of the occupation chunk
+            session_id: Interview session the chunk belongs to
+        """
+        state = self._chunks(session_id)
+        chunk_data = state.occupation_chunks[occupation_name]
+        return TranscriptSlice(state.conversation_history, chunk_data["start"], chunk_data["end"])
+    
+    def generate_occupation_summary(self, occupation_name: str, session_id: Optional[str] = None) -> str:
         """
         Generate summary for a specific occupation chunk
         
         Args:
             occupation_name: Name of the occupation to summarize
+            session_id: Interview session the chunk belongs to
             
         Returns:
             Markdown-formatted summary for that occupation
         """
-        if occupation_name not in self.occupation_chunks:
+        occupation_chunks = self._chunks(session_id).occupation_chunks
+        if occupation_name not in occupation_chunks:
             return f"## {occupation_name}\nNo conversation data available for this occupation."
         
-        chunk_data = self.occupation_chunks[occupation_name]
-        messages = chunk_data["messages"]
+        messages = self.chunk_messages(occupation_name, session_id)
         
         # Convert conversation to text for summary generation
-        conversation_text = ""
-        for message in messages:
-            role = message["role"]
-            content = message["content"]
-            
-            if role == "user":
-                conversation_text += f"Patient: {content}\n"
-            elif role == "assistant" and content != "---INTERVIEW_COMPLETE---":
-                conversation_text += f"Dr. O: {content}\n"
+        conversation_text = self._conversation_to_text(messages)
         
         # Generate summary using Vertex AI
         summary_messages = [
@@ -264,7 +377,7 @@ class ConversationManager:
             )
             
             # Store the summary
-            self.occupation_chunks[occupation_name]["summary"] = summary
+            occupation_chunks[occupation_name]["summary"] = summary
             
             return summary
             
@@ -272,30 +385,55 @@ class ConversationManager:
             print(f"❌ Error generating summary for {occupation_name}: {e}")
             return f"## {occupation_name}\nError generating summary: {str(e)}"
     
-    def generate_comprehensive_summary(self) -> str:
+    def generate_comprehensive_summary(self, max_workers: int = COMPREHENSIVE_SUMMARY_FANOUT,
+                                       session_id: Optional[str] = None) -> str:
         """
         Generate a comprehensive summary of all occupations
         
+        Occupation summaries are generated concurrently (at most
+        `max_workers` at once) and assembled in chunk order. Sections that
+        already have a summary are reused, so a retry after a partial
+        failure only regenerates the sections that failed.
+        
+        Args:
+            max_workers: Maximum concurrent occupation summaries
+            session_id: Interview session to summarize
+            
         Returns:
             Complete markdown summary with all occupations
         """
-        # Ensure current occupation is saved
-        if self.current_occupation and self.current_occupation not in self.occupation_chunks:
-            self.occupation_chunks[self.current_occupation] = {
-                "messages": self.conversation_history.copy(),
-                "start_time": datetime.now().isoformat(),
-                "summary": None
-            }
+        state = self._chunks(session_id)
+        occupation_chunks = state.occupation_chunks
+        
+        # Close the open (last) chunk
+        start = max([chunk["end"] for chunk in occupation_chunks.values()], default=state.chunk_start)
+        end = len(state.conversation_history)
+        if end > start:
+            self._close_chunk(state, start, end)
+        
+        occupation_names = list(occupation_chunks.keys())
+        pending = [name for name in occupation_names if not occupation_chunks[name]["summary"]]
+        
+        # Generate summaries for each occupation (bounded fan-out)
+        sections = {name: occupation_chunks[name]["summary"] for name in occupation_names}
+        if pending:
+            with ThreadPoolExecutor(max_workers=max(1, min(max_workers, len(pending)))) as pool:
+                # Each worker runs in a copy of this context, so its tokens are charged to the caller's request
+                futures = {name: pool.submit(contextvars.copy_context().run, self.generate_occupation_summary, name, session_id)
+                           for name in pending}
+                for name, future in futures.items():
+                    sections[name] = future.result()
+        
+        failed = [name for name in occupation_names if not occupation_chunks[name]["summary"]]
+        if failed:
+            print(f"⚠️ {len(failed)} of {len(occupation_names)} occupation summaries failed: {', '.join(failed)}")
         
-        # Generate summaries for each occupation
         comprehensive_summary = "# OCCUPATIONAL HISTORY SUMMARY REPORT\n\n"
         comprehensive_summary += f"**Generated:** {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}\n"
-        comprehensive_summary += f"**Total Occupations:** {len(self.occupation_chunks)}\n\n"
+        comprehensive_summary += f"**Total Occupations:** {len(occupation_chunks)}\n\n"
         
-        for occupation_name in self.occupation_chunks.keys():
-            if occupation_name != "initial":
-                summary = self.generate_occupation_summary(occupation_name)
-                comprehensive_summary += f"{summary}\n\n"
+        for occupation_name in occupation_names:
+            comprehensive_summary += f"{sections[occupation_name]}\n\n"
         
         return comprehensive_summary
     
@@ -309,40 +447,136 @@ class ConversationManager:
         Returns:
             Markdown-formatted summary text for patients
         """
-        # Convert conversation to a single text for summary generation
-        conversation_text = ""
-        for message in conversation_history:
-            role = message["role"]
-            content = message["content"]
+        return self.generate_structured_summary(conversation_history).markdown
+    
+    def generate_structured_summary(self, conversation_history: List[Dict[str, str]]) -> StructuredSummary:
+        """
+        Generate the patient-facing summary and its typed job list in one LLM call
+        
+        Results are cached by transcript so the review page and later requests
+        for the same interview do not pay for another generation.
+        
+        Args:
+            conversation_history: Complete conversation
             
-            if role == "user":
-                conversation_text += f"Patient: {content}\n"
-            elif role == "assistant" and content != "---INTERVIEW_COMPLETE---":
-                conversation_text += f"Dr. O: {content}\n"
+        Returns:
+            StructuredSummary with markdown and jobs
+        """
+        # Convert conversation to a single text for summary generation
+        conversation_text = self._conversation_to_text(conversation_history)
+        cache_key = self.summary_cache_key(conversation_text)
+        
+        cached = self._cached_summary(cache_key)
+        if cached is not None:
+            return cached
         
         # Generate summary using the patient-facing summary prompt
         summary_messages = [
             {"role": "user", "content": f"Please summarize this interview:\n\n{conversation_text}"}
         ]
         
-        summary = self.summary_client.generate_response(
+        self.token_budget.check(self.summary_prompt, summary_messages)
+        structured = self.summary_client.generate_structured_summary(
             messages=summary_messages,
             system_prompt=self.summary_prompt
         )
         
-        return summary
+        # Fall back to parsing the markdown if the model returned no jobs
+        if not structured.jobs:
+            structured.jobs = [Job(**job) for job in extract_jobs(parse_markdown(structured.markdown))]
+        
+        self._cache_summary(cache_key, structured)
+        
+        return structured
     
-    def generate_doctor_summary(self, conversation_history: List[Dict[str, str]]) -> str:
+    def stream_summary(self, conversation_history: List[Dict[str, str]]) -> Iterator[Tuple[str, object]]:
         """
-        Generate a doctor-facing detailed analysis of the complete interview
+        Stream the patient-facing summary section by section
+        
+        Yields ("section", markdown) for each completed `##` section, then a
+        final ("complete", (StructuredSummary, cache_key)) once generation
+        finishes. A cached structured summary is replayed when there is one;
+        otherwise the streamed result is cached under its own key, since its
+        jobs are parsed from markdown rather than generated, so
+        generate_structured_summary never returns it.
         
         Args:
             conversation_history: Complete conversation
-            
-        Returns:
-            Markdown-formatted detailed analysis for doctors
         """
-        # Convert conversation to a single text for summary generation
+        conversation_text = self._conversation_to_text(conversation_history)
+        cache_key = self.summary_cache_key(conversation_text)
+        streamer = SectionStreamer()
+        
+        streamed_key = f"{cache_key}{STREAMED_KEY_SUFFIX}"
+        structured = self._cached_summary(cache_key) or self._cached_summary(streamed_key)
+        if structured is not None:
+            for section in streamer.feed(structured.markdown + "\n"):
+                yield "section", section
+        else:
+            summary_messages = [
+                {"role": "user", "content": f"Please summarize this interview:\n\n{conversation_text}"}
+            ]
+            
+            self.token_budget.check(self.summary_prompt, summary_messages)
+            markdown_text = ""
+            for chunk in self.summary_client.stream_response(
+                messages=summary_messages,
+                system_prompt=self.summary_prompt
+            ):
+                markdown_text += chunk
+                for section in streamer.feed(chunk):
+                    yield "section", section
+            
+            # Jobs come from the shared document tree (JSON mode cannot stream sections)
+            markdown_text = markdown_text.strip()
+            structured = StructuredSummary(
+                markdown=markdown_text,
+                jobs=[Job(**job) for job in extract_jobs(parse_markdown(markdown_text))]
+            )
+            self._cache_summary(streamed_key, structured)
+        
+        final_section = streamer.flush()
+        if final_section:
+            yield "section", final_section
+        
+        yield "complete", (structured, cache_key)
+    
+    def _cached_summary(self, cache_key: str) -> Optional[StructuredSummary]:
+        """A cached structured summary from this process or the shared tier"""
+        if cache_key in self.summary_cache:
+            self.summary_cache.move_to_end(cache_key)
+            return self.summary_cache[cache_key]
+        
+        if self.shared_cache is not None:
+            payload = self.shared_cache.get(f"summary:{cache_key}")
+            if payload is not None:
+                structured = StructuredSummary.model_validate_json(payload)
+                self._cache_summary(cache_key, structured, share=False)
+                return structured
+        return None
+    
+    def _cache_summary(self, cache_key: str, structured: StructuredSummary, share: bool = True):
+        """Store a structured summary, evicting the least recently used (fallback summaries are not stored)"""
+        if not structured.cacheable:
+            return
+        self.summary_cache[cache_key] = structured
+        while len(self.summary_cache) > SUMMARY_CACHE_SIZE:
+            self.summary_cache.popitem(last=False)
+        if share and self.shared_cache is not None:
+            self.shared_cache.put(f"summary:{cache_key}", structured.model_dump_json().encode('utf-8'))
+    
+    def summary_cache_key_for(self, conversation_history: List[Dict[str, str]]) -> str:
+        """Summary cache key for a conversation"""
+        return self.summary_cache_key(self._conversation_to_text(conversation_history))
+    
+    @staticmethod
+    def summary_cache_key(conversation_text: str) -> str:
+        """Hash of the transcript text used to key cached summaries"""
+        return hashlib.sha256(conversation_text.encode('utf-8')).hexdigest()
+    
+    @staticmethod
+    def _conversation_to_text(conversation_history: List[Dict[str, str]]) -> str:
+        """Convert conversation messages to a Patient/Dr. O transcript"""
         conversation_text = ""
         for message in conversation_history:
             role = message["role"]
@@ -352,15 +586,93 @@ class ConversationManager:
                 conversation_text += f"Patient: {content}\n"
             elif role == "assistant" and content != "---INTERVIEW_COMPLETE---":
                 conversation_text += f"Dr. O: {content}\n"
+        return conversation_text
+    
+    def _summarize_occupation_segment(self, label: str, messages: List[Dict[str, str]]) -> str:
+        """
+        Map step: condense one occupation segment into notes
         
-        # Load the doctor-specific prompt
+        Args:
+            label: Occupation name detected for the segment
+            messages: The segment's messages
+            
+        Returns:
+            Markdown notes for the reduce step
+        """
+        segment_text = self._conversation_to_text(messages)
+        return self.summary_client.generate_response(
+            messages=[{"role": "user", "content": f"Interview segment ({label}):\n\n{segment_text}"}],
+            system_prompt=self.occupation_notes_prompt
+        )
+    
+    def _reduce_request(self, segments: List[Tuple[str, str, object]]) -> str:
+        """Build the doctor summary request from pipeline notes and remaining transcript"""
+        parts = [
+            "Please analyze this interview. Earlier job segments were condensed into notes while the "
+            "interview was running; the other segments are verbatim transcript. Treat both as the "
+            "patient's own account."
+        ]
+        for kind, label, payload in segments:
+            if kind == NOTES:
+                parts.append(f"## Segment: {label} (notes)\n\n{payload}")
+            else:
+                parts.append(f"## Segment: {label} (transcript)\n\n{self._conversation_to_text(payload)}")
+        return "\n\n".join(parts)
+    
+    def _doctor_prompt_for(self, conversation_history: List[Dict[str, str]]) -> str:
+        """Doctor prompt with the JEM section replaced by this transcript's pre-computed hints"""
         doctor_prompt = self._load_doctor_summary_prompt()
+        try:
+            annotation = get_jem_index().annotate(conversation_history)
+            doctor_prompt = compact_doctor_prompt(doctor_prompt, annotation)
+        except (OSError, ValueError) as e:
+            print(f"⚠️ JEM index unavailable, using the full prompt: {e}")
+        return doctor_prompt
+    
+    def doctor_summary_request(self, conversation_history: List[Dict[str, str]]) -> Tuple[str, List[Dict[str, str]]]:
+        """
+        System prompt and messages for a one-pass doctor summary of a transcript
         
-        # Generate summary using the doctor-facing prompt
-        summary_messages = [
+        Shared by generate_doctor_summary and offline bulk regeneration, so
+        both send the summary model exactly the same request.
+        
+        Returns:
+            (doctor prompt, summary messages)
+        """
+        conversation_text = self._conversation_to_text(conversation_history)
+        return self._doctor_prompt_for(conversation_history), [
             {"role": "user", "content": f"Please analyze this interview:\n\n{conversation_text}"}
         ]
+    
+    def generate_doctor_summary(self, conversation_history: List[Dict[str, str]], session_id: Optional[str] = None) -> str:
+        """
+        Generate a doctor-facing detailed analysis of the complete interview
+        
+        When the summary pipeline already condensed earlier jobs for this
+        session, only their notes and the final job's transcript are sent,
+        so latency no longer grows with the number of jobs.
         
+        Args:
+            conversation_history: Complete conversation
+            session_id: Interview session whose pipeline notes may be reused
+            
+        Returns:
+            Markdown-formatted detailed analysis for doctors
+        """
+        segments = self.summary_pipeline.collect(
+            session_id, conversation_history,
+            label_tail=lambda start, end: self._extract_occupation_from_context(
+                TranscriptSlice(conversation_history, start, end))
+        ) if session_id else None
+        if segments:
+            print(f"⚡ Reducing {len(segments)} occupation segments for session {session_id}")
+            doctor_prompt = self._doctor_prompt_for(conversation_history)
+            summary_messages = [{"role": "user", "content": self._reduce_request(segments)}]
+        else:
+            doctor_prompt, summary_messages = self.doctor_summary_request(conversation_history)
+        
+        # Generate summary using the doctor-facing prompt
+        self.token_budget.check(doctor_prompt, summary_messages)
         summary = self.summary_client.generate_response(
             messages=summary_messages,
             system_prompt=doctor_prompt
@@ -373,21 +685,25 @@ class ConversationManager:
         return message_content.strip() == "---INTERVIEW_COMPLETE---"
     
     
-    def save_occupation_chunks(self, filename: str = "occupation_chunks.json"):
+    def save_occupation_chunks(self, filename: str = "occupation_chunks.json", session_id: Optional[str] = None):
         """
         Save occupation chunks to JSON file for analysis
         
         Args:
             filename: Name of the JSON file to save
+            session_id: Interview session whose chunks are saved
         """
         # Convert to serializable format
         serializable_chunks = {}
-        for occupation_name, chunk_data in self.occupation_chunks.items():
+        for occupation_name, chunk_data in self._chunks(session_id).occupation_chunks.items():
+            messages = self.chunk_messages(occupation_name, session_id)
             serializable_chunks[occupation_name] = {
                 "start_time": chunk_data["start_time"],
-                "message_count": len(chunk_data["messages"]),
+                "start": chunk_data["start"],
+                "end": chunk_data["end"],
+                "message_count": len(messages),
                 "summary": chunk_data["summary"],
-                "messages": chunk_data["messages"]
+                "messages": list(messages)
             }
         
         with open(filename, 'w') as f:
@@ -395,22 +711,26 @@ class ConversationManager:
         
         print(f"💾 Occupation chunks saved to {filename}")
     
-    def get_occupation_stats(self) -> Dict:
+    def get_occupation_stats(self, session_id: Optional[str] = None) -> Dict:
         """
         Get statistics about the conversation chunks
         
+        Args:
+            session_id: Interview session to describe
+            
         Returns:
             Dictionary with occupation statistics
         """
+        state = self._chunks(session_id)
         stats = {
-            "total_occupations": len(self.occupation_chunks),
-            "current_occupation": self.current_occupation,
+            "total_occupations": len(state.occupation_chunks),
+            "open_chunk_start": state.chunk_start,
             "occupations": {}
         }
         
-        for occupation_name, chunk_data in self.occupation_chunks.items():
+        for occupation_name, chunk_data in state.occupation_chunks.items():
             stats["occupations"][occupation_name] = {
-                "message_count": len(chunk_data["messages"]),
+                "message_count": len(self.chunk_messages(occupation_name, session_id)),
                 "has_summary": chunk_data["summary"] is not None,
                 "start_time": chunk_data["start_time"]
             }
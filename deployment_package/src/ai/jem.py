@@ -0,0 +1,235 @@
+"""
+Job-Exposure Matrix Index
+Compiles the local, versioned JEM data file (src/data/jem_v1.json) into a
+keyword index that annotates transcripts deterministically, and rewrites
+the doctor summary prompt to carry the hits as compact hints instead of
+the full free-text matrix
+
+Offline use (from src/):
+
+    python -m ai.jem transcript.json
+"""
+
+from collections import OrderedDict
+from functools import lru_cache
+from typing import Dict, List, NamedTuple
+import json
+import os
+import sys
+
+from .keyword_matcher import KeywordMatcher
+
+DEFAULT_JEM_PATH = os.getenv(
+    "JEM_PATH",
+    os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "data", "jem_v1.json")
+)
+
+# Entry kinds in the data file, and the matcher category prefix for each
+SOURCE_KINDS = ("occupations", "tasks")
+AGENT_KIND = "agents"
+
+# Section of the discovery prompt replaced by the hints
+PROMPT_SECTION_START = "#### **Part C:"
+PROMPT_SECTION_END = "---"
+
+
+class JEMHit(NamedTuple):
+    """One lexicon hit in a patient message"""
+    kind: str  # "occupations", "tasks" or "agents"
+    key: str
+    term: str
+    message_index: int
+
+
+class JEMAnnotation:
+    """JEM hits for one transcript, grouped for prompt hints"""
+    __slots__ = ("index", "hits")
+
+    def __init__(self, index: "JEMIndex", hits: List[JEMHit]):
+        self.index = index
+        self.hits = hits
+
+    def __bool__(self):
+        return bool(self.hits)
+
+    def sources(self) -> "OrderedDict[tuple, List[JEMHit]]":
+        """Occupation/task hits grouped by (kind, key), in transcript order"""
+        grouped = OrderedDict()
+        for hit in self.hits:
+            if hit.kind in SOURCE_KINDS:
+                grouped.setdefault((hit.kind, hit.key), []).append(hit)
+        return grouped
+
+    def agents(self) -> "OrderedDict[str, Dict[str, list]]":
+        """
+        Implicated agents with their evidence
+
+        Returns:
+            agent key -> {"via": [source names], "mentioned": [hits]}
+        """
+        agents = OrderedDict()
+        for (kind, key), _ in self.sources().items():
+            source = self.index.data[kind][key]
+            for agent in source["agents"]:
+                agents.setdefault(agent, {"via": [], "mentioned": []})["via"].append(source["name"])
+        for hit in self.hits:
+            if hit.kind == AGENT_KIND:
+                agents.setdefault(hit.key, {"via": [], "mentioned": []})["mentioned"].append(hit)
+        return agents
+
+    def to_dict(self) -> Dict:
+        data = self.index.data
+        return {
+            "jem_version": self.index.version,
+            "sources": [
+                {
+                    "kind": kind,
+                    "key": key,
+                    "name": data[kind][key]["name"],
+                    "terms": sorted({hit.term for hit in hits}),
+                    "messages": sorted({hit.message_index for hit in hits}),
+                    "agents": data[kind][key]["agents"]
+                }
+                for (kind, key), hits in self.sources().items()
+            ],
+            "agents": [
+                {
+                    "key": agent,
+                    "name": data[AGENT_KIND][agent]["name"],
+                    "via": evidence["via"],
+                    "mentioned": sorted({hit.term for hit in evidence["mentioned"]}),
+                    "outcomes": [data["outcomes"][o] for o in data[AGENT_KIND][agent]["outcomes"]]
+                }
+                for agent, evidence in self.agents().items()
+            ]
+        }
+
+    def to_hints(self) -> str:
+        """Compact, line-per-fact hints for the summary prompt"""
+        data = self.index.data
+        lines = [f"JEM HINTS (local matrix v{self.index.version}; keyword matches from patient messages)"]
+
+        if not self.hits:
+            lines.append("- No matrix matches; rely on the transcript and internal knowledge.")
+            return "\n".join(lines)
+
+        lines.append("Jobs/tasks (patient message #) -> agents:")
+        for (kind, key), hits in self.sources().items():
+            source = data[kind][key]
+            messages = ",".join(str(i) for i in sorted({hit.message_index for hit in hits}))
+            agent_names = "; ".join(data[AGENT_KIND][agent]["name"] for agent in source["agents"])
+            lines.append(f"- {source['name']} ({messages}) -> {agent_names}")
+
+        lines.append("Agents -> diseases:")
+        for agent, evidence in self.agents().items():
+            entry = data[AGENT_KIND][agent]
+            outcomes = "; ".join(data["outcomes"][o] for o in entry["outcomes"])
+            mentioned = ""
+            if evidence["mentioned"]:
+                mentioned = " [patient said: " + ", ".join(
+                    f'"{term}"' for term in sorted({hit.term for hit in evidence["mentioned"]})) + "]"
+            lines.append(f"- {entry['name']}{mentioned} -> {outcomes}")
+
+        return "\n".join(lines)
+
+
+class JEMIndex:
+    """In-memory index over one version of the JEM data file"""
+
+    def __init__(self, data: Dict):
+        self.data = data
+        self.version = data.get("version", "unknown")
+
+        lexicon = {}
+        seen = {}
+        for kind in SOURCE_KINDS + (AGENT_KIND,):
+            for key, entry in data.get(kind, {}).items():
+                for term in entry["terms"]:
+                    normalized = term.lower()
+                    if normalized in seen:
+                        raise ValueError(f"JEM term '{term}' is listed under both {seen[normalized]} and {kind}/{key}")
+                    seen[normalized] = f"{kind}/{key}"
+                lexicon[f"{kind}:{key}"] = entry["terms"]
+                # Every referenced agent/outcome must exist
+                for agent in entry.get("agents", []):
+                    if agent not in data[AGENT_KIND]:
+                        raise ValueError(f"JEM entry {kind}/{key} references unknown agent '{agent}'")
+                for outcome in entry.get("outcomes", []):
+                    if outcome not in data["outcomes"]:
+                        raise ValueError(f"JEM agent '{key}' references unknown outcome '{outcome}'")
+
+        self.matcher = KeywordMatcher(lexicon)
+        self.term_count = self.matcher.term_count
+
+    @classmethod
+    def load(cls, path: str = DEFAULT_JEM_PATH) -> "JEMIndex":
+        with open(path, 'r', encoding='utf-8') as f:
+            return cls(json.load(f))
+
+    def annotate(self, conversation_history: List[Dict[str, str]]) -> JEMAnnotation:
+        """
+        Find occupations, tasks and agents in the patient's messages
+
+        Args:
+            conversation_history: Interview messages
+
+        Returns:
+            JEMAnnotation with hits in transcript order
+        """
+        hits = []
+        for message_index, message in enumerate(conversation_history):
+            if message.get("role") != "user":
+                continue
+            for match in self.matcher.find(message.get("content", "")):
+                kind, _, key = match.category.partition(":")
+                hits.append(JEMHit(kind, key, match.term, message_index))
+        return JEMAnnotation(self, hits)
+
+
+@lru_cache(maxsize=1)
+def get_jem_index() -> JEMIndex:
+    """Shared index over the default data file (compiled on first use)"""
+    index = JEMIndex.load()
+    print(f"🧭 Loaded JEM v{index.version} ({index.term_count} terms)")
+    return index
+
+
+def compact_doctor_prompt(prompt: str, annotation: JEMAnnotation) -> str:
+    """
+    Replace the prompt's free-text JEM section with the transcript's hints
+
+    Args:
+        prompt: Doctor summary system prompt
+        annotation: JEM annotation of the transcript
+
+    Returns:
+        Prompt with hints in place of the matrix (hints appended if the
+        section is not found)
+    """
+    section = (
+        "#### **Part C: JOB-EXPOSURE HINTS**\n"
+        "Pre-computed from a local matrix; confirm against the transcript and use internal "
+        "knowledge for anything unlisted. Keep each Reasoning entry to one or two sentences.\n\n"
+        f"{annotation.to_hints()}\n"
+    )
+
+    start = prompt.find(PROMPT_SECTION_START)
+    if start == -1:
+        return f"{prompt}\n\n{section}"
+
+    end = prompt.find(f"\n{PROMPT_SECTION_END}", start)
+    end = len(prompt) if end == -1 else end + 1
+    return prompt[:start] + section + prompt[end:]
+
+
+if __name__ == "__main__":
+    if len(sys.argv) < 2:
+        print("Usage: python -m ai.jem <transcript.json>")
+        sys.exit(1)
+
+    with open(sys.argv[1], 'r', encoding='utf-8') as f:
+        transcript = json.load(f)
+    if isinstance(transcript, dict):
+        transcript = transcript.get("conversation") or transcript.get("conversation_history", [])
+
+    print(get_jem_index().annotate(transcript).to_hints())
@@ -0,0 +1,281 @@
+"""
+Keyword Matcher
+Aho-Corasick automaton over the occupation/exposure lexicon, so transition
+detection and occupation extraction scan each message once regardless of
+how many terms the lexicon holds
+
+The win is flat scaling with lexicon size, not raw speed: being pure
+Python, a scan costs two to three times the old 19-keyword regex per
+turn, but stays there with thousands of extra terms, while a single
+compiled alternation of the lexicon is already slower on the built-in
+terms and grows about tenfold (`python src/evaluation/benchmarks.py
+keyword_matcher`).
+"""
+
+from functools import lru_cache
+from typing import Dict, Iterable, List, NamedTuple, Optional
+
+# Lexicon categories
+OCCUPATION = "occupation"
+INDUSTRY = "industry"
+EXPOSURE = "exposure"
+TRANSITION = "transition"
+
+OCCUPATION_TERMS = [
+    # Construction and trades
+    "welder", "welding", "boilermaker", "pipefitter", "steamfitter", "sheet metal worker",
+    "construction", "construction worker", "laborer", "labourer", "general laborer",
+    "carpenter", "joiner", "cabinet maker", "bricklayer", "brick layer", "stonemason",
+    "mason", "stone cutter", "tiler", "plasterer", "drywaller", "drywall installer",
+    "roofer", "insulator", "insulation installer", "lagger", "scaffolder",
+    "electrician", "plumber", "painter", "decorator", "glazier", "floor layer",
+    "demolition", "demolition worker", "renovation", "renovator", "contractor",
+    "site supervisor", "foreman", "forewoman", "supervisor", "operator",
+    "concrete worker", "concrete finisher", "asphalt worker", "road worker",
+    "heavy equipment operator", "crane operator", "excavator operator",
+    # Mining and quarrying
+    "miner", "mining", "coal miner", "underground miner", "quarry worker", "quarryman",
+    "driller", "blaster", "tunneler", "rock crusher operator", "sandblaster",
+    # Manufacturing and metalwork
+    "machinist", "mechanic", "auto mechanic", "motor mechanic", "fitter", "turner",
+    "toolmaker", "die maker", "grinder", "polisher", "metal polisher", "metal worker",
+    "metalworker", "foundry worker", "foundryman", "smelter worker", "steelworker",
+    "blacksmith", "jeweller", "jeweler", "goldsmith", "silversmith", "engraver",
+    "assembler", "assembly line worker", "factory worker", "production worker",
+    "press operator", "machine operator", "spray painter", "panel beater",
+    "battery maker", "glass blower", "glassworker", "potter", "ceramicist",
+    "textile worker", "weaver", "spinner", "cotton mill worker", "seamstress", "tailor",
+    "upholsterer", "tanner", "printer", "bookbinder", "chemical worker", "plastics worker",
+    "rubber worker", "semiconductor worker", "shipbuilder", "shipwright", "dock worker",
+    "docker", "stevedore", "longshoreman",
+    # Agriculture, food and animals
+    "farmer", "farming", "farm hand", "farmhand", "farm worker", "dairy farmer",
+    "poultry farmer", "pig farmer", "grain farmer", "rancher", "shepherd", "gardener",
+    "groundskeeper", "landscaper", "horticulturist", "nursery worker", "florist",
+    "forestry worker", "logger", "lumberjack", "sawmill worker", "arborist", "tree surgeon",
+    "baker", "pastry chef", "miller", "flour mill worker", "butcher", "meat packer",
+    "slaughterhouse worker", "abattoir worker", "fisherman", "fish processor",
+    "chef", "cook", "kitchen hand", "veterinarian", "vet nurse", "animal handler",
+    "zookeeper", "pet groomer", "beekeeper", "pest controller", "exterminator",
+    # Transport and services
+    "truck driver", "lorry driver", "bus driver", "taxi driver", "delivery driver",
+    "forklift driver", "warehouse worker", "courier", "pilot", "flight attendant",
+    "aircraft mechanic", "railway worker", "train driver", "firefighter", "fireman",
+    "police officer", "soldier", "military", "sailor", "navy", "security guard",
+    "cleaner", "janitor", "custodian", "housekeeper", "laundry worker", "dry cleaner",
+    "hairdresser", "barber", "beautician", "nail technician", "cosmetologist",
+    # Health, education and office
+    "nurse", "doctor", "physician", "dentist", "dental nurse", "dental technician",
+    "hygienist", "pharmacist", "laboratory technician", "lab technician",
+    "radiographer", "healthcare assistant", "care worker", "paramedic",
+    "teacher", "lecturer", "professor", "teaching assistant", "librarian", "archivist",
+    "library assistant", "clerk", "office worker", "administrator", "receptionist",
+    "secretary", "accountant", "bookkeeper", "manager", "marketing manager",
+    "sales assistant", "retail associate", "shop assistant", "cashier",
+    "administrative assistant", "call centre worker", "call center worker",
+    "engineer", "technician", "scientist", "researcher", "artist", "sculptor",
+]
+
+INDUSTRY_TERMS = [
+    "agriculture", "aerospace", "automotive", "brewery", "chemical plant", "coal mine",
+    "construction site", "dairy", "foundry", "garden center", "garden centre",
+    "glass factory", "hospital", "laboratory", "library", "lumber yard", "mill",
+    "mine", "nursery", "plant nursery", "power plant", "power station", "quarry",
+    "refinery", "retail", "school", "shipyard", "smelter", "steel mill", "textile mill",
+    "warehouse", "workshop", "bakery", "slaughterhouse", "abattoir", "poultry farm",
+    "grain elevator", "silo", "sawmill", "printing press", "dry cleaning",
+]
+
+EXPOSURE_TERMS = [
+    # Mineral dusts and fibres
+    "asbestos", "silica", "crystalline silica", "quartz", "sand", "sandblasting",
+    "stone dust", "rock dust", "concrete dust", "cement", "cement dust", "coal dust",
+    "talc", "mica", "kaolin", "fibreglass", "fiberglass", "mineral wool", "rock wool",
+    "insulation", "lagging", "brake linings", "drywall dust", "plaster dust",
+    # Metals
+    "metal dust", "metal fume", "welding fume", "welding fumes", "beryllium", "cobalt",
+    "hard metal", "tungsten carbide", "cadmium", "chromium", "hexavalent chromium",
+    "nickel", "lead", "lead paint", "zinc", "galvanized", "galvanised", "aluminium",
+    "aluminum", "manganese", "stainless steel", "grinding", "polishing", "metal grinding",
+    "cutting", "soldering", "brazing",
+    # Organic dusts and biologicals
+    "mold", "mould", "mildew", "musty", "damp", "dampness", "water damage",
+    "flour", "flour dust", "grain dust", "hay", "moldy hay", "mouldy hay", "straw",
+    "wood dust", "sawdust", "hardwood", "cotton dust", "bird droppings", "feathers",
+    "pigeons", "animal dander", "animal feed", "compost", "mushroom", "bagasse",
+    "latex", "enzymes", "bacteria", "fungus", "fungi", "spores", "bioaerosols",
+    "legionella", "sewage",
+    # Chemicals
+    "pesticide", "pesticides", "insecticide", "insecticides", "herbicide",
+    "herbicides", "fungicide", "weedkiller", "paraquat", "organophosphates",
+    "sprays", "spray", "fumigant", "isocyanates", "isocyanate", "diisocyanate",
+    "two-pack paint", "spray paint", "paint", "varnish", "lacquer", "resin",
+    "epoxy", "glue", "adhesive", "solvent", "solvents", "thinners", "degreaser",
+    "bleach", "ammonia", "chlorine", "cleaning products", "disinfectant",
+    "formaldehyde", "glutaraldehyde", "acid", "acids", "caustic", "persulfate",
+    "hair dye", "hair bleach", "chemicals", "fumes", "vapour", "vapor", "smoke",
+    "diesel exhaust", "exhaust fumes", "carbon monoxide", "ozone", "nitrogen dioxide",
+    "sulphur dioxide", "sulfur dioxide", "hydrogen sulfide",
+    # General
+    "dust", "dusty", "fibres", "fibers", "particles", "poor ventilation",
+    "no ventilation", "no mask", "respirator", "dust mask", "ppe",
+]
+
+# Literal expansions of Dr. O's job-transition phrasings (apostrophes normalised)
+TRANSITION_PHRASES = [
+    "now, let's talk about the job you had before",
+    "now, let's talk about the job you had right before",
+    "let's move to your previous job",
+    "let's move to your earlier job",
+    "now, let's discuss your time",
+    "let's move on to the job you had",
+    "now, let's move on to",
+    "let's talk about your previous work",
+    "let's talk about your earlier work",
+    "what job did you have before",
+    "what did you do before",
+]
+
+DEFAULT_LEXICON = {
+    OCCUPATION: OCCUPATION_TERMS,
+    INDUSTRY: INDUSTRY_TERMS,
+    EXPOSURE: EXPOSURE_TERMS,
+    TRANSITION: TRANSITION_PHRASES,
+}
+
+_APOSTROPHES = str.maketrans({"’": "'", "‘": "'", "ʼ": "'"})
+
+
+class Match(NamedTuple):
+    """A lexicon hit; `start`/`end` index into the original text"""
+    start: int
+    end: int
+    term: str
+    category: str
+
+
+def _normalize(text: str) -> str:
+    """Lower-case and unify apostrophes without changing string length"""
+    normalized = text.lower()
+    if len(normalized) != len(text):
+        # A few characters (e.g. 'İ') expand when lower-cased; keep offsets aligned
+        normalized = "".join(ch.lower()[0] for ch in text)
+    return normalized.translate(_APOSTROPHES)
+
+
+class KeywordMatcher:
+    """
+    Multi-pattern matcher built once from a categorised lexicon
+
+    Matches are case-insensitive, respect word boundaries (allowing a
+    trailing plural "s"), and overlapping hits resolve leftmost-longest.
+    """
+
+    def __init__(self, lexicon: Dict[str, Iterable[str]]):
+        # Trie as parallel lists: transitions, failure links, outputs
+        self._goto = [{}]
+        self._fail = [0]
+        self._out = [()]
+        self.term_count = 0
+
+        for category, terms in lexicon.items():
+            for term in terms:
+                self._add(_normalize(term.strip()), category)
+        self._build_failure_links()
+
+    def _add(self, term: str, category: str):
+        if not term:
+            return
+        state = 0
+        for ch in term:
+            next_state = self._goto[state].get(ch)
+            if next_state is None:
+                next_state = len(self._goto)
+                self._goto[state][ch] = next_state
+                self._goto.append({})
+                self._fail.append(0)
+                self._out.append(())
+            state = next_state
+        if not any(output[1] == term for output in self._out[state]):
+            self._out[state] += ((len(term), term, category),)
+            self.term_count += 1
+
+    def _build_failure_links(self):
+        # Breadth-first, so every failure target is finished before it is used
+        queue = list(self._goto[0].values())
+        for state in queue:
+            for ch, next_state in self._goto[state].items():
+                queue.append(next_state)
+                fallback = self._fail[state]
+                while fallback and ch not in self._goto[fallback]:
+                    fallback = self._fail[fallback]
+                target = self._goto[fallback].get(ch, 0)
+                self._fail[next_state] = target if target != next_state else 0
+                self._out[next_state] += self._out[self._fail[next_state]]
+
+    @staticmethod
+    def _is_boundary(text: str, start: int, end: int) -> bool:
+        if start > 0 and text[start - 1].isalnum():
+            return False
+        if end < len(text) and text[end].isalnum():
+            # Allow simple plurals ("welders", "pesticides")
+            return text[end] == "s" and (end + 1 == len(text) or not text[end + 1].isalnum())
+        return True
+
+    def find_all(self, text: str, categories: Optional[Iterable[str]] = None) -> List[Match]:
+        """
+        Every boundary-respecting hit, including overlapping ones
+
+        Args:
+            text: Text to scan
+            categories: Optional subset of categories to report
+
+        Returns:
+            Matches ordered by end offset
+        """
+        wanted = set(categories) if categories is not None else None
+        normalized = _normalize(text)
+        goto, fail, out = self._goto, self._fail, self._out
+
+        matches = []
+        state = 0
+        for index, ch in enumerate(normalized):
+            while state and ch not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(ch, 0)
+            for length, term, category in out[state]:
+                if wanted is not None and category not in wanted:
+                    continue
+                start = index - length + 1
+                end = index + 1
+                if self._is_boundary(normalized, start, end):
+                    matches.append(Match(start, end, term, category))
+        return matches
+
+    def find(self, text: str, categories: Optional[Iterable[str]] = None) -> List[Match]:
+        """
+        Non-overlapping hits, leftmost-longest, in text order
+
+        Args:
+            text: Text to scan
+            categories: Optional subset of categories to report
+        """
+        candidates = sorted(self.find_all(text, categories), key=lambda m: (m.start, -m.end))
+        selected = []
+        last_end = -1
+        for match in candidates:
+            if match.start >= last_end:
+                selected.append(match)
+                last_end = match.end
+        return selected
+
+    def first(self, text: str, category: str) -> Optional[Match]:
+        """Leftmost-longest hit of one category, or None"""
+        matches = self.find(text, (category,))
+        return matches[0] if matches else None
+
+
+@lru_cache(maxsize=1)
+def get_default_matcher() -> KeywordMatcher:
+    """Shared matcher over the built-in lexicon (built on first use)"""
+    return KeywordMatcher(DEFAULT_LEXICON)
@@ -5,29 +5,106 @@ Handles interactions with both Google's Gemini API and Vertex AI
 
 from google import genai
 import vertexai
-from vertexai.generative_models import GenerativeModel
+from vertexai.generative_models import GenerativeModel, GenerationConfig
+from pydantic import ValidationError
 import os
 import json
 import tempfile
-from typing import List, Dict, Optional, Literal
+import threading
+from typing import List, Dict, Optional, Literal, Iterator
 from dotenv import load_dotenv
 from google.oauth2 import service_account
 
+from .schemas import Job, StructuredSummary, STRUCTURED_SUMMARY_SCHEMA, STRUCTURED_SUMMARY_INSTRUCTIONS
+from .cassette import get_cassette, REPLAY
+from .usage import estimate_tokens, get_usage_ledger
+from reports.markdown_ast import parse_markdown, extract_jobs
+
 # Load environment variables
 load_dotenv()
 
+# USD per million tokens (prompt, response), for cost estimates
+MODEL_PRICING = {
+    "gemini-2.5-flash": (0.30, 2.50),
+    "gemini-2.5-pro": (1.25, 10.00),
+}
+
+# Cached prompt tokens are billed at this fraction of the prompt rate
+CACHED_TOKEN_RATE = 0.25
+
+
+def _usage_from_response(response) -> Optional[Dict[str, int]]:
+    """Token counts reported by the API for one response, if any"""
+    metadata = getattr(response, "usage_metadata", None)
+    if metadata is None:
+        return None
+    return {
+        "prompt_tokens": getattr(metadata, "prompt_token_count", None) or 0,
+        "response_tokens": getattr(metadata, "candidates_token_count", None) or 0,
+        "cached_tokens": getattr(metadata, "cached_content_token_count", None) or 0
+    }
+
+
+def estimate_cost(model_name: str, prompt_tokens: int, response_tokens: int, cached_tokens: int = 0) -> float:
+    """Estimated cost in USD of one call (unknown models are priced as Flash)"""
+    prompt_rate, response_rate = MODEL_PRICING.get(model_name, MODEL_PRICING["gemini-2.5-flash"])
+    uncached = prompt_tokens - cached_tokens
+    return (uncached * prompt_rate + cached_tokens * prompt_rate * CACHED_TOKEN_RATE
+            + response_tokens * response_rate) / 1_000_000
+
+
+def _account(model_name: str, usage: Optional[Dict[str, int]], prompt: str, response_text: str):
+    """Log one call's token counts and charge them to the usage ledger"""
+    estimated = usage is None
+    if estimated:
+        # No usage metadata (e.g. a replayed stream); fall back to a size estimate
+        usage = {"prompt_tokens": estimate_tokens(prompt), "response_tokens": estimate_tokens(response_text),
+                 "cached_tokens": 0}
+    cached = usage.get("cached_tokens", 0)
+    cost = estimate_cost(model_name, usage["prompt_tokens"], usage["response_tokens"], cached)
+    print(f"🔢 Tokens ({model_name}): {usage['prompt_tokens']} in ({cached} cached), "
+          f"{usage['response_tokens']} out, ${cost:.5f}{' (estimated)' if estimated else ''}")
+    get_usage_ledger().record(model_name, usage, cost, estimated)
+
+
+def _through_cassette(model_name: str, config, prompt: str, invoke):
+    """Run invoke() -> (text, usage), recorded or replayed when a cassette is active"""
+    cassette = get_cassette()
+    if cassette is None:
+        return invoke()
+    return cassette.call(model_name, config, prompt, invoke)
+
+
+def _stream_through_cassette(model_name: str, config, prompt: str, invoke):
+    """Streaming counterpart of _through_cassette"""
+    cassette = get_cassette()
+    if cassette is None:
+        return invoke()
+    return cassette.stream(model_name, config, prompt, invoke)
+
+
 class GeminiClient:
     """Client wrapper for Google Gemini 2.5 Flash API using new google-genai SDK"""
     
     def __init__(self):
         """Initialize the Gemini client"""
         self.api_key = os.getenv("GEMINI_API_KEY")
-        if not self.api_key:
+        cassette = get_cassette()
+        if not self.api_key and not (cassette and cassette.mode == REPLAY):
             raise ValueError("GEMINI_API_KEY environment variable is required")
         
         # Use lazy loading - only create client when needed
         self._client = None
         self.model_name = "gemini-2.5-flash"
+        self._usage = threading.local()  # Per-thread, so concurrent callers see their own call
+        
+        # Concise, structured output for interview turns
+        self.generation_config = genai.types.GenerateContentConfig(
+            temperature=0.6,  # Balanced for focused but flexible responses
+            max_output_tokens=4096,  # Generous limit for detailed responses
+            top_p=0.8,  # Allow some creativity for medical contexts
+            thinking_config=genai.types.ThinkingConfig(thinking_budget=0)  # Disable thinking for speed
+        )
         
         print(f"🤖 Gemini client initialized with model: {self.model_name}")
     
@@ -57,36 +134,7 @@ class GeminiClient:
             Generated response text
         """
         try:
-            # Build the full conversation context for Gemini
-            conversation_text = ""
-            
-            # Add system prompt if provided
-            if system_prompt:
-                conversation_text += f"SYSTEM INSTRUCTIONS:\n{system_prompt}\n\n"
-            
-            # Add conversation history with clear context
-            if messages:
-                conversation_text += "CONVERSATION HISTORY:\n"
-                for message in messages:
-                    role_msg = message["role"]
-                    content = message["content"]
-                    
-                    if role_msg == "user":
-                        conversation_text += f"Patient: {content}\n"
-                    elif role_msg == "assistant":
-                        conversation_text += f"Dr. O: {content}\n"
-                
-                # Add simple role marker - let system_prompt handle all instructions
-                if role == "interviewer":
-                    conversation_text += "\nDr. O:"
-                else:  # patient role
-                    conversation_text += "\nPatient:"
-            else:
-                # Opening message - just add role marker
-                if role == "interviewer":
-                    conversation_text += "\nDr. O:"
-                else:  # patient role
-                    conversation_text += "\nPatient:"
+            conversation_text = self._build_conversation_text(messages, system_prompt, role)
             
             # Debug: Log conversation context before sending to LLM
             print("="*50)
@@ -96,24 +144,15 @@ class GeminiClient:
             print("="*50)
             
             # Generate response with concise, structured output
-            response = self.client.models.generate_content(
-                model=self.model_name,
-                contents=conversation_text,
-                config=genai.types.GenerateContentConfig(
-                    temperature=0.6,  # Balanced for focused but flexible responses
-                    max_output_tokens=4096,  # Generous limit for detailed responses
-                    top_p=0.8,  # Allow some creativity for medical contexts
-                    thinking_config=genai.types.ThinkingConfig(thinking_budget=0)  # Disable thinking for speed
-                )
-            )
+            text = self._generate(conversation_text)
             
             # Debug: Log LLM response
             print("🤖 DEBUG: LLM RESPONSE")
-            print(f"📤 Response: {response.text[:200]}...")
+            print(f"📤 Response: {text[:200]}...")
             print("="*50)
             
             # Post-processing: monitor response length but don't truncate
-            response_text = response.text.strip()
+            response_text = text.strip()
             word_count = len(response_text.split())
             
             if word_count > 75:  # Higher threshold - warn but don't truncate
@@ -125,6 +164,100 @@ class GeminiClient:
             print(f"❌ Error generating response: {e}")
             raise
     
+    def last_usage(self) -> Optional[Dict[str, int]]:
+        """Token counts of this thread's most recent generate_response call"""
+        return getattr(self._usage, "last", None)
+    
+    def _generate(self, conversation_text: str) -> str:
+        """One generate_content call, through the record/replay cassette when one is active"""
+        def invoke():
+            response = self.client.models.generate_content(
+                model=self.model_name,
+                contents=conversation_text,
+                config=self.generation_config
+            )
+            return response.text, _usage_from_response(response)
+        
+        text, self._usage.last = _through_cassette(self.model_name, self.generation_config, conversation_text, invoke)
+        _account(self.model_name, self._usage.last, conversation_text, text)
+        return text
+    
+    def stream_response(
+        self, 
+        messages: List[Dict[str, str]], 
+        system_prompt: Optional[str] = None,
+        role: str = "interviewer"
+    ) -> Iterator[str]:
+        """
+        Stream a response from Gemini as text chunks
+        
+        Args:
+            messages: List of conversation messages [{"role": "user|assistant", "content": "..."}]
+            system_prompt: Optional system prompt to guide the conversation
+            role: Role of the agent generating the response ("interviewer" or "patient")
+            
+        Yields:
+            Text chunks in generation order
+        """
+        try:
+            conversation_text = self._build_conversation_text(messages, system_prompt, role)
+            
+            usage = {}
+            
+            def invoke():
+                for chunk in self.client.models.generate_content_stream(
+                    model=self.model_name,
+                    contents=conversation_text,
+                    config=self.generation_config
+                ):
+                    # The final chunk carries the totals
+                    usage["last"] = _usage_from_response(chunk) or usage.get("last")
+                    if chunk.text:
+                        yield chunk.text
+            
+            text = ""
+            for piece in _stream_through_cassette(self.model_name, self.generation_config, conversation_text, invoke):
+                text += piece
+                yield piece
+            _account(self.model_name, usage.get("last"), conversation_text, text)
+            
+        except Exception as e:
+            print(f"❌ Error streaming response: {e}")
+            raise
+    
+    def _build_conversation_text(
+        self, 
+        messages: List[Dict[str, str]], 
+        system_prompt: Optional[str] = None,
+        role: str = "interviewer"
+    ) -> str:
+        """Build the full conversation context for Gemini"""
+        conversation_text = ""
+        
+        # Add system prompt if provided
+        if system_prompt:
+            conversation_text += f"SYSTEM INSTRUCTIONS:\n{system_prompt}\n\n"
+        
+        # Add conversation history with clear context
+        if messages:
+            conversation_text += "CONVERSATION HISTORY:\n"
+            for message in messages:
+                role_msg = message["role"]
+                content = message["content"]
+                
+                if role_msg == "user":
+                    conversation_text += f"Patient: {content}\n"
+                elif role_msg == "assistant":
+                    conversation_text += f"Dr. O: {content}\n"
+        
+        # Add simple role marker - let system_prompt handle all instructions
+        if role == "interviewer":
+            conversation_text += "\nDr. O:"
+        else:  # patient role
+            conversation_text += "\nPatient:"
+        
+        return conversation_text
+    
     def test_connection(self) -> bool:
         """Test if the Gemini API is working"""
         try:
@@ -154,6 +287,15 @@ class VertexAIClient:
         # Initialize Vertex AI with credentials
         vertexai.init(project=self.project_id, location=self.location, credentials=credentials)
         self._model = None
+        self._usage = threading.local()
+        
+        # Highest consistency settings for summaries
+        self.generation_config = {
+            "temperature": 0.0,  # Lowest temperature for maximum consistency and determinism
+            "max_output_tokens": 8192,  # Much higher token limit for detailed summaries
+            "top_p": 1.0,  # Most deterministic sampling
+            "top_k": 1  # Most deterministic token selection
+        }
         
         print(f"🤖 Vertex AI client initialized with project: {self.project_id}, model: {self.model_name}")
     
@@ -202,47 +344,215 @@ class VertexAIClient:
             Generated response text
         """
         try:
-            # Build the full conversation context for Vertex AI
-            conversation_text = ""
-            
-            # Add system prompt if provided
-            if system_prompt:
-                conversation_text += f"SYSTEM INSTRUCTIONS:\n{system_prompt}\n\n"
-            
-            # Add conversation history
-            if messages:
-                conversation_text += "CONVERSATION HISTORY:\n"
-                for message in messages:
-                    role = message["role"]
-                    content = message["content"]
-                    
-                    if role == "user":
-                        conversation_text += f"Patient: {content}\n"
-                    elif role == "assistant":
-                        conversation_text += f"Dr. O: {content}\n"
-                
-                # Add instruction for summary generation
-                conversation_text += "\nPlease generate a comprehensive markdown summary of this occupational history interview."
-            else:
-                conversation_text += "\nPlease generate a comprehensive markdown summary."
+            conversation_text = self._build_conversation_text(messages, system_prompt)
             
             # Generate response with highest consistency settings for summaries
+            return self._generate(conversation_text, self.generation_config).strip()
+            
+        except Exception as e:
+            print(f"❌ Error generating response with Vertex AI: {e}")
+            raise
+    
+    def last_usage(self) -> Optional[Dict[str, int]]:
+        """Token counts of this thread's most recent generate_response call"""
+        return getattr(self._usage, "last", None)
+    
+    def _generate(self, conversation_text: str, generation_config) -> str:
+        """One generate_content call, through the record/replay cassette when one is active"""
+        def invoke():
             response = self.model.generate_content(
                 conversation_text,
-                generation_config={
-                    "temperature": 0.0,  # Lowest temperature for maximum consistency and determinism
-                    "max_output_tokens": 8192,  # Much higher token limit for detailed summaries
-                    "top_p": 1.0,  # Most deterministic sampling
-                    "top_k": 1  # Most deterministic token selection
-                }
+                generation_config=generation_config
             )
+            return response.text, _usage_from_response(response)
+        
+        text, self._usage.last = _through_cassette(self.model_name, generation_config, conversation_text, invoke)
+        _account(self.model_name, self._usage.last, conversation_text, text)
+        return text
+    
+    def stream_response(
+        self, 
+        messages: List[Dict[str, str]], 
+        system_prompt: Optional[str] = None
+    ) -> Iterator[str]:
+        """
+        Stream a response from Vertex AI Gemini as text chunks
+        
+        Args:
+            messages: List of conversation messages [{"role": "user|assistant", "content": "..."}]
+            system_prompt: Optional system prompt to guide the conversation
             
-            return response.text.strip()
+        Yields:
+            Text chunks in generation order
+        """
+        try:
+            conversation_text = self._build_conversation_text(messages, system_prompt)
+            
+            usage = {}
+            
+            def invoke():
+                responses = self.model.generate_content(
+                    conversation_text,
+                    generation_config=self.generation_config,
+                    stream=True
+                )
+                for response in responses:
+                    usage["last"] = _usage_from_response(response) or usage.get("last")
+                    if response.candidates and response.candidates[0].content.parts:
+                        yield response.text
+            
+            text = ""
+            for piece in _stream_through_cassette(self.model_name, self.generation_config, conversation_text, invoke):
+                text += piece
+                yield piece
+            _account(self.model_name, usage.get("last"), conversation_text, text)
             
         except Exception as e:
-            print(f"❌ Error generating response with Vertex AI: {e}")
+            print(f"❌ Error streaming response with Vertex AI: {e}")
             raise
     
+    def generate_structured_summary(
+        self, 
+        messages: List[Dict[str, str]], 
+        system_prompt: Optional[str] = None
+    ) -> StructuredSummary:
+        """
+        Generate the markdown summary and a typed job list in a single call
+        
+        Uses schema-constrained JSON output so no second extraction pass is needed.
+        
+        Args:
+            messages: List of conversation messages [{"role": "user|assistant", "content": "..."}]
+            system_prompt: Optional system prompt describing the markdown format
+            
+        Returns:
+            StructuredSummary with markdown and jobs
+        """
+        try:
+            conversation_text = self._build_conversation_text(
+                messages, (system_prompt or "") + STRUCTURED_SUMMARY_INSTRUCTIONS, markdown_request=False
+            )
+            
+            response_text = self._generate(
+                conversation_text,
+                GenerationConfig(
+                    **self.generation_config,
+                    response_mime_type="application/json",
+                    response_schema=STRUCTURED_SUMMARY_SCHEMA
+                )
+            ).strip()
+            try:
+                return StructuredSummary.model_validate_json(response_text)
+            except ValidationError as e:
+                print(f"⚠️ Structured summary did not match schema: {e}")
+            
+            # Never show raw JSON: recover the markdown field, or ask for plain markdown
+            # (the usual cause is JSON cut off at max_output_tokens)
+            markdown_text = self._lenient_markdown(response_text)
+            if markdown_text is None:
+                print("⚠️ Falling back to a plain markdown summary")
+                markdown_text = self.generate_response(messages, system_prompt)
+            
+            return StructuredSummary(
+                markdown=markdown_text,
+                jobs=[Job(**job) for job in extract_jobs(parse_markdown(markdown_text))],
+                cacheable=False
+            )
+            
+        except Exception as e:
+            print(f"❌ Error generating structured summary with Vertex AI: {e}")
+            raise
+    
+    @staticmethod
+    def _lenient_markdown(response_text: str) -> Optional[str]:
+        """The `markdown` field of JSON output that failed validation, if it parses at all"""
+        try:
+            data = json.loads(response_text, strict=False)
+        except ValueError:
+            return None
+        markdown_text = data.get("markdown") if isinstance(data, dict) else None
+        return markdown_text.strip() if isinstance(markdown_text, str) and markdown_text.strip() else None
+    
+    def batch_request(self, messages: List[Dict[str, str]], system_prompt: Optional[str] = None) -> Dict:
+        """
+        Request body for one line of a Vertex AI batch prediction input file
+        
+        Carries the same text and generation settings as generate_response,
+        so batch and online results are comparable.
+        """
+        return {
+            "contents": [{"role": "user", "parts": [{"text": self._build_conversation_text(messages, system_prompt)}]}],
+            "generationConfig": {
+                "temperature": self.generation_config["temperature"],
+                "maxOutputTokens": self.generation_config["max_output_tokens"],
+                "topP": self.generation_config["top_p"],
+                "topK": self.generation_config["top_k"]
+            }
+        }
+    
+    def generate_json(self, prompt: str, response_schema: Dict) -> str:
+        """
+        Generate schema-constrained JSON for a fully built prompt
+        
+        Args:
+            prompt: Complete request text
+            response_schema: OpenAPI-subset schema for the response
+            
+        Returns:
+            Raw JSON text (validate it against the matching pydantic model)
+        """
+        try:
+            return self._generate(
+                prompt,
+                GenerationConfig(
+                    **self.generation_config,
+                    response_mime_type="application/json",
+                    response_schema=response_schema
+                )
+            ).strip()
+            
+        except Exception as e:
+            print(f"❌ Error generating JSON with Vertex AI: {e}")
+            raise
+    
+    def _build_conversation_text(
+        self, 
+        messages: List[Dict[str, str]], 
+        system_prompt: Optional[str] = None,
+        markdown_request: bool = True
+    ) -> str:
+        """
+        Build the full conversation context for Vertex AI
+        
+        markdown_request=False leaves out the closing request for a markdown
+        summary, which would contradict JSON output instructions.
+        """
+        conversation_text = ""
+        
+        # Add system prompt if provided
+        if system_prompt:
+            conversation_text += f"SYSTEM INSTRUCTIONS:\n{system_prompt}\n\n"
+        
+        # Add conversation history
+        if messages:
+            conversation_text += "CONVERSATION HISTORY:\n"
+            for message in messages:
+                role = message["role"]
+                content = message["content"]
+                
+                if role == "user":
+                    conversation_text += f"Patient: {content}\n"
+                elif role == "assistant":
+                    conversation_text += f"Dr. O: {content}\n"
+            
+            # Add instruction for summary generation
+            if markdown_request:
+                conversation_text += "\nPlease generate a comprehensive markdown summary of this occupational history interview."
+        elif markdown_request:
+            conversation_text += "\nPlease generate a comprehensive markdown summary."
+        
+        return conversation_text
+    
     def test_connection(self) -> bool:
         """Test if the Vertex AI connection is working"""
         try:
@@ -271,4 +581,14 @@ def get_vertex_ai_client() -> VertexAIClient:
         vertex_ai_client = VertexAIClient()
     return vertex_ai_client
 
+def reset_connections():
+    """
+    Drop the global clients' API connections so they are recreated on next use
+    Called in each worker forked from a preloaded server process
+    """
+    if gemini_client is not None:
+        gemini_client._client = None
+    if vertex_ai_client is not None:
+        vertex_ai_client._model = None
+
 
@@ -0,0 +1,109 @@
+"""
+Structured Output Schemas
+Pydantic models for schema-constrained LLM summary output
+"""
+
+from pydantic import BaseModel, Field
+from typing import List
+
+
+class Job(BaseModel):
+    """A single job from the patient's occupational history"""
+    title: str
+    dates: str = ""
+    industry: str = ""
+    tasks: List[str] = Field(default_factory=list)
+    exposures: List[str] = Field(default_factory=list)
+    risk_flags: List[str] = Field(default_factory=list)
+
+
+class JemTrigger(BaseModel):
+    """Whether Dr. O followed up on a high-risk keyword, and why"""
+    triggered: bool
+    justification: str = ""
+
+
+class TurnEvaluation(BaseModel):
+    """evaluator_prompt.md checklist for one Dr. O turn"""
+    turn: int
+    adherence_to_persona: bool
+    clarity_and_conciseness: bool
+    correct_chronological_flow: bool
+    heuristic_jem_trigger: JemTrigger
+    critical_safety_violation: bool
+
+
+class StructuredSummary(BaseModel):
+    """Markdown summary plus the typed job list, returned by one generation"""
+    markdown: str
+    jobs: List[Job] = Field(default_factory=list)
+    # False for summaries recovered after the JSON output failed validation;
+    # those are served once but never cached (not part of the LLM schema)
+    cacheable: bool = Field(default=True, exclude=True)
+
+
+# OpenAPI-subset schema accepted by Vertex AI `response_schema`
+# (kept in step with StructuredSummary above; Vertex does not accept $ref/$defs)
+_STRING_LIST = {"type": "array", "items": {"type": "string"}}
+
+STRUCTURED_SUMMARY_SCHEMA = {
+    "type": "object",
+    "properties": {
+        "markdown": {
+            "type": "string",
+            "description": "The complete Markdown summary, formatted exactly as the system instructions require"
+        },
+        "jobs": {
+            "type": "array",
+            "items": {
+                "type": "object",
+                "properties": {
+                    "title": {"type": "string"},
+                    "dates": {"type": "string", "description": "Year range, e.g. 1995-2005 or 2018-present"},
+                    "industry": {"type": "string"},
+                    "tasks": _STRING_LIST,
+                    "exposures": _STRING_LIST,
+                    "risk_flags": {
+                        "type": "array",
+                        "items": {"type": "string"},
+                        "description": "High-priority exposures flagged with (!) in the markdown"
+                    }
+                },
+                "required": ["title", "dates", "industry", "tasks", "exposures", "risk_flags"]
+            }
+        }
+    },
+    "required": ["markdown", "jobs"]
+}
+
+STRUCTURED_SUMMARY_INSTRUCTIONS = """
+
+# OUTPUT FORMAT
+Return a single JSON object. Put the complete Markdown summary described above in the `markdown` field, unchanged in format. In the `jobs` array, list every job from the summary (most recent first) with its title, dates, industry, key tasks, exposures and the high-priority exposures you flagged with (!) as `risk_flags`. Do not include hobbies or military service in `jobs`.
+"""
+
+
+# One entry per numbered Dr. O turn (kept in step with TurnEvaluation)
+TURN_EVALUATIONS_SCHEMA = {
+    "type": "array",
+    "items": {
+        "type": "object",
+        "properties": {
+            "turn": {"type": "integer", "description": "Number of the Dr. O turn being evaluated"},
+            "adherence_to_persona": {"type": "boolean"},
+            "clarity_and_conciseness": {"type": "boolean"},
+            "correct_chronological_flow": {"type": "boolean"},
+            "heuristic_jem_trigger": {
+                "type": "object",
+                "properties": {
+                    "triggered": {"type": "boolean"},
+                    "justification": {"type": "string"}
+                },
+                "required": ["triggered", "justification"]
+            },
+            "critical_safety_violation": {"type": "boolean"}
+        },
+        "required": ["turn", "adherence_to_persona", "clarity_and_conciseness", "correct_chronological_flow",
+                     "heuristic_jem_trigger", "critical_safety_violation"]
+    }
+}
@@ -0,0 +1,206 @@
+"""
+Incremental Summary Pipeline
+Map-reduce doctor summaries: each occupation segment is condensed in the
+background as soon as Dr. O moves on to the next job, so the final report
+only has to reduce the cached notes plus the last, still-open segment.
+Segments are the conversation manager's occupation chunks, submitted as
+they close.
+
+Segment state and notes live in the process that saw the transitions, so
+the pipeline only helps when one process serves the whole interview. With
+several workers the final request usually lands elsewhere and falls back
+to a one-pass summary, so gunicorn.conf.py turns the pipeline off
+(SUMMARY_PIPELINE_ENABLED=false) rather than pay for unused notes.
+"""
+
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor, wait
+from typing import Callable, Dict, List, Optional, Tuple
+import contextvars
+import hashlib
+import json
+import os
+import threading
+
+# Defaults (override with environment variables)
+DEFAULT_WORKERS = int(os.getenv("SUMMARY_PIPELINE_WORKERS", "4"))
+DEFAULT_MAX_SESSIONS = int(os.getenv("SUMMARY_PIPELINE_MAX_SESSIONS", "200"))
+DEFAULT_WAIT_SECONDS = float(os.getenv("SUMMARY_PIPELINE_WAIT_SECONDS", "60"))
+DEFAULT_ENABLED = os.getenv("SUMMARY_PIPELINE_ENABLED", "true").lower() == "true"
+
+# Segment kinds returned by collect()
+NOTES = "notes"
+TRANSCRIPT = "transcript"
+
+
+def _digest(messages: List[Dict[str, str]]) -> str:
+    """Content hash of a message slice, to detect transcripts rewritten by a resync"""
+    payload = json.dumps([[m.get("role"), m.get("content")] for m in messages], ensure_ascii=False)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class ChunkSummary:
+    """One closed occupation segment and its background summary"""
+    __slots__ = ("label", "start", "end", "digest", "future")
+
+    def __init__(self, label: str, start: int, end: int, digest: str, future):
+        self.label = label
+        self.start = start
+        self.end = end
+        self.digest = digest
+        self.future = future
+
+
+class SessionPipeline:
+    """Per-session submitted segments, in transcript order"""
+    __slots__ = ("chunks",)
+
+    def __init__(self):
+        self.chunks = []
+
+
+class IncrementalSummaryPipeline:
+    """
+    Background per-occupation summarization, keyed by session
+
+    `summarize_chunk(label, messages)` is the map step; it runs on a bounded
+    thread pool. Session state is LRU-bounded like the other caches.
+    """
+
+    def __init__(
+        self,
+        summarize_chunk: Callable[[str, List[Dict[str, str]]], str],
+        max_workers: int = DEFAULT_WORKERS,
+        max_sessions: int = DEFAULT_MAX_SESSIONS,
+        enabled: bool = DEFAULT_ENABLED
+    ):
+        self.summarize_chunk = summarize_chunk
+        self.max_sessions = max_sessions
+        self.enabled = enabled
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="summary-map")
+        self._sessions = OrderedDict()
+        self._lock = threading.Lock()
+
+        self.submitted = 0
+        self.reused = 0
+        self.fallbacks = 0
+
+    def _state(self, session_id: str) -> SessionPipeline:
+        state = self._sessions.get(session_id)
+        if state is None:
+            state = self._sessions[session_id] = SessionPipeline()
+            while len(self._sessions) > self.max_sessions:
+                self._sessions.popitem(last=False)
+        else:
+            self._sessions.move_to_end(session_id)
+        return state
+
+    def _is_consistent(self, state: SessionPipeline, conversation_history: List[Dict[str, str]]) -> bool:
+        """Segments cover the transcript from its start without gaps, and still match it"""
+        expected_start = 0
+        for chunk in state.chunks:
+            if chunk.start != expected_start or chunk.end > len(conversation_history) \
+                    or _digest(conversation_history[chunk.start:chunk.end]) != chunk.digest:
+                return False
+            expected_start = chunk.end
+        return True
+
+    def submit(self, session_id: str, conversation_history: List[Dict[str, str]], label: str, start: int, end: int):
+        """
+        Summarize a just-closed occupation segment in the background
+
+        Args:
+            session_id: Interview session
+            conversation_history: Transcript the offsets refer to
+            label: Occupation label of the segment
+            start: First message of the segment
+            end: One past its last message
+        """
+        if not self.enabled or end <= start:
+            return
+        with self._lock:
+            state = self._state(session_id)
+            expected_start = state.chunks[-1].end if state.chunks else 0
+            if start != expected_start or not self._is_consistent(state, conversation_history):
+                # The browser resynced a different transcript; start over
+                state = self._sessions[session_id] = SessionPipeline()
+                if start != 0:
+                    # Earlier segments were never seen here, so collect() could not use this one
+                    return
+
+            messages = list(conversation_history[start:end])
+            # Run in a copy of the caller's context so usage is charged to its request
+            future = self._executor.submit(contextvars.copy_context().run, self.summarize_chunk, label, messages)
+            state.chunks.append(ChunkSummary(label, start, end, _digest(messages), future))
+            self.submitted += 1
+            print(f"🧩 Summarizing occupation segment '{label}' (messages {start}-{end - 1}) in the background")
+
+    def collect(
+        self,
+        session_id: str,
+        conversation_history: List[Dict[str, str]],
+        timeout: float = DEFAULT_WAIT_SECONDS,
+        label_tail: Optional[Callable[[int, int], Optional[str]]] = None
+    ) -> Optional[List[Tuple[str, str, List[Dict[str, str]]]]]:
+        """
+        Segments for the reduce step, in transcript order
+
+        Closed segments come back as (NOTES, label, notes) once their
+        summaries finish; segments whose summary failed or timed out come
+        back verbatim as (TRANSCRIPT, label, messages), as does the open
+        tail, labelled by label_tail(start, end) when given.
+
+        Returns:
+            Segment list, or None when nothing usable is cached for this
+            transcript (the caller then summarizes it in one pass)
+        """
+        if not self.enabled:
+            return None
+        with self._lock:
+            state = self._sessions.get(session_id)
+            chunks = list(state.chunks) if state else []
+            usable = bool(chunks) and self._is_consistent(state, conversation_history)
+            if not usable:
+                self.fallbacks += 1
+                return None
+
+        wait([chunk.future for chunk in chunks], timeout=timeout)
+
+        segments = []
+        for chunk in chunks:
+            messages = conversation_history[chunk.start:chunk.end]
+            if chunk.future.done() and chunk.future.exception() is None:
+                segments.append((NOTES, chunk.label, chunk.future.result()))
+                self.reused += 1
+            else:
+                print(f"⚠️ Segment '{chunk.label}' not summarized in time, using its transcript")
+                segments.append((TRANSCRIPT, chunk.label, messages))
+
+        tail_start = chunks[-1].end
+        if tail_start < len(conversation_history):
+            end = len(conversation_history)
+            label = (label_tail(tail_start, end) if label_tail else None) or f"Job {len(chunks) + 1}"
+            segments.append((TRANSCRIPT, label, conversation_history[tail_start:]))
+
+        return segments
+
+    def discard(self, session_id: str):
+        with self._lock:
+            self._sessions.pop(session_id, None)
+
+    def shutdown(self):
+        self._executor.shutdown(wait=False)
+
+    def stats(self) -> Dict:
+        with self._lock:
+            pending = sum(1 for state in self._sessions.values()
+                          for chunk in state.chunks if not chunk.future.done())
+            return {
+                "sessions": len(self._sessions),
+                "max_sessions": self.max_sessions,
+                "enabled": self.enabled,
+                "pending_segments": pending,
+                "submitted": self.submitted,
+                "reused": self.reused,
+                "fallbacks": self.fallbacks
+            }
@@ -0,0 +1,60 @@
+"""
+Transcript Views
+Read-only, zero-copy slices of an interview transcript, so occupation
+chunks can be stored as (start, end) offsets into one shared transcript
+"""
+
+from collections.abc import Sequence
+from typing import Dict
+
+
+class TranscriptSlice(Sequence):
+    """View of transcript[start:end] that never copies the messages"""
+    __slots__ = ("_transcript", "_start", "_end")
+
+    def __init__(self, transcript: Sequence, start: int, end: int):
+        # Clamp, so a resynced (shorter) transcript yields a shorter view
+        self._transcript = transcript
+        self._start = max(0, min(start, len(transcript)))
+        self._end = max(self._start, min(end, len(transcript)))
+
+    def __len__(self) -> int:
+        return self._end - self._start
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self[i] for i in range(*index.indices(len(self)))]
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError("transcript slice index out of range")
+        return self._transcript[self._start + index]
+
+    def __iter__(self):
+        for index in range(self._start, self._end):
+            yield self._transcript[index]
+
+    def __repr__(self) -> str:
+        return f"TranscriptSlice({self._start}:{self._end})"
+
+    @property
+    def bounds(self):
+        return self._start, self._end
+
+
+def new_chunk(start: int, end: int, start_time: str) -> Dict:
+    """Occupation chunk record: offsets into the transcript plus bookkeeping"""
+    return {"start": start, "end": end, "start_time": start_time, "summary": None}
+
+
+class ChunkState:
+    """
+    One session's occupation chunking: its transcript, the closed chunks
+    (offsets into it, by occupation label) and where the open chunk starts
+    """
+    __slots__ = ("conversation_history", "occupation_chunks", "chunk_start")
+
+    def __init__(self):
+        self.conversation_history = ()
+        self.occupation_chunks = {}
+        self.chunk_start = 0
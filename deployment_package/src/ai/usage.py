@@ -0,0 +1,273 @@
+"""
+Token Accounting
+Exact token counts from the provider's usage metadata, attributed to the
+current request and interview session, a per-day cost ledger, and the
+per-interview prompt budgets that compact or refuse oversized requests
+before they reach the provider.
+
+Requests are attributed through a context variable: endpoints open a
+`usage_scope(session_id, kind)` and every LLM call made while it is active
+(including worker threads started with contextvars.copy_context()) is
+charged to it.
+"""
+
+from collections import OrderedDict
+from contextlib import contextmanager
+from contextvars import ContextVar
+from datetime import date
+from typing import Dict, List, Optional
+import json
+import os
+import threading
+
+# Defaults (override with environment variables)
+INTERVIEW_SOFT_TOKEN_BUDGET = int(os.getenv("INTERVIEW_SOFT_TOKEN_BUDGET", "32000"))  # per call: compact above this
+INTERVIEW_HARD_TOKEN_BUDGET = int(os.getenv("INTERVIEW_HARD_TOKEN_BUDGET", "120000"))  # per call: refuse above this
+SESSION_TOKEN_BUDGET = int(os.getenv("SESSION_TOKEN_BUDGET", "2000000"))  # per interview, all calls
+USAGE_LEDGER_PATH = os.getenv("USAGE_LEDGER_PATH", "")  # optional JSON-lines log of every call
+USAGE_MAX_SESSIONS = int(os.getenv("USAGE_MAX_SESSIONS", "1000"))
+
+# Messages always kept from the start of the transcript when compacting (Dr. O's opening)
+COMPACTION_KEEP_HEAD = 1
+
+_EMPTY = {"calls": 0, "prompt_tokens": 0, "response_tokens": 0, "cached_tokens": 0,
+          "estimated_calls": 0, "cost_usd": 0.0}
+
+
+def estimate_tokens(text: str) -> int:
+    """Rough token count (~4 characters per token), for checks made before a call"""
+    return max(1, len(text) // 4)
+
+
+def estimate_prompt_tokens(system_prompt: Optional[str], messages: List[Dict[str, str]]) -> int:
+    """Estimated prompt size of a conversation request"""
+    return estimate_tokens((system_prompt or "") + "".join(m.get("content", "") for m in messages))
+
+
+class TokenBudgetExceeded(Exception):
+    """A request was refused before the provider call because it is over budget"""
+
+    def __init__(self, message: str, tokens: int, budget: int):
+        super().__init__(message)
+        self.tokens = tokens
+        self.budget = budget
+
+
+def _add(totals: Dict, usage: Dict, cost: float, estimated: bool):
+    totals["calls"] += 1
+    totals["prompt_tokens"] += usage.get("prompt_tokens", 0)
+    totals["response_tokens"] += usage.get("response_tokens", 0)
+    totals["cached_tokens"] += usage.get("cached_tokens", 0)
+    totals["estimated_calls"] += int(estimated)
+    totals["cost_usd"] += cost
+
+
+class UsageScope:
+    """Token totals for one request"""
+
+    def __init__(self, session_id: Optional[str], kind: str):
+        self.session_id = session_id
+        self.kind = kind
+        self.totals = dict(_EMPTY)
+        self._lock = threading.Lock()
+
+    def add(self, usage: Dict, cost: float, estimated: bool):
+        with self._lock:
+            _add(self.totals, usage, cost, estimated)
+
+    def to_dict(self) -> Dict:
+        with self._lock:
+            return dict(self.totals, cost_usd=round(self.totals["cost_usd"], 6))
+
+
+_current_scope: ContextVar = ContextVar("usage_scope", default=None)
+
+
+@contextmanager
+def usage_scope(session_id: Optional[str], kind: str):
+    """Charge LLM calls made inside the block to `session_id`; yields the UsageScope"""
+    scope = UsageScope(session_id, kind)
+    token = _current_scope.set(scope)
+    try:
+        yield scope
+    finally:
+        _current_scope.reset(token)
+
+
+def begin_usage_scope(session_id: Optional[str], kind: str) -> UsageScope:
+    """
+    Open a scope for the rest of the current task, for streamed responses
+    whose body is produced after the endpoint returns
+    """
+    scope = UsageScope(session_id, kind)
+    _current_scope.set(scope)
+    return scope
+
+
+def current_scope() -> Optional[UsageScope]:
+    return _current_scope.get()
+
+
+class UsageLedger:
+    """Per-session and per-day token and cost totals (sessions are LRU-bounded)"""
+
+    def __init__(self, ledger_path: str = USAGE_LEDGER_PATH, max_sessions: int = USAGE_MAX_SESSIONS):
+        self.ledger_path = ledger_path
+        self.max_sessions = max_sessions
+        self._sessions = OrderedDict()
+        self._daily = {}
+        self._lock = threading.Lock()
+
+    def record(self, model_name: str, usage: Dict, cost: float, estimated: bool = False):
+        """Charge one LLM call to the current scope, its session and today's ledger"""
+        scope = current_scope()
+        if scope is not None:
+            scope.add(usage, cost, estimated)
+
+        session_id = scope.session_id if scope else None
+        day = date.today().isoformat()
+        with self._lock:
+            models = self._daily.setdefault(day, {})
+            _add(models.setdefault(model_name, dict(_EMPTY)), usage, cost, estimated)
+            if session_id:
+                totals = self._sessions.get(session_id)
+                if totals is None:
+                    totals = self._sessions[session_id] = dict(_EMPTY)
+                    while len(self._sessions) > self.max_sessions:
+                        self._sessions.popitem(last=False)
+                else:
+                    self._sessions.move_to_end(session_id)
+                _add(totals, usage, cost, estimated)
+
+            if self.ledger_path:
+                entry = dict(usage, day=day, model=model_name, cost_usd=round(cost, 6), estimated=estimated,
+                             session_id=session_id, kind=scope.kind if scope else None)
+                with open(self.ledger_path, 'a', encoding='utf-8') as f:
+                    f.write(json.dumps(entry) + "\n")
+
+    def session_usage(self, session_id: str) -> Optional[Dict]:
+        with self._lock:
+            totals = self._sessions.get(session_id)
+            return dict(totals, cost_usd=round(totals["cost_usd"], 6)) if totals else None
+
+    def session_tokens(self, session_id: Optional[str]) -> int:
+        if not session_id:
+            return 0
+        with self._lock:
+            totals = self._sessions.get(session_id)
+            return totals["prompt_tokens"] + totals["response_tokens"] if totals else 0
+
+    def daily(self, days: int = 7) -> Dict[str, Dict]:
+        """Most recent `days` days, newest first, with per-model and total figures"""
+        with self._lock:
+            report = {}
+            for day in sorted(self._daily, reverse=True)[:days]:
+                models = {name: dict(totals, cost_usd=round(totals["cost_usd"], 6))
+                          for name, totals in self._daily[day].items()}
+                total = dict(_EMPTY)
+                for totals in self._daily[day].values():
+                    for key in total:
+                        total[key] += totals[key]
+                total["cost_usd"] = round(total["cost_usd"], 6)
+                report[day] = {"models": models, "total": total}
+            return report
+
+    def stats(self) -> Dict:
+        with self._lock:
+            sessions = len(self._sessions)
+        return {
+            "sessions_tracked": sessions,
+            "daily": self.daily(),
+            "budgets": {
+                "interview_soft_tokens": INTERVIEW_SOFT_TOKEN_BUDGET,
+                "interview_hard_tokens": INTERVIEW_HARD_TOKEN_BUDGET,
+                "session_tokens": SESSION_TOKEN_BUDGET
+            }
+        }
+
+
+_ledger = UsageLedger()
+
+
+def get_usage_ledger() -> UsageLedger:
+    return _ledger
+
+
+class TokenBudget:
+    """
+    Prompt guardrails applied before a provider call
+
+    Above the soft budget the middle of the transcript is dropped (the
+    opening and the most recent messages are kept); above the hard budget,
+    or once the interview has used its session budget, the call is refused.
+    Sizes are estimated from characters, since exact counting would itself
+    cost a provider call.
+    """
+
+    def __init__(self, soft_tokens: int = INTERVIEW_SOFT_TOKEN_BUDGET, hard_tokens: int = INTERVIEW_HARD_TOKEN_BUDGET,
+                 session_tokens: int = SESSION_TOKEN_BUDGET, ledger: Optional[UsageLedger] = None):
+        self.soft_tokens = soft_tokens
+        self.hard_tokens = hard_tokens
+        self.session_tokens = session_tokens
+        self.ledger = ledger or get_usage_ledger()
+        self.compactions = 0
+        self.refusals = 0
+
+    def check(self, system_prompt: Optional[str], messages: List[Dict[str, str]]) -> int:
+        """
+        Refuse a request whose prompt is over the hard budget
+
+        Returns:
+            Estimated prompt tokens
+        """
+        tokens = estimate_prompt_tokens(system_prompt, messages)
+        if tokens > self.hard_tokens:
+            self.refusals += 1
+            raise TokenBudgetExceeded(
+                f"Conversation is too long to process (~{tokens} tokens, limit {self.hard_tokens})",
+                tokens, self.hard_tokens
+            )
+        return tokens
+
+    def fit(self, system_prompt: str, messages: List[Dict[str, str]], session_id: Optional[str] = None) -> List[Dict[str, str]]:
+        """
+        Messages to send for one interview turn, compacted to the soft budget
+
+        Raises:
+            TokenBudgetExceeded: Over the hard or the session budget
+        """
+        used = self.ledger.session_tokens(session_id)
+        if used >= self.session_tokens:
+            self.refusals += 1
+            raise TokenBudgetExceeded(
+                f"Interview {session_id} has used its token budget ({used} of {self.session_tokens})",
+                used, self.session_tokens
+            )
+
+        tokens = self.check(system_prompt, messages)
+        if tokens <= self.soft_tokens:
+            return messages
+
+        # Keep the opening plus as many recent messages as fit
+        head = list(messages[:COMPACTION_KEEP_HEAD])
+        remaining = self.soft_tokens - estimate_prompt_tokens(system_prompt, head)
+        tail = []
+        for message in reversed(messages[COMPACTION_KEEP_HEAD:]):
+            size = estimate_tokens(message.get("content", ""))
+            if size > remaining and tail:
+                break
+            tail.append(message)
+            remaining -= size
+        tail.reverse()
+
+        omitted = len(messages) - len(head) - len(tail)
+        if omitted <= 0:
+            return messages
+        self.compactions += 1
+        print(f"✂️ Compacted transcript for {session_id or 'request'}: ~{tokens} tokens, "
+              f"omitted {omitted} earlier messages")
+        note = {"role": "assistant", "content": f"[{omitted} earlier messages of this interview omitted for length]"}
+        return head + [note] + tail
+
+    def stats(self) -> Dict:
+        return {"compactions": self.compactions, "refusals": self.refusals}
@@ -0,0 +1,135 @@
+"""
+Download Responses
+Conditional (ETag/If-None-Match) and ranged responses for cached artifacts
+"""
+
+from fastapi import Request, Response
+from fastapi.middleware.gzip import GZipMiddleware
+from typing import Optional, Tuple
+import re
+
+_RANGE_HEADER = re.compile(r'^bytes=(\d*)-(\d*)$')
+
+# PDF routes: /api/pdf/{key}, /summarize/pdf and /summarize/pdf/{key}
+ARTIFACT_PATHS = re.compile(r'/pdf(/[^/]+)?/?$')
+
+# Streaming routes: the SSE summary stream and the interview WebSocket
+STREAMING_PATHS = re.compile(r'^/api/summary/stream/?$|^/ws(/|$)')
+
+
+def _etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == '*':
+        return True
+    candidates = [tag.strip() for tag in if_none_match.split(',')]
+    # Weak comparison, as RFC 9110 requires for If-None-Match
+    return any(tag.replace('W/', '', 1) == etag for tag in candidates)
+
+
+def _parse_range(range_header: str, size: int) -> Optional[Tuple[int, int]]:
+    """
+    Parse a single `bytes=` range into inclusive (start, end)
+
+    Returns None when the header is unsupported (e.g. multiple ranges), in
+    which case the full body is served. Raises ValueError when unsatisfiable.
+    """
+    match = _RANGE_HEADER.match(range_header.strip())
+    if not match:
+        return None
+
+    start_text, end_text = match.groups()
+    if not start_text and not end_text:
+        return None
+
+    if not start_text:
+        # Suffix range: last N bytes
+        length = int(end_text)
+        if length == 0:
+            raise ValueError("Unsatisfiable range")
+        return max(size - length, 0), size - 1
+
+    start = int(start_text)
+    end = int(end_text) if end_text else size - 1
+    if start >= size or end < start:
+        raise ValueError("Unsatisfiable range")
+    return start, min(end, size - 1)
+
+
+def artifact_response(
+    request: Request,
+    content: bytes,
+    etag_key: str,
+    media_type: str = "application/pdf",
+    filename: Optional[str] = None
+) -> Response:
+    """
+    Build a cacheable download response
+
+    Honours If-None-Match (304) and a single byte Range (206/416).
+
+    Args:
+        request: Incoming request (for conditional/range headers)
+        content: Full artifact bytes
+        etag_key: Content hash used as the strong ETag
+        media_type: Response content type
+        filename: Optional attachment filename
+    """
+    etag = f'"{etag_key}"'
+    headers = {
+        "ETag": etag,
+        "Accept-Ranges": "bytes",
+        # Content-addressed, so private clients may keep it indefinitely
+        "Cache-Control": "private, max-age=31536000, immutable"
+    }
+    if filename:
+        headers["Content-Disposition"] = f"attachment; filename={filename}"
+
+    if _etag_matches(request.headers.get("if-none-match"), etag):
+        return Response(status_code=304, headers=headers)
+
+    range_header = request.headers.get("range")
+    if range_header and request.headers.get("if-range", etag) == etag:
+        size = len(content)
+        try:
+            byte_range = _parse_range(range_header, size)
+        except ValueError:
+            headers["Content-Range"] = f"bytes */{size}"
+            return Response(status_code=416, headers=headers)
+
+        if byte_range:
+            start, end = byte_range
+            headers["Content-Range"] = f"bytes {start}-{end}/{size}"
+            return Response(
+                content=memoryview(content)[start:end + 1].tobytes(),
+                status_code=206,
+                media_type=media_type,
+                headers=headers
+            )
+
+    return Response(content=content, media_type=media_type, headers=headers)
+
+
+class ArtifactAwareGZipMiddleware(GZipMiddleware):
+    """
+    GZipMiddleware that leaves artifact downloads and streams alone
+
+    PDFs are already compressed, and artifact_response() gives every full
+    or ranged response the same strong ETag, which is only correct while
+    the bytes on the wire are the identity encoding. Server-sent events
+    must reach the browser as they are written, and WebSockets are not
+    HTTP responses at all; both are excluded explicitly rather than
+    relying on the installed Starlette's handling of them.
+    """
+
+    def __init__(self, app, minimum_size: int = 500, skip_paths=ARTIFACT_PATHS, stream_paths=STREAMING_PATHS):
+        super().__init__(app, minimum_size=minimum_size)
+        self.skip_paths = skip_paths
+        self.stream_paths = stream_paths
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or self.skip_paths.search(scope["path"]) \
+                or self.stream_paths.search(scope["path"]):
+            await self.app(scope, receive, send)
+            return
+        await super().__call__(scope, receive, send)
@@ -0,0 +1,248 @@
+"""
+Interview WebSocket Channel
+One persistent connection per interview: streamed Dr. O tokens, completion
+and speculative-summary events pushed by the server, with heartbeat and
+resume from the last acknowledged message index
+
+Client -> server messages:
+    {"type": "hello", "last_ack": n}          (re)connect; n = messages the client holds
+    {"type": "hello", "last_ack": 0, "new": true}   open a new interview if the session is unknown
+    {"type": "message", "content": "...", "seq": n}
+    {"type": "history", "messages": [...]}    resync from browser-held history
+    {"type": "ack", "seq": n}
+    {"type": "pong"}
+
+Server -> client messages:
+    {"type": "sync", "seq": n, "messages": [...]}     messages after last_ack
+    {"type": "token", "seq": n, "text": "..."}        streamed chunk of message n
+    {"type": "message_complete", "seq": n, "content": "...", "is_complete": bool, "usage": {...}}
+    {"type": "summary_ready", "cache_key": "..."}
+    {"type": "resync_required", "server_seq": n}
+    {"type": "ping"} / {"type": "error", "detail": "..."}
+"""
+
+from fastapi import WebSocket, WebSocketDisconnect
+from typing import Dict, Iterator, List
+import asyncio
+import contextvars
+import os
+import threading
+
+from ai.usage import usage_scope
+
+# Heroku's router closes connections idle for 55s
+HEARTBEAT_INTERVAL = int(os.getenv("WS_HEARTBEAT_INTERVAL", "20"))
+
+_STREAM_END = object()
+
+
+async def _iterate_in_thread(iterator: Iterator[str]):
+    """
+    Drive a blocking iterator in a worker thread, yielding items asynchronously
+
+    If the consumer stops early (e.g. its task is cancelled on disconnect),
+    the worker stops pulling items after the current one and closes the
+    iterator, so an abandoned LLM stream does not run to completion.
+    """
+    loop = asyncio.get_running_loop()
+    queue = asyncio.Queue()
+    stop = threading.Event()
+
+    def produce():
+        try:
+            for item in iterator:
+                if stop.is_set():
+                    break
+                loop.call_soon_threadsafe(queue.put_nowait, item)
+        except Exception as e:
+            loop.call_soon_threadsafe(queue.put_nowait, e)
+        finally:
+            if stop.is_set() and hasattr(iterator, "close"):
+                iterator.close()
+            loop.call_soon_threadsafe(queue.put_nowait, _STREAM_END)
+
+    # run_in_executor does not carry context variables (e.g. the usage scope) over by itself
+    producer = loop.run_in_executor(None, contextvars.copy_context().run, produce)
+    try:
+        while True:
+            item = await queue.get()
+            if item is _STREAM_END:
+                break
+            if isinstance(item, Exception):
+                raise item
+            yield item
+        await producer
+    finally:
+        stop.set()
+
+
+class InterviewChannel:
+    """State for one interview WebSocket connection"""
+
+    def __init__(self, websocket: WebSocket, session_id: str, conversation_manager, session_store, turn_monitor=None):
+        self.websocket = websocket
+        self.session_id = session_id
+        self.conversation_manager = conversation_manager
+        self.session_store = session_store
+        self.turn_monitor = turn_monitor
+        self.last_ack = 0
+        self._send_lock = asyncio.Lock()
+        # Background work (replies, speculative summaries) owned by this connection
+        self._tasks = set()
+        self._reply = None
+
+    async def send(self, payload: Dict):
+        # Heartbeat and reply streaming share the socket
+        async with self._send_lock:
+            await self.websocket.send_json(payload)
+
+    async def heartbeat(self):
+        while True:
+            await asyncio.sleep(HEARTBEAT_INTERVAL)
+            await self.send({"type": "ping"})
+
+    async def handle_hello(self, last_ack: int, new_interview: bool = False):
+        """
+        Replay anything the client missed
+
+        An unknown (or expired) session is only opened as a new interview
+        when the client asks for one; otherwise the client is asked to
+        resync, since it normally still holds the history in the browser.
+        """
+        transcript = self.session_store.get_messages(self.session_id)
+
+        if transcript is None:
+            if not new_interview:
+                await self.send({"type": "resync_required", "server_seq": None})
+                return
+            opening = await asyncio.to_thread(self.conversation_manager.start_interview, self.session_id)
+            seq = self.session_store.replace(self.session_id, [opening])
+            await self.send({"type": "token", "seq": 0, "text": opening["content"]})
+            await self.send({"type": "message_complete", "seq": seq,
+                             "content": opening["content"], "is_complete": False})
+            return
+
+        self.last_ack = min(max(last_ack, 0), len(transcript))
+        await self.send({
+            "type": "sync",
+            "seq": len(transcript),
+            "messages": transcript[self.last_ack:]
+        })
+
+    def start_reply(self, content: str, seq: int):
+        """
+        Generate the reply to a patient message as a task, so the socket
+        keeps receiving (pongs, acks, disconnects) while it streams
+        """
+        self._reply = asyncio.create_task(self._reply_task(content, seq))
+        self._tasks.add(self._reply)
+        self._reply.add_done_callback(self._tasks.discard)
+
+    def cancel_reply(self):
+        if self._reply is not None and not self._reply.done():
+            self._reply.cancel()
+
+    async def _reply_task(self, content: str, seq: int):
+        try:
+            await self.handle_message(content, seq)
+        except Exception as e:
+            print(f"❌ Interview socket error for {self.session_id}: {e}")
+            try:
+                await self.send({"type": "error", "detail": str(e)})
+            except Exception:
+                pass  # The socket is gone; the client resyncs on reconnect
+
+    async def handle_message(self, content: str, seq: int):
+        transcript = self.session_store.get_messages(self.session_id)
+        if transcript is None or len(transcript) != seq:
+            await self.send({
+                "type": "resync_required",
+                "server_seq": len(transcript) if transcript is not None else None
+            })
+            return
+
+        user_message = {"role": "user", "content": content}
+        conversation_history = transcript + [user_message]
+        reply_index = len(conversation_history)
+
+        reply = ""
+        with usage_scope(self.session_id, "ws_message") as usage:
+            async for chunk in _iterate_in_thread(self.conversation_manager.stream_interview(conversation_history, self.session_id)):
+                reply += chunk
+                await self.send({"type": "token", "seq": reply_index, "text": chunk})
+
+        ai_response = {"role": "assistant", "content": reply.strip()}
+        new_seq = self.session_store.append(self.session_id, [user_message, ai_response])
+        if self.turn_monitor:
+            self.turn_monitor.observe(self.session_id, conversation_history + [ai_response])
+        is_complete = self.conversation_manager.is_interview_complete(ai_response["content"])
+
+        await self.send({
+            "type": "message_complete",
+            "seq": new_seq,
+            "content": ai_response["content"],
+            "is_complete": is_complete,
+            "usage": usage.to_dict()
+        })
+
+        if is_complete:
+            task = asyncio.create_task(self.speculative_summary(conversation_history + [ai_response]))
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+
+    async def speculative_summary(self, conversation_history: List[Dict[str, str]]):
+        """Generate the patient summary ahead of the review page, then notify"""
+        try:
+            await asyncio.to_thread(self.conversation_manager.generate_structured_summary, conversation_history)
+            cache_key = self.conversation_manager.summary_cache_key_for(conversation_history)
+            await self.send({"type": "summary_ready", "cache_key": cache_key})
+        except Exception as e:
+            # The review page simply generates it on demand
+            print(f"⚠️ Speculative summary failed for {self.session_id}: {e}")
+
+    async def run(self):
+        await self.websocket.accept()
+        heartbeat = asyncio.create_task(self.heartbeat())
+        print(f"🔌 Interview socket opened for session {self.session_id}")
+
+        try:
+            while True:
+                data = await self.websocket.receive_json()
+                if not isinstance(data, dict):
+                    await self.send({"type": "error", "detail": "Expected a JSON object"})
+                    continue
+                message_type = data.get("type")
+
+                try:
+                    if message_type == "hello":
+                        await self.handle_hello(int(data.get("last_ack", 0)), bool(data.get("new", False)))
+                    elif message_type == "message":
+                        if self._reply is not None and not self._reply.done():
+                            await self.send({"type": "error", "detail": "A reply is already in progress"})
+                        else:
+                            self.start_reply(str(data.get("content", "")), int(data.get("seq", -1)))
+                    elif message_type == "history":
+                        # The browser's history supersedes a reply still being generated
+                        self.cancel_reply()
+                        messages = [{"role": str(message["role"]), "content": str(message["content"])}
+                                    for message in data.get("messages", [])]
+                        seq = self.session_store.replace(self.session_id, messages)
+                        await self.send({"type": "sync", "seq": seq, "messages": []})
+                    elif message_type == "ack":
+                        self.last_ack = int(data.get("seq", self.last_ack))
+                    elif message_type in ("pong", "ping"):
+                        pass
+                    else:
+                        await self.send({"type": "error", "detail": f"Unknown message type: {message_type}"})
+                except (WebSocketDisconnect, asyncio.CancelledError):
+                    raise
+                except Exception as e:
+                    print(f"❌ Interview socket error for {self.session_id}: {e}")
+                    await self.send({"type": "error", "detail": str(e)})
+
+        except WebSocketDisconnect:
+            print(f"🔌 Interview socket closed for session {self.session_id} (last ack {self.last_ack})")
+        finally:
+            heartbeat.cancel()
+            for task in list(self._tasks):
+                task.cancel()
@@ -0,0 +1,135 @@
+"""
+Static Asset Cache
+Loads the HTML frontend into memory once, with precomputed gzip/brotli
+variants and strong ETags, so page navigations never touch disk
+"""
+
+from fastapi import Request, Response
+from typing import Dict, Optional
+import gzip
+import hashlib
+import mimetypes
+import os
+
+try:
+    import brotli
+except ImportError:  # Optional: fall back to gzip-only variants
+    brotli = None
+
+# HTML is unversioned, so clients must revalidate (cheap 304 via ETag)
+HTML_CACHE_CONTROL = "no-cache"
+ASSET_CACHE_CONTROL = "public, max-age=3600"
+
+# Files smaller than this are not worth compressing
+MIN_COMPRESS_SIZE = 512
+
+
+class StaticAsset:
+    """One file with its encoded variants"""
+    __slots__ = ("name", "media_type", "etag", "variants", "cache_control")
+
+    def __init__(self, name: str, content: bytes):
+        self.name = name
+        self.media_type = mimetypes.guess_type(name)[0] or "application/octet-stream"
+        if self.media_type.startswith("text/"):
+            self.media_type += "; charset=utf-8"
+
+        digest = hashlib.sha256(content).hexdigest()[:32]
+        self.etag = digest
+        self.cache_control = HTML_CACHE_CONTROL if name.endswith(".html") else ASSET_CACHE_CONTROL
+
+        # encoding -> bytes ("identity" always present)
+        self.variants = {"identity": content}
+        if len(content) >= MIN_COMPRESS_SIZE:
+            self.variants["gzip"] = gzip.compress(content, compresslevel=9, mtime=0)
+            if brotli is not None:
+                self.variants["br"] = brotli.compress(content, quality=11)
+
+    def etag_for(self, encoding: str) -> str:
+        """Strong ETag per representation (each encoding is a distinct entity)"""
+        return f'"{self.etag}"' if encoding == "identity" else f'"{self.etag}-{encoding}"'
+
+
+def _accepted_encodings(accept_encoding: str) -> Dict[str, float]:
+    """Parse Accept-Encoding into {coding: q}"""
+    accepted = {}
+    for part in accept_encoding.split(","):
+        part = part.strip()
+        if not part:
+            continue
+        coding, _, params = part.partition(";")
+        q = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                q = float(params[2:])
+            except ValueError:
+                q = 0.0
+        accepted[coding.strip().lower()] = q
+    return accepted
+
+
+class StaticAssetCache:
+    """In-memory cache of every file in the frontend directory"""
+
+    def __init__(self, directory: str):
+        self.directory = directory
+        self.assets = {}
+        self.load()
+
+    def load(self):
+        """(Re)load all files from the directory"""
+        assets = {}
+        for name in sorted(os.listdir(self.directory)):
+            path = os.path.join(self.directory, name)
+            if os.path.isfile(path):
+                with open(path, "rb") as f:
+                    assets[name] = StaticAsset(name, f.read())
+        self.assets = assets
+
+        total = sum(len(asset.variants["identity"]) for asset in assets.values())
+        print(f"📦 Loaded {len(assets)} static assets ({total} bytes) with encodings: "
+              f"{'br, ' if brotli else ''}gzip")
+
+    def _choose_encoding(self, asset: StaticAsset, accept_encoding: Optional[str]) -> str:
+        if not accept_encoding:
+            return "identity"
+        accepted = _accepted_encodings(accept_encoding)
+        for encoding in ("br", "gzip"):
+            q = accepted.get(encoding, accepted.get("*", 0.0))
+            if encoding in asset.variants and q > 0:
+                return encoding
+        return "identity"
+
+    def response(self, request: Request, name: str) -> Response:
+        """
+        Serve a cached asset with content negotiation and conditional GET
+
+        Args:
+            request: Incoming request
+            name: File name within the directory (e.g. "chat.html")
+        """
+        asset = self.assets[name]
+        encoding = self._choose_encoding(asset, request.headers.get("accept-encoding"))
+        etag = asset.etag_for(encoding)
+
+        headers = {
+            "ETag": etag,
+            "Cache-Control": asset.cache_control,
+            "Vary": "Accept-Encoding"
+        }
+
+        if_none_match = request.headers.get("if-none-match")
+        if if_none_match:
+            candidates = {tag.strip().replace("W/", "", 1) for tag in if_none_match.split(",")}
+            if etag in candidates or "*" in candidates:
+                return Response(status_code=304, headers=headers)
+
+        if encoding != "identity":
+            headers["Content-Encoding"] = encoding
+
+        return Response(
+            content=asset.variants[encoding],
+            media_type=asset.media_type,
+            headers=headers
+        )
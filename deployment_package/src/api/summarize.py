@@ -3,7 +3,7 @@ Summarize API Endpoint
 Handles interview summary generation and PDF creation
 """
 
-from fastapi import APIRouter, HTTPException, Response
+from fastapi import APIRouter, HTTPException, Request, Response
 from pydantic import BaseModel
 from typing import List, Dict
 import sys
@@ -14,6 +14,7 @@ sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
 
 from ai.conversation import ConversationManager
 from reports.pdf_generator import PDFGenerator
+from api.downloads import artifact_response
 
 router = APIRouter()
 
@@ -51,25 +52,27 @@ async def summarize_endpoint(request: SummarizeRequest) -> SummarizeResponse:
         )
 
 @router.post("/summarize/pdf")
-async def summarize_pdf_endpoint(request: SummarizeRequest) -> Response:
+async def summarize_pdf_endpoint(request: SummarizeRequest, http_request: Request) -> Response:
     """
     Generate PDF summary of the interview
     
     - Receives complete conversation history  
     - Returns PDF file directly
+    - Repeat downloads reuse the cached summary and PDF (ETag/Range aware)
     """
     try:
-        # Generate the markdown summary
+        # Generate the markdown summary (cached per transcript)
         summary_text = conversation_manager.generate_summary(request.conversation_history)
         
-        # Convert to PDF
-        pdf_bytes = pdf_generator.generate_pdf(summary_text)
+        # Convert to PDF (cached per markdown content)
+        pdf_key, pdf_bytes = pdf_generator.generate_pdf_with_key(summary_text)
         
         # Return PDF as response
-        return Response(
-            content=pdf_bytes,
-            media_type="application/pdf",
-            headers={"Content-Disposition": "attachment; filename=occupational_history_summary.pdf"}
+        return artifact_response(
+            http_request,
+            pdf_bytes,
+            etag_key=pdf_key,
+            filename="occupational_history_summary.pdf"
         )
         
     except Exception as e:
@@ -78,3 +81,21 @@ async def summarize_pdf_endpoint(request: SummarizeRequest) -> Response:
             status_code=500,
             detail=f"Error generating PDF: {str(e)}"
         )
+
+@router.get("/summarize/pdf/{pdf_key}")
+async def download_pdf_endpoint(pdf_key: str, http_request: Request) -> Response:
+    """
+    Download a previously generated PDF by content key
+    
+    - No LLM call or PDF rendering; 404 once evicted from the cache
+    """
+    pdf_bytes = pdf_generator.get_cached_pdf(pdf_key)
+    if pdf_bytes is None:
+        raise HTTPException(status_code=404, detail="PDF not found or expired")
+    
+    return artifact_response(
+        http_request,
+        pdf_bytes,
+        etag_key=pdf_key,
+        filename="occupational_history_summary.pdf"
+    )
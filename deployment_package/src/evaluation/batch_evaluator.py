@@ -0,0 +1,301 @@
+"""
+Batch Transcript Evaluation
+Scores every Dr. O turn of a transcript against evaluator_prompt.md in one
+schema-constrained LLM call, instead of one call per question. Results are
+cached by transcript hash, and whole directories of transcripts are
+evaluated concurrently under a request rate limit:
+
+    python src/evaluation/batch_evaluator.py transcripts/ --concurrency 4 --rpm 30 --output evaluations.json
+
+Accepted files: a JSON list of messages, {"conversation": [...]} (the
+load-conversation format), {"transcript": [...]}, or a simulation report.
+"""
+
+from collections import OrderedDict
+from typing import Dict, List, Optional, Tuple
+import argparse
+import asyncio
+import hashlib
+import json
+import os
+import sys
+import threading
+import time
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+
+from pydantic import TypeAdapter
+from ai.schemas import TurnEvaluation, TURN_EVALUATIONS_SCHEMA
+
+# Defaults (override with environment variables)
+DEFAULT_CONCURRENCY = int(os.getenv("BATCH_EVAL_CONCURRENCY", "4"))
+DEFAULT_REQUESTS_PER_MINUTE = float(os.getenv("BATCH_EVAL_REQUESTS_PER_MINUTE", "30"))
+BATCH_EVAL_CACHE_SIZE = int(os.getenv("BATCH_EVAL_CACHE_SIZE", "256"))
+
+COMPLETION_SIGNAL = "---INTERVIEW_COMPLETE---"
+
+BATCH_INSTRUCTIONS = """
+
+# BATCH MODE
+The transcript below marks every Dr. O question as [Turn N]. Evaluate each numbered turn on its own, as if it were the most recent message, using only the conversation up to and including that turn. Return a JSON array with exactly one object per numbered turn, in turn order. Each object has a `turn` field with the turn number plus the checklist fields shown above.
+"""
+
+_EVALUATIONS = TypeAdapter(List[TurnEvaluation])
+
+
+def number_turns(conversation_history: List[Dict[str, str]]) -> Tuple[str, int]:
+    """
+    Render a transcript with every Dr. O message numbered as a turn
+
+    Returns:
+        (transcript text, number of turns)
+    """
+    lines = []
+    turns = 0
+    for message in conversation_history:
+        content = message["content"]
+        if message["role"] == "assistant":
+            if content.strip() == COMPLETION_SIGNAL:
+                continue
+            turns += 1
+            lines.append(f"[Turn {turns}] Dr. O: {content}")
+        else:
+            lines.append(f"Patient: {content}")
+    return "\n".join(lines), turns
+
+
+def summarize_evaluations(evaluations: List[Dict]) -> Dict:
+    """Failure counts per checklist item for one transcript"""
+    return {
+        "turns": len(evaluations),
+        "persona_failures": sum(1 for e in evaluations if not e["adherence_to_persona"]),
+        "clarity_failures": sum(1 for e in evaluations if not e["clarity_and_conciseness"]),
+        "chronology_failures": sum(1 for e in evaluations if not e["correct_chronological_flow"]),
+        "jem_triggered": sum(1 for e in evaluations if e["heuristic_jem_trigger"]["triggered"]),
+        "safety_violations": [e["turn"] for e in evaluations if e["critical_safety_violation"]]
+    }
+
+
+class BatchTurnEvaluator:
+    """
+    Evaluates all turns of a transcript in a single structured-output call
+
+    `llm_client` needs generate_json(prompt, response_schema); the Vertex AI
+    client is used by default, for deterministic scoring.
+    """
+
+    def __init__(self, llm_client=None, cache_size: int = BATCH_EVAL_CACHE_SIZE, cache_dir: Optional[str] = None):
+        if llm_client is None:
+            from ai.llm_client import get_vertex_ai_client
+            llm_client = get_vertex_ai_client()
+        self.llm_client = llm_client
+        prompt_path = os.path.join(os.path.dirname(__file__), '..', '..', "multi_agent_prompt", "evaluator_prompt.md")
+        with open(prompt_path, 'r', encoding='utf-8') as f:
+            self.prompt = f.read() + BATCH_INSTRUCTIONS
+        self._prompt_hash = hashlib.sha256(self.prompt.encode("utf-8")).hexdigest()
+
+        self.cache_size = cache_size
+        self.cache_dir = cache_dir
+        if cache_dir:
+            os.makedirs(cache_dir, exist_ok=True)
+        self._cache = OrderedDict()
+        self._lock = threading.Lock()
+        self.counts = {"llm_calls": 0, "cache_hits": 0, "turns": 0}
+
+    def cache_key(self, conversation_history: List[Dict[str, str]]) -> str:
+        """Transcript hash; includes the prompt so editing it invalidates old results"""
+        payload = json.dumps([[m["role"], m["content"]] for m in conversation_history], ensure_ascii=False)
+        return hashlib.sha256((self._prompt_hash + payload).encode("utf-8")).hexdigest()
+
+    def cached(self, conversation_history: List[Dict[str, str]]) -> Optional[List[Dict]]:
+        """Cached evaluations for this transcript, from memory or the cache directory"""
+        key = self.cache_key(conversation_history)
+        with self._lock:
+            if key in self._cache:
+                self._cache.move_to_end(key)
+                self.counts["cache_hits"] += 1
+                return self._cache[key]
+
+        if self.cache_dir:
+            path = os.path.join(self.cache_dir, f"{key}.json")
+            if os.path.exists(path):
+                with open(path, 'r', encoding='utf-8') as f:
+                    evaluations = json.load(f)
+                self._store(key, evaluations, persist=False)
+                with self._lock:
+                    self.counts["cache_hits"] += 1
+                return evaluations
+        return None
+
+    def _store(self, key: str, evaluations: List[Dict], persist: bool = True):
+        with self._lock:
+            self._cache[key] = evaluations
+            self._cache.move_to_end(key)
+            while len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)
+        if persist and self.cache_dir:
+            with open(os.path.join(self.cache_dir, f"{key}.json"), 'w', encoding='utf-8') as f:
+                json.dump(evaluations, f, ensure_ascii=False)
+
+    def evaluate(self, conversation_history: List[Dict[str, str]]) -> List[Dict]:
+        """
+        Evaluate every Dr. O turn of a transcript
+
+        Args:
+            conversation_history: Complete transcript
+
+        Returns:
+            One evaluator-shaped dict per turn, each with its `turn` number
+
+        Raises:
+            ValueError: The response did not match the schema or skipped turns
+        """
+        cached = self.cached(conversation_history)
+        if cached is not None:
+            return cached
+
+        transcript, turns = number_turns(conversation_history)
+        if turns == 0:
+            return []
+
+        response = self.llm_client.generate_json(
+            f"SYSTEM INSTRUCTIONS:\n{self.prompt}\n\nTRANSCRIPT:\n{transcript}",
+            TURN_EVALUATIONS_SCHEMA
+        )
+        with self._lock:
+            self.counts["llm_calls"] += 1
+
+        try:
+            evaluations = sorted(_EVALUATIONS.validate_json(response), key=lambda e: e.turn)
+        except Exception as e:
+            raise ValueError(f"Batch evaluation did not match the schema: {e}")
+        numbers = [evaluation.turn for evaluation in evaluations]
+        if numbers != list(range(1, turns + 1)):
+            raise ValueError(f"Batch evaluation covered turns {numbers}, expected 1-{turns}")
+
+        results = [evaluation.model_dump() for evaluation in evaluations]
+        with self._lock:
+            self.counts["turns"] += turns
+        self._store(self.cache_key(conversation_history), results)
+        return results
+
+    def stats(self) -> Dict:
+        with self._lock:
+            return dict(self.counts, cached_transcripts=len(self._cache))
+
+
+class RateLimiter:
+    """Spaces request starts at least 60 / requests_per_minute seconds apart"""
+
+    def __init__(self, requests_per_minute: float):
+        self.interval = 60.0 / requests_per_minute if requests_per_minute > 0 else 0.0
+        self._next_start = 0.0
+        self._lock = None
+
+    async def acquire(self):
+        if self._lock is None:
+            self._lock = asyncio.Lock()
+        loop = asyncio.get_running_loop()
+        async with self._lock:
+            now = loop.time()
+            start = max(now, self._next_start)
+            self._next_start = start + self.interval
+        if start > now:
+            await asyncio.sleep(start - now)
+
+
+def load_transcripts(path: str) -> List[Tuple[str, List[Dict[str, str]]]]:
+    """(name, transcript) pairs from one JSON file in any of the accepted layouts"""
+    with open(path, 'r', encoding='utf-8') as f:
+        data = json.load(f)
+    name = os.path.splitext(os.path.basename(path))[0]
+
+    if isinstance(data, dict) and isinstance(data.get("runs"), list):
+        return [(f"{name}#{run['persona']}-{run['run']}", run["transcript"]) for run in data["runs"]]
+    if isinstance(data, dict):
+        data = data.get("conversation") or data.get("transcript") or data.get("conversation_history")
+    if not isinstance(data, list):
+        raise ValueError(f"{path} does not contain a transcript")
+    return [(name, data)]
+
+
+async def evaluate_transcripts(
+    transcripts: List[Tuple[str, List[Dict[str, str]]]],
+    evaluator: BatchTurnEvaluator,
+    concurrency: int = DEFAULT_CONCURRENCY,
+    requests_per_minute: float = DEFAULT_REQUESTS_PER_MINUTE
+) -> Dict[str, Dict]:
+    """
+    Evaluate many transcripts, at most `concurrency` calls in flight and
+    `requests_per_minute` call starts; cache hits skip both limits
+
+    Returns:
+        name -> {"evaluations", "summary"} or {"error"}
+    """
+    semaphore = asyncio.Semaphore(concurrency)
+    limiter = RateLimiter(requests_per_minute)
+
+    async def one(name: str, history: List[Dict[str, str]]) -> Tuple[str, Dict]:
+        try:
+            evaluations = evaluator.cached(history)
+            if evaluations is None:
+                async with semaphore:
+                    await limiter.acquire()
+                    evaluations = await asyncio.to_thread(evaluator.evaluate, history)
+            print(f"✅ Evaluated {name}: {len(evaluations)} turns")
+            return name, {"evaluations": evaluations, "summary": summarize_evaluations(evaluations)}
+        except Exception as e:
+            print(f"❌ Evaluation failed for {name}: {e}")
+            return name, {"error": f"{type(e).__name__}: {e}"}
+
+    return dict(await asyncio.gather(*(one(name, history) for name, history in transcripts)))
+
+
+def evaluate_paths(paths: List[str], evaluator: BatchTurnEvaluator, concurrency: int = DEFAULT_CONCURRENCY,
+                   requests_per_minute: float = DEFAULT_REQUESTS_PER_MINUTE) -> Dict[str, Dict]:
+    """Evaluate every transcript in the given files and directories (*.json)"""
+    files = []
+    for path in paths:
+        if os.path.isdir(path):
+            files.extend(sorted(os.path.join(path, name) for name in os.listdir(path) if name.endswith(".json")))
+        else:
+            files.append(path)
+
+    transcripts = []
+    for path in files:
+        try:
+            transcripts.extend(load_transcripts(path))
+        except (OSError, ValueError, KeyError) as e:
+            print(f"⚠️ Skipping {path}: {e}")
+
+    return asyncio.run(evaluate_transcripts(transcripts, evaluator, concurrency, requests_per_minute))
+
+
+def main(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(description="Evaluate whole transcripts, one LLM call each")
+    parser.add_argument("paths", nargs="+", help="Transcript files or directories of *.json transcripts")
+    parser.add_argument("--concurrency", type=int, default=DEFAULT_CONCURRENCY)
+    parser.add_argument("--rpm", type=float, default=DEFAULT_REQUESTS_PER_MINUTE, help="Maximum requests per minute")
+    parser.add_argument("--cache-dir", help="Keep evaluations on disk, keyed by transcript hash")
+    parser.add_argument("--output", default="batch_evaluations.json")
+    args = parser.parse_args(argv)
+
+    evaluator = BatchTurnEvaluator(cache_dir=args.cache_dir)
+    started = time.perf_counter()
+    results = evaluate_paths(args.paths, evaluator, args.concurrency, args.rpm)
+    elapsed = time.perf_counter() - started
+
+    with open(args.output, 'w', encoding='utf-8') as f:
+        json.dump({"stats": evaluator.stats(), "transcripts": results}, f, indent=2, ensure_ascii=False)
+
+    stats = evaluator.stats()
+    print(f"📊 {len(results)} transcripts, {stats['turns']} turns scored with {stats['llm_calls']} LLM calls "
+          f"({stats['cache_hits']} cached) in {elapsed:.1f}s")
+    for name, result in results.items():
+        violations = result.get("summary", {}).get("safety_violations")
+        if violations:
+            print(f"🚨 {name}: safety violation at turn(s) {', '.join(map(str, violations))}")
+    print(f"📄 Results written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,913 @@
+"""
+Performance Benchmarks
+Micro-benchmarks for hot paths, run from the command line:
+
+    python src/evaluation/benchmarks.py [name ...]
+
+With no names every benchmark runs. Each benchmark returns a dict of
+measurements and prints a short report.
+"""
+
+from typing import Callable, Dict, List
+import random
+import re
+import sys
+import os
+import time
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+
+# Representative Dr. O / patient turns (Eleanor's case)
+SAMPLE_TURNS = [
+    "Now, let's talk about the job you had before the library. What was your job title and what years did you work there?",
+    "From 1985 to 1995, I worked at a plant nursery and garden center.",
+    "I worked with plants and soils, helped customers, and I had to use some sprays to keep the bugs off the flowers. I don't remember the names of the sprays, only that they were strong-smelling.",
+    "Let's move on to the job you had before the nursery work.",
+    "From 1980 to 1985, I worked in a small workshop that made metal trinkets and jewelry. I didn't do the metalwork myself - I worked in the office.",
+    "Yes, I had to walk through the workshop several times a day. There were men grinding and polishing metals. It was a bit dusty, and you could hear the grinding machines running most of the day.",
+    "Well, it's always had this musty smell that's been there for years. The basement gets damp sometimes, especially after heavy rains.",
+    "I was a welder at the shipyard for ten years, mostly stainless steel, and then a foreman on construction sites doing demolition of old buildings.",
+]
+
+
+def _time_per_call(function: Callable[[], object], repeat: int) -> float:
+    """Mean wall time of one call, in microseconds"""
+    start = time.perf_counter()
+    for _ in range(repeat):
+        function()
+    return (time.perf_counter() - start) / repeat * 1e6
+
+
+def _synthetic_terms(count: int, seed: int = 7) -> List[str]:
+    """Pronounceable one- and two-word terms that do not collide with real text"""
+    rng = random.Random(seed)
+    syllables = ["ka", "lo", "mir", "dex", "tra", "vin", "sol", "pu", "zen", "gor", "bal", "qui"]
+    terms = set()
+    while len(terms) < count:
+        words = ["".join(rng.choice(syllables) for _ in range(rng.randint(2, 4)))
+                 for _ in range(rng.randint(1, 2))]
+        terms.add(" ".join(words))
+    return sorted(terms)
+
+
+def _legacy_scan(message: str) -> bool:
+    """The previous per-turn work: six uncompiled regexes plus a keyword loop"""
+    transition_patterns = [
+        r"Now, let's talk about the job you had (?:right )?before",
+        r"Let's move to your (?:previous|earlier) job",
+        r"Now, let's discuss your time",
+        r"Let's move on to the job you had",
+        r"Now, let's move on to",
+        r"Let's talk about your (?:previous|earlier) work"
+    ]
+    found = any(re.search(pattern, message, re.IGNORECASE) for pattern in transition_patterns)
+    content = message.lower()
+    for keyword in ["welder", "welding", "construction", "miner", "mining", "mechanic", "farming",
+                    "farmer", "carpenter", "electrician", "plumber", "painter", "machinist",
+                    "operator", "supervisor", "foreman", "contractor", "renovation", "demolition"]:
+        if keyword in content:
+            for word in content.split():
+                if keyword in word:
+                    return True
+    return found
+
+
+def benchmark_keyword_matcher(extra_terms: int = 5000, repeat: int = 200) -> Dict:
+    """
+    Per-turn cost of the Aho-Corasick keyword matcher
+
+    Scans every sample turn with the built-in lexicon, then again with
+    `extra_terms` synthetic terms added, and compares against the old
+    regex/keyword-loop approach (which knew only 19 keywords). The automaton
+    is slower than that per turn; the point is that its cost does not grow
+    with the lexicon, unlike the substring loop or a compiled alternation.
+    """
+    from ai.keyword_matcher import KeywordMatcher, DEFAULT_LEXICON, get_default_matcher
+
+    default = get_default_matcher()
+
+    start = time.perf_counter()
+    lexicon = dict(DEFAULT_LEXICON)
+    lexicon["synthetic"] = _synthetic_terms(extra_terms)
+    large = KeywordMatcher(lexicon)
+    build_ms = (time.perf_counter() - start) * 1000
+
+    def scan(matcher):
+        return lambda: [matcher.find(turn) for turn in SAMPLE_TURNS]
+
+    # The legacy keyword loop generalised to the same large lexicon
+    all_terms = [term for terms in lexicon.values() for term in terms]
+
+    def naive_large():
+        for turn in SAMPLE_TURNS:
+            content = turn.lower()
+            [term for term in all_terms if term in content]
+
+    # One compiled alternation of the whole lexicon, longest terms first
+    def alternation(terms):
+        pattern = re.compile(r"(?<!\w)(?:" + "|".join(
+            re.escape(term) for term in sorted({t.lower() for t in terms}, key=len, reverse=True)) + r")s?(?!\w)")
+        return lambda: [pattern.findall(turn.lower()) for turn in SAMPLE_TURNS]
+    default_terms = [term for terms in DEFAULT_LEXICON.values() for term in terms]
+
+    turns = len(SAMPLE_TURNS)
+    results = {
+        "turns": turns,
+        "mean_turn_chars": sum(len(turn) for turn in SAMPLE_TURNS) // turns,
+        "default_terms": default.term_count,
+        "large_terms": large.term_count,
+        "large_build_ms": round(build_ms, 1),
+        "legacy_us_per_turn": round(_time_per_call(lambda: [_legacy_scan(t) for t in SAMPLE_TURNS], repeat) / turns, 1),
+        "default_us_per_turn": round(_time_per_call(scan(default), repeat) / turns, 1),
+        "large_us_per_turn": round(_time_per_call(scan(large), repeat) / turns, 1),
+        "naive_large_us_per_turn": round(_time_per_call(naive_large, repeat // 10 or 1) / turns, 1),
+        "alternation_default_us_per_turn": round(_time_per_call(alternation(default_terms), repeat) / turns, 1),
+        "alternation_large_us_per_turn": round(_time_per_call(alternation(all_terms), repeat // 10 or 1) / turns, 1),
+        "hits_per_turn": round(sum(len(default.find(t)) for t in SAMPLE_TURNS) / turns, 1),
+    }
+
+    print("🔎 Keyword matcher")
+    print(f"   Lexicon: {results['default_terms']} built-in terms, "
+          f"{results['large_terms']} with synthetic terms (built in {results['large_build_ms']} ms)")
+    print(f"   Legacy regex + 19 keywords: {results['legacy_us_per_turn']} µs/turn")
+    print(f"   Automaton, built-in lexicon: {results['default_us_per_turn']} µs/turn "
+          f"({results['hits_per_turn']} hits/turn)")
+    print(f"   Automaton, large lexicon:    {results['large_us_per_turn']} µs/turn")
+    print(f"   Substring loop, large lexicon: {results['naive_large_us_per_turn']} µs/turn")
+    print(f"   Compiled alternation: {results['alternation_default_us_per_turn']} µs/turn built-in, "
+          f"{results['alternation_large_us_per_turn']} µs/turn large")
+    return results
+
+
+class MockLLMClient:
+    """
+    Stand-in for the LLM clients with fixed per-call latency
+
+    `latencies` maps a substring of the request to its delay in seconds;
+    requests matching nothing take `default_latency`. Requests containing
+    a `failures` substring raise, to exercise partial-failure handling.
+    """
+
+    def __init__(self, latencies: Dict[str, float] = None, default_latency: float = 0.1, failures: List[str] = ()):
+        self.latencies = latencies or {}
+        self.default_latency = default_latency
+        self.failures = list(failures)
+        self.calls = 0
+
+    def generate_response(self, messages: List[Dict[str, str]], system_prompt: str = None, **kwargs) -> str:
+        self.calls += 1
+        request = messages[-1]["content"] if messages else ""
+        delay = next((latency for key, latency in self.latencies.items() if key in request), self.default_latency)
+        time.sleep(delay)
+        if any(key in request for key in self.failures):
+            raise RuntimeError("Mock LLM failure")
+        return f"## Mock summary\n\n- {len(request)} characters summarised in {delay:.2f}s"
+
+
+def _offline_conversation_manager():
+    """ConversationManager whose clients are never contacted (they connect lazily)"""
+    os.environ.setdefault("GEMINI_API_KEY", "benchmark")
+    os.environ.setdefault("GOOGLE_CLOUD_PROJECT", "benchmark")
+    from ai.conversation import ConversationManager
+    return ConversationManager()
+
+
+def benchmark_comprehensive_summary(occupations: int = 6, fanout: int = 4) -> Dict:
+    """
+    Wall time of generate_comprehensive_summary, sequential vs fanned out
+
+    Each occupation summary takes a different mock latency; one fails, to
+    show the completed sections survive and ordering is unchanged.
+    """
+    from ai.transcript import new_chunk
+
+    manager = _offline_conversation_manager()
+    names = [f"Job {i + 1}" for i in range(occupations)]
+    latencies = {f"'{name}'": 0.2 + 0.1 * (i % 4) for i, name in enumerate(names)}
+
+    def run(max_workers: int):
+        manager.conversation_history = tuple({"role": "user", "content": f"I worked as {name}"} for name in names)
+        manager.occupation_chunks = {name: new_chunk(i, i + 1, "") for i, name in enumerate(names)}
+        manager.summary_client = MockLLMClient(latencies, failures=[f"'{names[1]}'"])
+        start = time.perf_counter()
+        report = manager.generate_comprehensive_summary(max_workers=max_workers)
+        return time.perf_counter() - start, report
+
+    sequential_s, sequential_report = run(1)
+    parallel_s, parallel_report = run(fanout)
+    strip_header = lambda report: report.split("\n\n", 2)[2]
+
+    results = {
+        "occupations": occupations,
+        "fanout": fanout,
+        "sum_of_calls_s": round(sum(latencies.values()), 2),
+        "slowest_call_s": round(max(latencies.values()), 2),
+        "sequential_s": round(sequential_s, 2),
+        "parallel_s": round(parallel_s, 2),
+        "same_output": strip_header(sequential_report) == strip_header(parallel_report),
+    }
+
+    print("🧵 Comprehensive summary fan-out (mock LLM)")
+    print(f"   {occupations} occupations, slowest call {results['slowest_call_s']}s, "
+          f"sum of calls {results['sum_of_calls_s']}s")
+    print(f"   Sequential: {results['sequential_s']}s   Fan-out {fanout}: {results['parallel_s']}s")
+    print(f"   Identical sections and ordering: {results['same_output']}")
+    return results
+
+
+class ScriptedInterviewer:
+    """Interview LLM stand-in: asks follow-ups, then moves on every `turns_per_job` replies"""
+
+    def __init__(self, turns_per_job: int):
+        self.turns_per_job = turns_per_job
+        self.replies = 0
+
+    def generate_response(self, messages: List[Dict[str, str]], system_prompt: str = None, **kwargs) -> str:
+        self.replies += 1
+        if self.replies % self.turns_per_job == 0:
+            return "Thank you. Now, let's talk about the job you had before that."
+        return "What materials did you work with, and was there any dust or fumes in the air?"
+
+
+def benchmark_chunk_memory(jobs: int = 10, turns_per_job: int = 8) -> Dict:
+    """
+    Memory held by occupation chunks for a long interview
+
+    Drives ConversationManager.continue_interview through a scripted
+    `jobs`-job interview, then compares the offset-based chunks with the
+    previous layout, where every chunk copied the whole history so far.
+    """
+    import json as json_module
+    import tempfile
+
+    occupations = ["welder", "baker", "miner", "farmer", "carpenter", "plumber",
+                   "librarian", "nurse", "painter", "mechanic", "cleaner", "roofer"]
+
+    manager = _offline_conversation_manager()
+    manager.llm_client = ScriptedInterviewer(turns_per_job)
+
+    history = [{"role": "assistant", "content": "Hello, I'm Dr. O. What is your most recent job?"}]
+    for job in range(jobs):
+        occupation = occupations[job % len(occupations)]
+        for turn in range(turns_per_job):
+            history.append({"role": "user", "content": f"I worked as a {occupation} for a few years. "
+                                                       f"Detail {turn}: there was a lot of dust most days."})
+            history.append(manager.continue_interview(history))
+    ends = [chunk["end"] for chunk in manager.occupation_chunks.values()]
+
+    to_text = manager._conversation_to_text
+    legacy_chunks = [list(history[:end]) for end in ends]
+    legacy_bytes = sys.getsizeof(list(history)) + sum(sys.getsizeof(chunk) for chunk in legacy_chunks)
+    offset_bytes = sys.getsizeof(manager.conversation_history) + sum(
+        sys.getsizeof(chunk) for chunk in manager.occupation_chunks.values())
+
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "chunks.json")
+        manager.save_occupation_chunks(path)
+        offset_json = os.path.getsize(path)
+    legacy_json = len(json_module.dumps({str(i): {"messages": chunk} for i, chunk in enumerate(legacy_chunks)}, indent=2))
+
+    results = {
+        "jobs": jobs,
+        "messages": len(history),
+        "chunks": len(ends),
+        "legacy_structure_bytes": legacy_bytes,
+        "offset_structure_bytes": offset_bytes,
+        "legacy_summary_input_chars": sum(len(to_text(chunk)) for chunk in legacy_chunks),
+        "offset_summary_input_chars": sum(len(to_text(manager.chunk_messages(name))) for name in manager.occupation_chunks),
+        "legacy_saved_json_bytes": legacy_json,
+        "offset_saved_json_bytes": offset_json,
+    }
+
+    print(f"🧠 Occupation chunk memory ({jobs}-job interview, {results['messages']} messages, {results['chunks']} chunks)")
+    print(f"   Containers: {results['legacy_structure_bytes']} B with history copies, "
+          f"{results['offset_structure_bytes']} B with offsets")
+    print(f"   Text sent to occupation summaries: {results['legacy_summary_input_chars']} chars before, "
+          f"{results['offset_summary_input_chars']} chars now")
+    print(f"   save_occupation_chunks output: {results['legacy_saved_json_bytes']} B before, "
+          f"{results['offset_saved_json_bytes']} B now")
+    return results
+
+
+class _FakeGenaiModels:
+    """`genai.Client().models` stand-in with a fixed API latency; refuses calls when `offline`"""
+
+    def __init__(self, latency: float):
+        self.latency = latency
+        self.offline = False
+        self.calls = 0
+
+    def generate_content(self, model: str, contents: str, config=None):
+        from types import SimpleNamespace
+        if self.offline:
+            raise RuntimeError("API called during replay")
+        self.calls += 1
+        time.sleep(self.latency)
+        usage = SimpleNamespace(prompt_token_count=len(contents) // 4, candidates_token_count=25)
+        return SimpleNamespace(text=f"Question {self.calls}: what did you work with in that job?", usage_metadata=usage)
+
+
+def benchmark_cassette_replay(turns: int = 8, api_latency: float = 0.2) -> Dict:
+    """
+    Record a scripted interview through GeminiClient, then replay it
+
+    The API is a fake with `api_latency` per call; replay is checked to
+    produce the identical transcript without touching it, at recorded
+    speed and with latency scaled to zero.
+    """
+    import tempfile
+    from types import SimpleNamespace
+    from ai.cassette import Cassette, RECORD, REPLAY, set_cassette
+    from ai.llm_client import GeminiClient
+
+    manager = _offline_conversation_manager()
+    models = _FakeGenaiModels(api_latency)
+    client = GeminiClient()
+    client._client = SimpleNamespace(models=models)
+    manager.llm_client = client
+
+    def interview():
+        start = time.perf_counter()
+        history = [manager.start_interview()]
+        for turn in range(turns):
+            history.append({"role": "user", "content": SAMPLE_TURNS[turn % len(SAMPLE_TURNS)]})
+            history.append(manager.continue_interview(history))
+        return history, time.perf_counter() - start
+
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "interview.jsonl.gz")
+        try:
+            set_cassette(Cassette(path, RECORD))
+            recorded, record_s = interview()
+            cassette_bytes = os.path.getsize(path)
+
+            models.offline = True
+            set_cassette(Cassette(path, REPLAY, latency_scale=1.0))
+            replayed, replay_s = interview()
+            set_cassette(Cassette(path, REPLAY, latency_scale=0.0))
+            instant, instant_s = interview()
+        finally:
+            set_cassette(None)
+
+    results = {
+        "calls": models.calls,
+        "cassette_bytes": cassette_bytes,
+        "record_s": round(record_s, 3),
+        "replay_s": round(replay_s, 3),
+        "instant_replay_s": round(instant_s, 3),
+        "identical": recorded == replayed == instant,
+    }
+
+    print(f"📼 Cassette record/replay ({results['calls']} calls, {api_latency * 1000:.0f} ms fake API latency)")
+    print(f"   Cassette: {results['cassette_bytes']} B")
+    print(f"   Recording: {results['record_s']} s, replay at recorded latency: {results['replay_s']} s, "
+          f"instant replay: {results['instant_replay_s']} s")
+    print(f"   Transcripts identical: {results['identical']}")
+    return results
+
+
+def _synthetic_report(jobs: int = 4, table_rows: int = 6, seed: int = 11) -> str:
+    """Doctor-report-shaped markdown: sections, bullets, (!) flags and an exposure table"""
+    rng = random.Random(seed)
+    agents = ["silica dust", "welding fume", "asbestos", "isocyanates", "flour dust", "diesel exhaust",
+              "wood dust", "mould spores", "cleaning sprays", "metal grinding dust"]
+    lines = ["# Occupational Health Analysis", "", "## Patient overview", "",
+             "Retired tradesperson with adult-onset breathlessness; history taken in reverse chronological order.", ""]
+    for job in range(jobs):
+        lines += [f"## Job {job + 1}: {rng.choice(['Welder', 'Baker', 'Stonemason', 'Cleaner', 'Mechanic'])} "
+                  f"({1980 + job * 5}-{1985 + job * 5})", ""]
+        for agent in rng.sample(agents, 3):
+            flag = "(!) " if rng.random() < 0.3 else ""
+            lines.append(f"- {flag}**{agent.capitalize()}**: {rng.randint(2, 8)} hours a day, "
+                         f"{rng.choice(['no', 'occasional', 'paper mask'])} respiratory protection")
+        lines += ["", "Tasks were performed in an enclosed workshop with limited ventilation.", ""]
+    lines += ["## Exposure matrix", "", "| Job | Agent | Years | Intensity | Controls | Notes |",
+              "|---|---|---|---|---|---|"]
+    for row in range(table_rows):
+        lines.append(f"| Job {row % jobs + 1} | {rng.choice(agents)} | {rng.randint(1, 15)} | "
+                     f"{rng.choice(['low', 'medium', 'high'])} | {rng.choice(['none', 'LEV', 'mask'])} | "
+                     f"{' '.join(rng.choice(agents).split()[0] for _ in range(rng.randint(3, 12)))} |")
+    lines += ["", "## Assessment", "", "Findings should be reviewed against spirometry and imaging.", ""]
+    return "\n".join(lines)
+
+
+def benchmark_bulk_pdf(documents: int = 60, workers: int = 4) -> Dict:
+    """
+    Bulk markdown-to-PDF throughput
+
+    Compares the one-launch-per-file CLI (measured on a few files and
+    extrapolated), an in-process loop, convert_many across a process pool,
+    and a re-run where every output is unchanged.
+    """
+    import subprocess
+    import tempfile
+    root = os.path.join(os.path.dirname(__file__), '..', '..')
+    sys.path.append(root)
+    import manual_table_converter as converter
+
+    with tempfile.TemporaryDirectory() as directory:
+        sources = os.path.join(directory, "md")
+        os.makedirs(sources)
+        for index in range(documents):
+            with open(os.path.join(sources, f"report_{index:04d}.md"), 'w', encoding='utf-8') as f:
+                f.write(_synthetic_report(seed=index))
+        files = sorted(os.listdir(sources))
+
+        sample = 3
+        start = time.perf_counter()
+        for name in files[:sample]:
+            subprocess.run([sys.executable, os.path.join(root, "manual_table_converter.py"),
+                            os.path.join(sources, name), os.path.join(directory, "cli.pdf")],
+                           check=True, capture_output=True)
+        cli_per_doc = (time.perf_counter() - start) / sample
+
+        start = time.perf_counter()
+        for name in files:
+            converter.convert_markdown_to_pdf(os.path.join(sources, name), os.path.join(directory, "loop.pdf"))
+        loop_s = time.perf_counter() - start
+
+        output = os.path.join(directory, "pdf")
+        bulk = converter.convert_many([sources], output, workers=workers)
+        rerun = converter.convert_many([sources], output, workers=workers)
+
+    results = {
+        "documents": documents,
+        "workers": workers,
+        "cli_per_launch_s": round(cli_per_doc, 3),
+        "cli_extrapolated_s": round(cli_per_doc * documents, 1),
+        "in_process_loop_s": round(loop_s, 2),
+        "bulk_s": bulk["elapsed_s"],
+        "bulk_docs_per_s": bulk["docs_per_s"],
+        "rerun_s": rerun["elapsed_s"],
+        "rerun_skipped": rerun["skipped"],
+    }
+
+    print(f"📚 Bulk PDF conversion ({documents} reports)")
+    print(f"   One CLI launch per file: {results['cli_per_launch_s']} s/report "
+          f"(~{results['cli_extrapolated_s']} s for all)")
+    print(f"   In-process loop: {results['in_process_loop_s']} s")
+    print(f"   convert_many, {workers} workers: {results['bulk_s']} s ({results['bulk_docs_per_s']} docs/s)")
+    print(f"   Unchanged re-run: {results['rerun_s']} s ({results['rerun_skipped']} skipped)")
+    return results
+
+
+def benchmark_bulk_regenerate(transcripts: int = 12, workers: int = 4) -> Dict:
+    """
+    End-to-end regeneration through LocalBatchBackend with a mock LLM
+
+    Ids include ones that sanitise to the same characters ("s/0", "s_0"),
+    a duplicate and a failing transcript; a second run must resume and
+    retry nothing but the failure.
+    """
+    import json
+    import tempfile
+    from reports.bulk_regenerate import LocalBatchBackend, regenerate
+
+    ids = ["s/0", "s_0", "s 0"] + [f"session-{index}" for index in range(transcripts - 3)]
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "transcripts.jsonl")
+        with open(path, 'w', encoding='utf-8') as f:
+            for item_id in ids + ["s/0"]:
+                marker = "FAIL" if item_id == ids[-1] else item_id
+                f.write(json.dumps({"id": item_id, "conversation": [
+                    {"role": "assistant", "content": "What was your job?"},
+                    {"role": "user", "content": f"I was a welder ({marker})"}
+                ]}) + "\n")
+
+        output = os.path.join(directory, "out")
+        backend = LocalBatchBackend(MockLLMClient(default_latency=0.05, failures=["FAIL"]), max_workers=workers)
+        first = regenerate(path, output, backend, pdf_workers=2, conversation_manager=_offline_conversation_manager())
+        files = sorted(os.listdir(output))
+        second = regenerate(path, output, backend, pdf_workers=2, conversation_manager=_offline_conversation_manager())
+        leftovers = [name for name in os.listdir(output) if name.endswith(".tmp")]
+
+    pdfs = [name for name in files if name.endswith(".pdf")]
+    results = {
+        "transcripts": len(ids),
+        "first_pdfs": first["pdfs"],
+        "first_failed": first["failed"],
+        "distinct_pdf_files": len(pdfs),
+        "second_skipped": second["skipped"],
+        "second_pdfs": second["pdfs"],
+        "temp_files_left": len(leftovers),
+        "llm_calls": backend.llm_client.calls,
+    }
+    # Every id but the failing one gets its own PDF; the resume skips those and the duplicate line
+    assert results["first_pdfs"] == results["distinct_pdf_files"] == len(ids) - 1, results
+    assert results["first_failed"] == 2 and results["second_skipped"] == len(ids), results
+    assert results["second_pdfs"] == 0 and results["temp_files_left"] == 0, results
+
+    print(f"♻️ Bulk regeneration, local stand-in ({len(ids)} transcripts)")
+    print(f"   First run: {first['pdfs']} PDFs in {len(pdfs)} files, {first['failed']} failed "
+          f"(one LLM failure, one duplicate id)")
+    print(f"   Resume: {second['skipped']} skipped, {second['pdfs']} regenerated; "
+          f"{results['llm_calls']} LLM calls in total")
+    return results
+
+
+def benchmark_compact_pdf(sizes=((4, 6), (12, 30), (30, 80)), repeat: int = 3) -> Dict:
+    """
+    PDF size and build time, default rendering vs compact mode
+
+    Each size is (jobs, exposure table rows) of a synthetic report.
+    """
+    root = os.path.join(os.path.dirname(__file__), '..', '..')
+    sys.path.append(root)
+    import manual_table_converter as converter
+    from reports.markdown_ast import parse_markdown
+
+    styles = converter.create_styles()
+    results = {}
+    for jobs, table_rows in sizes:
+        report = _synthetic_report(jobs=jobs, table_rows=table_rows)
+        document = parse_markdown(report)
+        row = {"markdown_bytes": len(report.encode("utf-8"))}
+        for mode, compact in (("default", False), ("compact", True)):
+            timings = []
+            for _ in range(repeat):
+                start = time.perf_counter()
+                pdf_bytes = converter.markdown_to_pdf_bytes(report, compact=compact)
+                timings.append(time.perf_counter() - start)
+            row[mode] = {
+                "pdf_bytes": len(pdf_bytes),
+                "build_ms": round(min(timings) * 1000, 1),
+                "flowables": len(converter.build_story(document, styles, compact)),
+            }
+        row["size_saving"] = round(1 - row["compact"]["pdf_bytes"] / row["default"]["pdf_bytes"], 3)
+        row["time_saving"] = round(1 - row["compact"]["build_ms"] / row["default"]["build_ms"], 3)
+        results[f"{jobs}x{table_rows}"] = row
+
+    print("🗜️ Compact PDF mode")
+    for name, row in results.items():
+        default, compact = row["default"], row["compact"]
+        print(f"   {name}: {default['pdf_bytes']} -> {compact['pdf_bytes']} bytes "
+              f"({row['size_saving']:.1%} smaller), {default['build_ms']} -> {compact['build_ms']} ms, "
+              f"{default['flowables']} -> {compact['flowables']} flowables")
+    return results
+
+
+def benchmark_large_table(rows: int = 200, repeat: int = 5) -> Dict:
+    """
+    Exposure-matrix table rendering: auto-sized Table vs create_table_element
+
+    The baseline is the previous renderer, a Table of Paragraph cells with no
+    column widths. Also renders a table with one cell taller than a page.
+    """
+    from io import BytesIO
+    from reportlab.platypus import Paragraph, SimpleDocTemplate, Table
+    from reportlab.platypus.doctemplate import LayoutError
+    root = os.path.join(os.path.dirname(__file__), '..', '..')
+    sys.path.append(root)
+    import manual_table_converter as converter
+    from reports.markdown_ast import parse_markdown, Table as MarkdownTable
+
+    styles = converter.create_styles()
+
+    def table_data(markdown: str):
+        block = next(b for b in parse_markdown(markdown).blocks if isinstance(b, MarkdownTable))
+        return [list(block.header)] + [list(row) for row in block.rows]
+
+    def auto_sized(data):
+        cells = [[Paragraph(converter.clean_text(cell), styles['table_header' if i == 0 else 'table_cell'])
+                  for cell in row] for i, row in enumerate(data)]
+        return Table(cells, repeatRows=1)
+
+    def render(make_table, data) -> Dict:
+        timings = []
+        for _ in range(repeat):
+            buffer = BytesIO()
+            doc = SimpleDocTemplate(buffer, leftMargin=converter.PAGE_SIDE_MARGINS / 2,
+                                    rightMargin=converter.PAGE_SIDE_MARGINS / 2)
+            start = time.perf_counter()
+            try:
+                doc.build([make_table(data)])
+            except LayoutError:
+                return {"error": "LayoutError"}
+            timings.append(time.perf_counter() - start)
+        return {"build_ms": round(min(timings) * 1000, 1), "pages": doc.page, "pdf_bytes": len(buffer.getvalue())}
+
+    matrix = table_data(_synthetic_report(jobs=8, table_rows=rows))
+    giant = [["Job", "Agent", "Notes"], ["Job 1", "silica dust", " ".join(f"note{i}" for i in range(4000))],
+             ["Job 2", "flour dust", "short"]]
+    new = lambda data: converter.create_table_element(data, styles)
+    compact = lambda data: converter.create_table_element(data, styles, compact=True)
+    results = {
+        "rows": rows,
+        "auto_sized": render(auto_sized, matrix),
+        "precomputed": render(new, matrix),
+        "precomputed_compact": render(compact, matrix),
+        "oversized_cell_auto_sized": render(auto_sized, giant),
+        "oversized_cell_precomputed": render(new, giant),
+    }
+
+    print(f"📐 Large table rendering ({rows} rows)")
+    for name in ("auto_sized", "precomputed", "precomputed_compact",
+                 "oversized_cell_auto_sized", "oversized_cell_precomputed"):
+        result = results[name]
+        if "error" in result:
+            print(f"   {name}: {result['error']}")
+        else:
+            print(f"   {name}: {result['build_ms']} ms, {result['pages']} pages, {result['pdf_bytes']} bytes")
+    return results
+
+
+class _SMTPSink:
+    """Minimal local SMTP server that accepts every message (optionally keeping the last one)"""
+
+    def __init__(self, keep: bool = False):
+        import socketserver
+        import threading
+        sink = self
+        self.keep = keep
+        self.messages = []
+
+        class Handler(socketserver.StreamRequestHandler):
+            def handle(self):
+                self.wfile.write(b"220 sink ready\r\n")
+                for line in self.rfile:
+                    command = line[:4].upper()
+                    if command == b"QUIT":
+                        self.wfile.write(b"221 bye\r\n")
+                        return
+                    if command == b"DATA":
+                        self.wfile.write(b"354 go ahead\r\n")
+                        lines = []
+                        for data_line in self.rfile:
+                            if data_line == b".\r\n":
+                                break
+                            if sink.keep:
+                                lines.append(data_line)
+                        if sink.keep:
+                            sink.messages.append(b"".join(lines))
+                    self.wfile.write(b"250 ok\r\n")
+
+        self.server = socketserver.ThreadingTCPServer(("127.0.0.1", 0), Handler)
+        self.port = self.server.server_address[1]
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+
+    def close(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+
+def _legacy_send_email(port: int, pdf_path: str, body: str):
+    """The previous send path: file re-read into MIMEBase, whole message flattened for sendmail"""
+    import smtplib
+    from email import encoders
+    from email.mime.base import MIMEBase
+    from email.mime.multipart import MIMEMultipart
+    from email.mime.text import MIMEText
+
+    msg = MIMEMultipart()
+    msg['From'] = "sender@example.com"
+    msg['To'] = "doctor@example.com"
+    msg['Subject'] = "Occupational Health Summary"
+    msg.attach(MIMEText(body, 'plain'))
+    with open(pdf_path, "rb") as attachment:
+        part = MIMEBase('application', 'octet-stream')
+        part.set_payload(attachment.read())
+    encoders.encode_base64(part)
+    part.add_header('Content-Disposition', f'attachment; filename= {os.path.basename(pdf_path)}')
+    msg.attach(part)
+    server = smtplib.SMTP("127.0.0.1", port)
+    server.sendmail("sender@example.com", "doctor@example.com", msg.as_string())
+    server.quit()
+
+
+def benchmark_email_memory(pdf_megabytes: float = 4.0) -> Dict:
+    """
+    Peak Python memory of one doctor email send, legacy vs streaming
+
+    Both paths talk to a local SMTP sink; the PDF is already in memory (as
+    after rendering) and its size is not counted. Also checks that the
+    streamed message parses back to the identical attachment.
+    """
+    import email
+    import smtplib
+    import tempfile
+    import tracemalloc
+    from email.policy import default
+    from reports.email_delivery import build_message, message_chunks, send_streaming
+
+    pdf_bytes = b"%PDF-1.4\n" + random.Random(5).randbytes(int(pdf_megabytes * 1024 * 1024))
+    body = "Dear Dr. Smith,\n\nPlease find attached the report.\n.\nA line starting with a period.\n"
+
+    def streaming_send(port: int):
+        msg = build_message("sender@example.com", "doctor@example.com", "Occupational Health Summary",
+                            body, "report.pdf")
+        with smtplib.SMTP("127.0.0.1", port) as server:
+            send_streaming(server, "sender@example.com", "doctor@example.com", message_chunks(msg, pdf_bytes))
+
+    def peak(send) -> int:
+        tracemalloc.start()
+        tracemalloc.reset_peak()
+        send()
+        _, peak_bytes = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        return peak_bytes
+
+    sink = _SMTPSink()
+    with tempfile.TemporaryDirectory() as directory:
+        pdf_path = os.path.join(directory, "report.pdf")
+        with open(pdf_path, 'wb') as f:
+            f.write(pdf_bytes)
+        legacy_peak = peak(lambda: _legacy_send_email(sink.port, pdf_path, body))
+    streaming_peak = peak(lambda: streaming_send(sink.port))
+    sink.close()
+
+    checker = _SMTPSink(keep=True)
+    streaming_send(checker.port)
+    checker.close()
+    received = email.message_from_bytes(re.sub(rb'(?m)^\.\.', b'.', checker.messages[0]), policy=default)
+    attachment = next(received.iter_attachments())
+    intact = (attachment.get_content() == pdf_bytes
+              and received.get_body().get_content().replace('\r\n', '\n') == body)
+
+    size = len(pdf_bytes)
+    results = {
+        "pdf_bytes": size,
+        "legacy_peak_bytes": legacy_peak,
+        "streaming_peak_bytes": streaming_peak,
+        "legacy_peak_x_pdf": round(legacy_peak / size, 2),
+        "streaming_peak_x_pdf": round(streaming_peak / size, 3),
+        "attachment_intact": intact,
+    }
+
+    print(f"✉️ Email send peak memory ({size / 1024 / 1024:.1f} MB PDF)")
+    print(f"   Legacy MIME + sendmail: {legacy_peak / 1024 / 1024:.1f} MB ({results['legacy_peak_x_pdf']}x the PDF)")
+    print(f"   Streaming EmailMessage: {streaming_peak / 1024 / 1024:.2f} MB ({results['streaming_peak_x_pdf']}x the PDF)")
+    print(f"   Attachment round-trips intact: {intact}")
+    return results
+
+
+def _serve_and_load(root: str, env: Dict[str, str], port: int, clients: int, seconds: float) -> Dict:
+    """Start the gunicorn server, drive it with `clients` keep-alive connections, then stop it"""
+    import http.client
+    import json
+    import signal
+    import subprocess
+    import threading
+
+    server = subprocess.Popen([sys.executable, "-m", "gunicorn", "app:app", "-c", "gunicorn.conf.py"],
+                              cwd=root, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    try:
+        deadline = time.monotonic() + 90
+        while True:
+            try:
+                probe = http.client.HTTPConnection("127.0.0.1", port, timeout=5)
+                probe.request("GET", "/")
+                probe.getresponse().read()
+                probe.close()
+                break
+            except OSError:
+                if time.monotonic() > deadline or server.poll() is not None:
+                    raise RuntimeError("gunicorn did not start")
+                time.sleep(0.2)
+
+        counts = {"requests": 0, "errors": 0, "session_misses": 0}
+        lock = threading.Lock()
+        stop_at = time.monotonic() + seconds
+
+        def client():
+            connection = http.client.HTTPConnection("127.0.0.1", port, timeout=30)
+            done = errors = misses = 0
+            while time.monotonic() < stop_at:
+                # Create a session (write), read it back (maybe on another worker), fetch a page
+                connection.request("POST", "/api/debug/create-test-session")
+                response = connection.getresponse()
+                body = response.read()
+                if response.status != 200:
+                    errors += 1
+                    continue
+                session_id = json.loads(body)["session_id"]
+                connection.close()  # new connection, so the read may land on any worker
+                connection.request("GET", f"/api/session/{session_id}")
+                response = connection.getresponse()
+                response.read()
+                misses += response.status == 404
+                connection.request("GET", "/chat.html")
+                response = connection.getresponse()
+                response.read()
+                errors += response.status != 200
+                done += 3
+            with lock:
+                counts["requests"] += done
+                counts["errors"] += errors
+                counts["session_misses"] += misses
+
+        start = time.perf_counter()
+        threads = [threading.Thread(target=client) for _ in range(clients)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        elapsed = time.perf_counter() - start
+        return dict(counts, requests_per_s=round(counts["requests"] / elapsed, 1))
+    finally:
+        server.send_signal(signal.SIGTERM)
+        try:
+            server.wait(timeout=30)
+        except subprocess.TimeoutExpired:
+            server.kill()
+
+
+def benchmark_multiworker(worker_counts=(1, 2, 4), clients: int = 16, seconds: float = 5.0) -> Dict:
+    """
+    Request throughput of the gunicorn multi-worker mode by worker count
+
+    Each client creates a session, reads it back over a fresh connection
+    (so the read can land on a different worker) and fetches a page. With
+    more than one worker the shared SQLite tier must make every session
+    visible to every worker: session_misses should stay 0. A single worker
+    on the shared tier is measured too, separating the cost of SQLite from
+    the gain of more processes. Throughput can only scale up to the number
+    of CPUs.
+    """
+    import socket
+    import tempfile
+    root = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..'))
+
+    results = {"cpus": os.cpu_count(), "clients": clients}
+    runs = [("1 worker, in-memory", 1)] + [(f"{workers} workers, shared", workers) for workers in worker_counts]
+    for name, workers in runs:
+        with tempfile.TemporaryDirectory() as directory:
+            with socket.socket() as probe:
+                probe.bind(("127.0.0.1", 0))
+                port = probe.getsockname()[1]
+            env = dict(os.environ, WEB_CONCURRENCY=str(workers), PORT=str(port), TMPDIR=directory,
+                       ARTIFACT_DIR=os.path.join(directory, "artifacts"))
+            env.setdefault("GEMINI_API_KEY", "benchmark")
+            env.setdefault("GOOGLE_CLOUD_PROJECT", "benchmark")
+            shared = f"sqlite://{os.path.join(directory, 'shared.sqlite3')}" if "shared" in name else ""
+            env.update(SHARED_CACHE_URL=shared, SESSION_STORE_URL=shared)
+            results[name] = _serve_and_load(root, env, port, clients, seconds)
+
+    print(f"🧵 Multi-worker serving ({results['cpus']} CPUs, {clients} clients)")
+    baseline = results[runs[1][0]]["requests_per_s"]
+    for name, _ in runs:
+        result = results[name]
+        print(f"   {name}: {result['requests_per_s']} req/s "
+              f"({result['requests_per_s'] / baseline:.2f}x), {result['errors']} errors, "
+              f"{result['session_misses']} cross-worker session misses")
+    if (results["cpus"] or 1) < max(worker_counts):
+        print(f"   ⚠️ Only {results['cpus']} CPU(s): worker scaling is not measurable on this host")
+    return results
+
+
+def benchmark_session_stores(turns: int = 200) -> Dict:
+    """
+    Cost of one delta-protocol append and transcript read per session store backend
+
+    The Redis backend runs against the in-process LocalRedis stand-in, so
+    it measures the store's own overhead, not a network round trip.
+    Behaviour is covered by tests/test_session_stores.py.
+    """
+    import tempfile
+    from sessions.store import InMemorySessionStore, SQLiteSessionStore, RedisSessionStore
+    from sessions.local_redis import LocalRedis
+
+    results = {"turns": turns}
+    with tempfile.TemporaryDirectory() as directory:
+        stores = {
+            "memory": InMemorySessionStore(),
+            "sqlite": SQLiteSessionStore(os.path.join(directory, "shared.sqlite3")),
+            "redis (local stand-in)": RedisSessionStore(LocalRedis()),
+        }
+        for name, store in stores.items():
+            start = time.perf_counter()
+            for index in range(turns):
+                store.append("timed", [{"role": "user", "content": f"turn {index}"}])
+            append_us = (time.perf_counter() - start) / turns * 1e6
+            read_us = _time_per_call(lambda: store.get_messages("timed"), 50)
+            results[name] = {"append_us": round(append_us, 1), "read_us": round(read_us, 1)}
+
+    print(f"🗄️ Session stores ({turns}-message transcript)")
+    for name in stores:
+        print(f"   {name}: {results[name]['append_us']} µs/append, {results[name]['read_us']} µs/full read")
+    return results
+
+
+BENCHMARKS = {
+    "keyword_matcher": benchmark_keyword_matcher,
+    "comprehensive_summary": benchmark_comprehensive_summary,
+    "chunk_memory": benchmark_chunk_memory,
+    "cassette_replay": benchmark_cassette_replay,
+    "bulk_pdf": benchmark_bulk_pdf,
+    "bulk_regenerate": benchmark_bulk_regenerate,
+    "compact_pdf": benchmark_compact_pdf,
+    "large_table": benchmark_large_table,
+    "email_memory": benchmark_email_memory,
+    "multiworker": benchmark_multiworker,
+    "session_stores": benchmark_session_stores,
+}
+
+
+if __name__ == "__main__":
+    names = sys.argv[1:] or list(BENCHMARKS)
+    unknown = [name for name in names if name not in BENCHMARKS]
+    if unknown:
+        print(f"Unknown benchmark(s): {', '.join(unknown)}")
+        print(f"Available: {', '.join(BENCHMARKS)}")
+        sys.exit(1)
+
+    for name in names:
+        BENCHMARKS[name]()
@@ -3,24 +3,46 @@ Simple Patient Agent for Testing
 Simulates a patient responding to Dr. O's questions
 """
 
-from typing import List, Dict
+from typing import List, Dict, Optional
+import asyncio
 import sys
 import os
 sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
 
+# Full persona prompts (Arthur, Eleanor, Leo) live next to the package
+PERSONA_DIR = os.path.join(os.path.dirname(__file__), '..', '..', 'patient_prompt')
+
 class PatientAgent:
     """Simulates a patient for conversation testing"""
     
-    def __init__(self, patient_profile: Dict[str, str]):
+    def __init__(self, patient_profile: Dict[str, str], system_prompt: Optional[str] = None):
         """
         Initialize patient agent with a profile
         
         Args:
             patient_profile: Dictionary containing patient's work history and details
+            system_prompt: Complete persona prompt, used instead of wrapping the profile
         """
         self.profile = patient_profile
         self.llm_client = None  # Lazy load when needed
-        self.system_prompt = self._create_system_prompt()
+        self.system_prompt = system_prompt or self._create_system_prompt()
+    
+    @classmethod
+    def from_persona(cls, name: str) -> "PatientAgent":
+        """
+        Create a patient from a persona (a SAMPLE_PATIENTS key or a patient_prompt/<name>_prompt.md file)
+        
+        Args:
+            name: Persona name, e.g. "eleanor" or "construction_worker"
+        """
+        if name in SAMPLE_PATIENTS:
+            return cls(SAMPLE_PATIENTS[name])
+        
+        prompt_path = os.path.join(PERSONA_DIR, f"{name}_prompt.md")
+        if not os.path.exists(prompt_path):
+            raise ValueError(f"Unknown persona '{name}'. Available: {', '.join(available_personas())}")
+        with open(prompt_path, 'r', encoding='utf-8') as f:
+            return cls({"name": name.capitalize()}, system_prompt=f.read().strip())
     
     def _get_llm_client(self):
         """Lazy load the LLM client only when needed"""
@@ -49,42 +71,35 @@ Remember: You are the PATIENT, not a doctor or interviewer."""
         
         return prompt
     
-    def respond(self, conversation_history: List[Dict[str, str]]) -> str:
+    def respond(self, conversation_history: List[Dict[str, str]], fallback: bool = True) -> str:
         """
         Generate patient response based on conversation history
         
         Args:
             conversation_history: Full conversation so far
+            fallback: Answer errors with a stock reply; when False they
+                are raised, so callers can record the interview as failed
             
         Returns:
             Patient's response as string
         """
         try:
-            # Build conversation context
-            conversation_text = ""
-            for message in conversation_history:
-                role = message["role"]
-                content = message["content"]
-                
-                if role == "assistant":  # Dr. O
-                    conversation_text += f"Dr. O: {content}\n"
-                elif role == "user":  # Previous patient responses
-                    conversation_text += f"Patient: {content}\n"
-            
-            # Add instruction for next response
-            conversation_text += "\nProvide the patient's natural response to Dr. O's latest question:\n\nPatient:"
-            
             client = self._get_llm_client()
-            response = client.client.models.generate_content(
-                model=client.model_name,
-                contents=f"{self.system_prompt}\n\nCONVERSATION:\n{conversation_text}"
+            return client.generate_response(
+                messages=conversation_history,
+                system_prompt=self.system_prompt,
+                role="patient"
             )
             
-            return response.text.strip()
-            
         except Exception as e:
+            if not fallback:
+                raise
             print(f"❌ Patient agent error: {e}")
             return "I'm sorry, could you repeat that?"
+    
+    async def respond_async(self, conversation_history: List[Dict[str, str]]) -> str:
+        """Non-blocking respond(), for running many simulated patients at once"""
+        return await asyncio.to_thread(self.respond, conversation_history)
 
 # Sample patient profiles for testing
 SAMPLE_PATIENTS = {
@@ -177,3 +192,12 @@ PERSONALITY:
 - Willing to provide details but needs prompting for specifics"""
     }
 }
+
+
+def available_personas() -> List[str]:
+    """Names accepted by PatientAgent.from_persona"""
+    prompt_names = sorted(
+        filename[:-len("_prompt.md")] for filename in os.listdir(PERSONA_DIR)
+        if filename.endswith("_prompt.md")
+    ) if os.path.isdir(PERSONA_DIR) else []
+    return prompt_names + list(SAMPLE_PATIENTS)
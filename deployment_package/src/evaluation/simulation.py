@@ -0,0 +1,403 @@
+"""
+Interview Simulation
+Plays many full interviews concurrently - Dr. O (ConversationManager)
+against simulated patients - and writes a report that can be compared
+across prompt or model changes:
+
+    python src/evaluation/simulation.py --personas eleanor arthur leo --runs 3 --concurrency 4
+    python src/evaluation/simulation.py --compare simulation_reports/before.json simulation_reports/after.json
+
+--dry-run swaps both LLMs for scripted stand-ins, to check the harness
+itself without API calls.
+"""
+
+from typing import Callable, Dict, List, Optional
+import argparse
+import asyncio
+import hashlib
+import json
+import os
+import sys
+import time
+from datetime import datetime
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+
+from ai.llm_client import estimate_cost
+from ai.usage import estimate_tokens
+from evaluation.patient_agent import PatientAgent, available_personas
+
+# Defaults (override with environment variables)
+DEFAULT_CONCURRENCY = int(os.getenv("SIMULATION_CONCURRENCY", "4"))
+DEFAULT_MAX_TURNS = int(os.getenv("SIMULATION_MAX_TURNS", "60"))
+DEFAULT_PERSONAS = ["arthur", "eleanor", "leo"]
+REPORT_DIR = os.path.join(os.path.dirname(__file__), '..', '..', 'simulation_reports')
+
+DR_O = "dr_o"
+PATIENT = "patient"
+
+
+class TurnRecord:
+    """One LLM call in a simulated interview"""
+    __slots__ = ("index", "speaker", "latency_s", "prompt_tokens", "response_tokens", "cost_usd", "estimated")
+
+    def __init__(self, index: int, speaker: str, latency_s: float, prompt_tokens: int,
+                 response_tokens: int, cost_usd: float, estimated: bool):
+        self.index = index
+        self.speaker = speaker
+        self.latency_s = latency_s
+        self.prompt_tokens = prompt_tokens
+        self.response_tokens = response_tokens
+        self.cost_usd = cost_usd
+        self.estimated = estimated
+
+    def to_dict(self) -> Dict:
+        return {name: getattr(self, name) for name in self.__slots__}
+
+
+class SimulationRun:
+    """Outcome of one simulated interview"""
+
+    def __init__(self, persona: str, run: int):
+        self.persona = persona
+        self.run = run
+        self.turns = []
+        self.transcript = []
+        self.completed = False
+        self.error = None
+        self.wall_time_s = 0.0
+
+    @property
+    def patient_turns(self) -> int:
+        return sum(1 for turn in self.turns if turn.speaker == PATIENT)
+
+    def totals(self) -> Dict:
+        return {
+            "prompt_tokens": sum(turn.prompt_tokens for turn in self.turns),
+            "response_tokens": sum(turn.response_tokens for turn in self.turns),
+            "cost_usd": sum(turn.cost_usd for turn in self.turns)
+        }
+
+    def to_dict(self) -> Dict:
+        return dict({
+            "persona": self.persona,
+            "run": self.run,
+            "completed": self.completed,
+            "error": self.error,
+            "patient_turns": self.patient_turns,
+            "wall_time_s": self.wall_time_s,
+            "turns": [turn.to_dict() for turn in self.turns],
+            "transcript": self.transcript
+        }, **self.totals())
+
+
+def _measured_call(call: Callable[[], object], client, prompt_text: str, response_text: Callable[[object], str]):
+    """
+    Run one blocking LLM call and measure it
+
+    Runs in a worker thread, so the client's thread-local usage belongs to
+    this call. Returns (result, latency, prompt tokens, response tokens,
+    whether the counts are estimates).
+    """
+    start = time.perf_counter()
+    result = call()
+    latency = time.perf_counter() - start
+
+    usage = client.last_usage() if hasattr(client, "last_usage") else None
+    if usage:
+        return result, latency, usage["prompt_tokens"], usage["response_tokens"], False
+    return result, latency, estimate_tokens(prompt_text), estimate_tokens(response_text(result)), True
+
+
+def _prompt_text(system_prompt: str, conversation_history: List[Dict[str, str]]) -> str:
+    return system_prompt + "".join(message["content"] for message in conversation_history)
+
+
+async def simulate_interview(persona: str, run: int, manager, patient: PatientAgent,
+                             max_turns: int = DEFAULT_MAX_TURNS) -> SimulationRun:
+    """
+    Play one interview until Dr. O sends the completion signal
+
+    Args:
+        persona: Persona name, for the report
+        run: Run number within the persona
+        manager: ConversationManager playing Dr. O
+        patient: Simulated patient
+        max_turns: Patient answers allowed before the run is cut off
+
+    Returns:
+        SimulationRun; errors are recorded on it rather than raised
+    """
+    result = SimulationRun(persona, run)
+    history = []
+    started = time.perf_counter()
+
+    async def turn(speaker: str, call: Callable[[], object], client, system_prompt: str, text_of: Callable[[object], str]):
+        model_name = getattr(client, "model_name", "")
+        reply, latency, prompt_tokens, response_tokens, estimated = await asyncio.to_thread(
+            _measured_call, call, client, _prompt_text(system_prompt, history), text_of
+        )
+        result.turns.append(TurnRecord(
+            len(result.turns), speaker, latency, prompt_tokens, response_tokens,
+            estimate_cost(model_name, prompt_tokens, response_tokens), estimated
+        ))
+        return reply
+
+    try:
+        opening = await turn(DR_O, manager.start_interview, manager.llm_client,
+                             manager.interview_prompt, lambda message: message["content"])
+        history.append(opening)
+
+        while result.patient_turns < max_turns:
+            snapshot = list(history)
+            answer = await turn(PATIENT, lambda: patient.respond(snapshot, fallback=False), patient._get_llm_client(),
+                                patient.system_prompt, lambda text: text)
+            history.append({"role": "user", "content": answer})
+
+            snapshot = list(history)
+            reply = await turn(DR_O, lambda: manager.continue_interview(snapshot), manager.llm_client,
+                               manager.interview_prompt, lambda message: message["content"])
+            history.append(reply)
+
+            if manager.is_interview_complete(reply["content"]):
+                result.completed = True
+                break
+
+    except Exception as e:
+        result.error = f"{type(e).__name__}: {e}"
+        print(f"❌ Simulation {persona}#{run} failed: {result.error}")
+
+    result.wall_time_s = time.perf_counter() - started
+    result.transcript = history
+    status = "completed" if result.completed else ("failed" if result.error else "cut off")
+    print(f"🎭 {persona}#{run} {status} after {result.patient_turns} patient turns in {result.wall_time_s:.1f}s")
+    return result
+
+
+def _shutdown_manager(manager):
+    """Stop the manager's background summary threads"""
+    pipeline = getattr(manager, "summary_pipeline", None)
+    if pipeline is not None:
+        pipeline.shutdown()
+
+
+async def run_simulations(
+    personas: List[str],
+    runs: int = 1,
+    concurrency: int = DEFAULT_CONCURRENCY,
+    max_turns: int = DEFAULT_MAX_TURNS,
+    manager_factory: Optional[Callable[[], object]] = None,
+    patient_factory: Callable[[str], PatientAgent] = PatientAgent.from_persona
+) -> List[SimulationRun]:
+    """
+    Run `runs` interviews per persona, at most `concurrency` at a time
+
+    Each interview gets its own ConversationManager, since the manager
+    keeps per-interview occupation state; its summary pipeline threads are
+    shut down when the interview ends.
+
+    Returns:
+        SimulationRuns in persona/run order
+    """
+    if manager_factory is None:
+        from ai.conversation import ConversationManager
+        manager_factory = ConversationManager
+
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def bounded(persona: str, run: int) -> SimulationRun:
+        async with semaphore:
+            manager = manager_factory()
+            try:
+                return await simulate_interview(persona, run, manager, patient_factory(persona), max_turns)
+            finally:
+                _shutdown_manager(manager)
+
+    return list(await asyncio.gather(*(
+        bounded(persona, run) for persona in personas for run in range(1, runs + 1)
+    )))
+
+
+def _percentile(values: List[float], fraction: float) -> float:
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(round(fraction * (len(ordered) - 1))))]
+
+
+def _aggregate(runs: List[SimulationRun]) -> Dict:
+    """Comparable metrics over a group of runs"""
+    completed = [run for run in runs if run.completed]
+    totals = [run.totals() for run in runs]
+    metrics = {
+        "runs": len(runs),
+        "completed": len(completed),
+        "errors": sum(1 for run in runs if run.error),
+        "completion_rate": len(completed) / len(runs) if runs else 0.0,
+        "mean_turns_to_completion": (sum(run.patient_turns for run in completed) / len(completed)) if completed else None,
+        "prompt_tokens": sum(total["prompt_tokens"] for total in totals),
+        "response_tokens": sum(total["response_tokens"] for total in totals),
+        "cost_usd": sum(total["cost_usd"] for total in totals),
+        "estimated_tokens": any(turn.estimated for run in runs for turn in run.turns)
+    }
+    for speaker in (DR_O, PATIENT):
+        latencies = [turn.latency_s for run in runs for turn in run.turns if turn.speaker == speaker]
+        metrics[f"{speaker}_latency_p50_s"] = _percentile(latencies, 0.5)
+        metrics[f"{speaker}_latency_p95_s"] = _percentile(latencies, 0.95)
+    return metrics
+
+
+def build_report(runs: List[SimulationRun], config: Dict) -> Dict:
+    """Report with the run configuration, per-persona and overall metrics, and every run"""
+    personas = []
+    for run in runs:
+        if run.persona not in personas:
+            personas.append(run.persona)
+    return {
+        "generated_at": datetime.now().isoformat(),
+        "config": config,
+        "overall": _aggregate(runs),
+        "personas": {persona: _aggregate([run for run in runs if run.persona == persona]) for persona in personas},
+        "runs": [run.to_dict() for run in runs]
+    }
+
+
+def write_report(report: Dict, path: Optional[str] = None) -> str:
+    """Write the report as JSON; returns the path used"""
+    if path is None:
+        os.makedirs(REPORT_DIR, exist_ok=True)
+        path = os.path.join(REPORT_DIR, f"simulation_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json")
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(report, f, indent=2, ensure_ascii=False)
+    return path
+
+
+COMPARED_METRICS = [
+    "completion_rate", "mean_turns_to_completion", "dr_o_latency_p50_s", "dr_o_latency_p95_s",
+    "patient_latency_p50_s", "prompt_tokens", "response_tokens", "cost_usd"
+]
+
+
+def print_summary(report: Dict, baseline: Optional[Dict] = None):
+    """Per-persona table, with deltas against `baseline` when given"""
+    if baseline is not None and baseline.get("config", {}).get("prompt_hash") != report["config"].get("prompt_hash"):
+        print("ℹ️ Interview prompt differs between the two reports")
+
+    groups = dict(report["personas"], overall=report["overall"])
+    for name, metrics in groups.items():
+        print(f"📊 {name}: {metrics['completed']}/{metrics['runs']} completed")
+        previous = (baseline or {}).get("overall" if name == "overall" else "personas", {})
+        previous = previous if name == "overall" else previous.get(name, {})
+        for metric in COMPARED_METRICS:
+            value = metrics.get(metric)
+            if value is None:
+                continue
+            line = f"   {metric}: {value:.4g}"
+            before = previous.get(metric) if previous else None
+            if before is not None:
+                line += f" (was {before:.4g}, {value - before:+.4g})"
+            print(line)
+
+
+class _ScriptedDoctor:
+    """Dry-run Dr. O: asks a few questions, then sends the completion signal"""
+    model_name = "dry-run"
+
+    def __init__(self, questions: int = 6, latency: float = 0.05):
+        self.questions = questions
+        self.latency = latency
+
+    def generate_response(self, messages: List[Dict[str, str]], system_prompt: str = None, **kwargs) -> str:
+        time.sleep(self.latency)
+        answered = sum(1 for message in messages if message["role"] == "user")
+        if answered >= self.questions:
+            return "---INTERVIEW_COMPLETE---"
+        return "What did you do in that job, and was there any dust or fumes in the air?"
+
+
+class _ScriptedPatient:
+    """Dry-run patient: the same vague answer every turn"""
+    model_name = "dry-run"
+
+    def __init__(self, latency: float = 0.05):
+        self.latency = latency
+
+    def generate_response(self, messages: List[Dict[str, str]], system_prompt: str = None, **kwargs) -> str:
+        time.sleep(self.latency)
+        return "I worked at the quarry for a few years. It was a bit dusty, I suppose."
+
+
+def _dry_run_factories():
+    os.environ.setdefault("GEMINI_API_KEY", "dry-run")
+    os.environ.setdefault("GOOGLE_CLOUD_PROJECT", "dry-run")
+    from ai.conversation import ConversationManager
+
+    def manager_factory():
+        manager = ConversationManager()
+        manager.llm_client = _ScriptedDoctor()
+        return manager
+
+    def patient_factory(persona: str) -> PatientAgent:
+        patient = PatientAgent.from_persona(persona)
+        patient.llm_client = _ScriptedPatient()
+        return patient
+
+    return manager_factory, patient_factory
+
+
+def main(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(description="Run concurrent simulated interviews")
+    parser.add_argument("--personas", nargs="+", default=DEFAULT_PERSONAS,
+                        help=f"Available: {', '.join(available_personas())}")
+    parser.add_argument("--runs", type=int, default=1, help="Interviews per persona")
+    parser.add_argument("--concurrency", type=int, default=DEFAULT_CONCURRENCY)
+    parser.add_argument("--max-turns", type=int, default=DEFAULT_MAX_TURNS)
+    parser.add_argument("--output", help="Report path (default: simulation_reports/simulation_<time>.json)")
+    parser.add_argument("--baseline", help="Earlier report to compare against")
+    parser.add_argument("--compare", nargs=2, metavar=("BEFORE", "AFTER"), help="Compare two existing reports and exit")
+    parser.add_argument("--dry-run", action="store_true", help="Use scripted stand-ins instead of the LLMs")
+    args = parser.parse_args(argv)
+
+    if args.compare:
+        reports = []
+        for path in args.compare:
+            with open(path, 'r', encoding='utf-8') as f:
+                reports.append(json.load(f))
+        print_summary(reports[1], baseline=reports[0])
+        return
+
+    if args.dry_run:
+        manager_factory, patient_factory = _dry_run_factories()
+    else:
+        from ai.conversation import ConversationManager
+        manager_factory, patient_factory = ConversationManager, PatientAgent.from_persona
+
+    started = time.perf_counter()
+    runs = asyncio.run(run_simulations(args.personas, args.runs, args.concurrency, args.max_turns,
+                                       manager_factory, patient_factory))
+    elapsed = time.perf_counter() - started
+
+    prompt_manager = manager_factory()
+    _shutdown_manager(prompt_manager)
+    config = {
+        "personas": args.personas,
+        "runs": args.runs,
+        "concurrency": args.concurrency,
+        "max_turns": args.max_turns,
+        "dry_run": args.dry_run,
+        "interviewer_model": getattr(prompt_manager.llm_client, "model_name", None),
+        "prompt_hash": hashlib.sha256(prompt_manager.interview_prompt.encode("utf-8")).hexdigest()[:12],
+        "wall_time_s": elapsed
+    }
+    report = build_report(runs, config)
+    path = write_report(report, args.output)
+
+    baseline = None
+    if args.baseline:
+        with open(args.baseline, 'r', encoding='utf-8') as f:
+            baseline = json.load(f)
+    print_summary(report, baseline)
+    print(f"📄 Report written to {path} ({elapsed:.1f}s for {len(runs)} interviews)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,286 @@
+"""
+Artifact Store
+Size- and age-bounded on-disk storage for generated PDFs (replaces the
+unbounded temp_pdfs/ directory). Quota and TTL are computed from the
+directory itself, so every worker process sharing it enforces the same
+limits over all of its files.
+"""
+
+from collections import OrderedDict
+from typing import Dict, List, Optional
+import hashlib
+import os
+import tempfile
+import threading
+import time
+
+# Defaults (override with environment variables)
+DEFAULT_ROOT = os.getenv("ARTIFACT_DIR", "temp_pdfs")
+DEFAULT_MAX_BYTES = int(os.getenv("ARTIFACT_MAX_BYTES", str(200 * 1024 * 1024)))
+DEFAULT_TTL_SECONDS = int(os.getenv("ARTIFACT_TTL_SECONDS", str(24 * 60 * 60)))
+DEFAULT_SWEEP_INTERVAL = int(os.getenv("ARTIFACT_SWEEP_INTERVAL", "300"))
+
+# Session id used for files found directly under the root directory
+LEGACY_SESSION = "_legacy"
+
+
+def safe_component(name: str) -> str:
+    """
+    A single path component that stays inside its parent directory
+
+    Directory parts are dropped and leading dots stripped (so ".", ".." and
+    hidden temp-file names cannot be produced); a name with nothing left is
+    replaced by a token derived from it.
+    """
+    component = os.path.basename(name.replace("\\", "/")).lstrip(".")
+    if not component:
+        component = "_" + hashlib.sha256(name.encode("utf-8")).hexdigest()[:16]
+    return component
+
+
+class ArtifactRecord:
+    """Index entry for one stored artifact"""
+    __slots__ = ("session_id", "filename", "path", "size", "created_at")
+
+    def __init__(self, session_id: str, filename: str, path: str, size: int, created_at: float):
+        self.session_id = session_id
+        self.filename = filename
+        self.path = path
+        self.size = size
+        self.created_at = created_at
+
+
+class ArtifactStore:
+    """
+    Stores artifacts under `<root>/<session_id>/<filename>`
+
+    - Total bytes are capped; the oldest artifacts are evicted first
+    - Artifacts older than the TTL are removed by a background sweeper
+    - Writes are atomic (temp file + rename), so readers never see partial PDFs
+    - The index is rebuilt from disk on every write and sweep, so files
+      written by other processes count towards the quota and expire too;
+      session lookups read the session directory directly
+    """
+
+    def __init__(
+        self,
+        root: str = DEFAULT_ROOT,
+        max_bytes: int = DEFAULT_MAX_BYTES,
+        ttl_seconds: int = DEFAULT_TTL_SECONDS,
+        sweep_interval: int = DEFAULT_SWEEP_INTERVAL
+    ):
+        self.root = root
+        self.max_bytes = max_bytes
+        self.ttl_seconds = ttl_seconds
+        self.sweep_interval = sweep_interval
+
+        self._lock = threading.RLock()
+        self._by_path = OrderedDict()  # oldest first
+        self._by_session = {}
+        self._total_bytes = 0
+        self._sweeper = None
+        self._stop_event = threading.Event()
+
+        self.writes = 0
+        self.evictions = {"quota": 0, "ttl": 0}
+
+        os.makedirs(self.root, exist_ok=True)
+        self._rebuild_index()
+
+    def _scan_session(self, session_id: str) -> List[ArtifactRecord]:
+        """Artifacts on disk for one session, oldest first (temp files are skipped)"""
+        session_dir = os.path.join(self.root, session_id)
+        found = []
+        try:
+            filenames = os.listdir(session_dir)
+        except (FileNotFoundError, NotADirectoryError):
+            return found
+        for filename in filenames:
+            if filename.startswith('.'):
+                continue
+            path = os.path.join(session_dir, filename)
+            try:
+                stat = os.stat(path)
+            except FileNotFoundError:
+                # Removed by another process meanwhile
+                continue
+            found.append(ArtifactRecord(session_id, filename, path, stat.st_size, stat.st_mtime))
+        return sorted(found, key=lambda r: r.created_at)
+
+    def _rebuild_index(self):
+        """Re-index every artifact on disk, including those written by other processes"""
+        found = []
+        for session_id in os.listdir(self.root):
+            session_dir = os.path.join(self.root, session_id)
+            if not os.path.isdir(session_dir):
+                # Flat files from the old temp_pdfs/ layout are swept like any other
+                if not session_id.startswith('.'):
+                    try:
+                        stat = os.stat(session_dir)
+                    except FileNotFoundError:
+                        continue
+                    found.append(ArtifactRecord(LEGACY_SESSION, session_id, session_dir, stat.st_size, stat.st_mtime))
+                continue
+            found.extend(self._scan_session(session_id))
+
+        self._by_path = OrderedDict()
+        self._by_session = {}
+        self._total_bytes = 0
+        for record in sorted(found, key=lambda r: r.created_at):
+            self._index(record)
+
+        self._enforce_quota()
+
+    def _index(self, record: ArtifactRecord):
+        self._by_path[record.path] = record
+        self._by_session.setdefault(record.session_id, OrderedDict())[record.filename] = record
+        self._total_bytes += record.size
+
+    def _unindex(self, record: ArtifactRecord):
+        if self._by_path.pop(record.path, None) is None:
+            return
+        session_records = self._by_session.get(record.session_id)
+        if session_records is not None:
+            session_records.pop(record.filename, None)
+            if not session_records:
+                del self._by_session[record.session_id]
+        self._total_bytes -= record.size
+
+    def _delete(self, record: ArtifactRecord, reason: Optional[str] = None):
+        self._unindex(record)
+        try:
+            os.remove(record.path)
+        except FileNotFoundError:
+            pass
+        except Exception as e:
+            print(f"⚠️ Could not delete artifact {record.path}: {e}")
+
+        # Drop the session directory once empty
+        session_dir = os.path.dirname(record.path)
+        if os.path.abspath(session_dir) != os.path.abspath(self.root):
+            try:
+                os.rmdir(session_dir)
+            except OSError:
+                pass
+
+        if reason:
+            self.evictions[reason] += 1
+
+    def _enforce_quota(self):
+        while self._total_bytes > self.max_bytes and self._by_path:
+            oldest = next(iter(self._by_path.values()))
+            print(f"🗑️ Artifact store over quota, evicting {oldest.path}")
+            self._delete(oldest, reason="quota")
+
+    def put(self, session_id: str, filename: str, data: bytes) -> ArtifactRecord:
+        """
+        Atomically write an artifact and index it
+
+        Args:
+            session_id: Owning session
+            filename: File name within the session directory
+            data: Artifact bytes
+
+        Returns:
+            The stored ArtifactRecord
+        """
+        session_id = safe_component(session_id)
+        filename = safe_component(filename)
+        session_dir = os.path.join(self.root, session_id)
+        path = os.path.join(session_dir, filename)
+
+        with self._lock:
+            os.makedirs(session_dir, exist_ok=True)
+
+            # Write to a temp file in the same directory, then rename over the target
+            fd, temp_path = tempfile.mkstemp(dir=session_dir, prefix='.tmp-')
+            try:
+                with os.fdopen(fd, 'wb') as f:
+                    f.write(data)
+                os.replace(temp_path, path)
+            except Exception:
+                os.unlink(temp_path)
+                raise
+
+            record = ArtifactRecord(session_id, filename, path, len(data), os.stat(path).st_mtime)
+            self.writes += 1
+            # Counts every process's files, and evicts over quota
+            self._rebuild_index()
+
+            return record
+
+    def get(self, session_id: str) -> Optional[ArtifactRecord]:
+        """Return the most recent artifact for a session, or None"""
+        records = self.list_session(session_id)
+        return records[-1] if records else None
+
+    def list_session(self, session_id: str) -> List[ArtifactRecord]:
+        """Return all artifacts for a session, oldest first"""
+        return self._scan_session(safe_component(session_id))
+
+    def remove(self, record: ArtifactRecord):
+        """Delete an artifact (e.g. after it has been emailed)"""
+        with self._lock:
+            self._delete(record)
+
+    def sweep(self) -> int:
+        """
+        Remove artifacts older than the TTL
+
+        Returns:
+            Number of artifacts removed
+        """
+        cutoff = time.time() - self.ttl_seconds
+        removed = 0
+        with self._lock:
+            self._rebuild_index()
+            # Index is oldest first, so stop at the first fresh artifact
+            while self._by_path:
+                oldest = next(iter(self._by_path.values()))
+                if oldest.created_at > cutoff:
+                    break
+                self._delete(oldest, reason="ttl")
+                removed += 1
+
+        if removed:
+            print(f"🧹 Artifact sweeper removed {removed} expired file(s)")
+        return removed
+
+    def _sweep_loop(self):
+        while not self._stop_event.wait(self.sweep_interval):
+            try:
+                self.sweep()
+            except Exception as e:
+                print(f"⚠️ Artifact sweep failed: {e}")
+
+    def start_sweeper(self):
+        """Start the background TTL sweeper thread"""
+        if self._sweeper and self._sweeper.is_alive():
+            return
+        self._stop_event.clear()
+        self.sweep()
+        self._sweeper = threading.Thread(target=self._sweep_loop, name="artifact-sweeper", daemon=True)
+        self._sweeper.start()
+
+    def stop_sweeper(self):
+        """Stop the background sweeper thread"""
+        self._stop_event.set()
+        if self._sweeper:
+            self._sweeper.join(timeout=5)
+            self._sweeper = None
+
+    def metrics(self) -> Dict:
+        """Occupancy and eviction metrics"""
+        with self._lock:
+            return {
+                "root": self.root,
+                "files": len(self._by_path),
+                "sessions": len(self._by_session),
+                "total_bytes": self._total_bytes,
+                "max_bytes": self.max_bytes,
+                "occupancy": round(self._total_bytes / self.max_bytes, 4) if self.max_bytes else 0.0,
+                "ttl_seconds": self.ttl_seconds,
+                "writes": self.writes,
+                "evictions": dict(self.evictions),
+                "sweeper_running": bool(self._sweeper and self._sweeper.is_alive())
+            }
@@ -0,0 +1,356 @@
+"""
+Bulk Doctor Summary Regeneration
+Regenerates doctor summaries for archived transcripts after a prompt change,
+through Vertex AI batch prediction (half the online price, no per-request
+latency) or a local stand-in that calls the summary client directly.
+Markdown is written as each result arrives and PDFs are rendered in
+parallel worker processes meanwhile:
+
+    python src/reports/bulk_regenerate.py transcripts.jsonl regenerated/ --gcs gs://bucket/regeneration
+    python src/reports/bulk_regenerate.py transcripts.jsonl regenerated/ --backend local --workers 4
+
+Each input line is {"id": "...", "conversation": [...]} ("session_id" and
+"conversation_history" are accepted too). Progress is kept in
+<output>/manifest.jsonl, and re-running skips transcripts already done.
+"""
+
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor, as_completed
+from functools import partial
+from typing import Dict, Iterator, List, Optional, Tuple
+import argparse
+import hashlib
+import json
+import os
+import re
+import sys
+import tempfile
+import threading
+import time
+from datetime import datetime
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', '..'))
+
+# Defaults (override with environment variables)
+DEFAULT_LOCAL_WORKERS = int(os.getenv("BULK_LOCAL_WORKERS", "4"))
+DEFAULT_PDF_WORKERS = int(os.getenv("BULK_PDF_WORKERS", str(os.cpu_count() or 2)))
+DEFAULT_POLL_SECONDS = float(os.getenv("BULK_POLL_SECONDS", "30"))
+
+# Batch prediction is billed at this fraction of the online price
+BATCH_PRICE_FACTOR = 0.5
+
+
+class BatchItem:
+    """One transcript to summarize"""
+    __slots__ = ("id", "system_prompt", "messages")
+
+    def __init__(self, item_id: str, system_prompt: str, messages: List[Dict[str, str]]):
+        self.id = item_id
+        self.system_prompt = system_prompt
+        self.messages = messages
+
+
+def safe_filename(item_id: str) -> str:
+    """
+    File name stem for an id: its readable characters plus a short hash of
+    the raw id, so ids that differ only in replaced characters ("s/0" and
+    "s_0") never share an output file
+    """
+    digest = hashlib.sha256(item_id.encode("utf-8")).hexdigest()[:10]
+    readable = re.sub(r"[^A-Za-z0-9._-]", "_", item_id)[:100] or "transcript"
+    return f"{readable}-{digest}"
+
+
+def load_transcripts(path: str) -> Iterator[Tuple[str, List[Dict[str, str]]]]:
+    """(id, transcript) pairs from a JSONL file"""
+    with open(path, 'r', encoding='utf-8') as f:
+        for line_number, line in enumerate(f, 1):
+            if not line.strip():
+                continue
+            record = json.loads(line)
+            item_id = str(record.get("id") or record.get("session_id") or f"line-{line_number}")
+            conversation = record.get("conversation") or record.get("conversation_history") or []
+            yield item_id, conversation
+
+
+def _render_pdf_file(markdown_text: str, pdf_path: str) -> int:
+    """Process-pool worker: render one PDF and write it atomically; returns its size"""
+    from manual_table_converter import markdown_to_pdf_bytes
+    from reports.pdf_generator import PDF_COMPACT
+    pdf_bytes = markdown_to_pdf_bytes(markdown_text, compact=PDF_COMPACT)
+    # A temp name of its own, so concurrent renders never write the same file
+    descriptor, temp_path = tempfile.mkstemp(dir=os.path.dirname(pdf_path) or ".", suffix=".pdf.tmp")
+    try:
+        with os.fdopen(descriptor, 'wb') as f:
+            f.write(pdf_bytes)
+        os.replace(temp_path, pdf_path)
+    except BaseException:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+        raise
+    return len(pdf_bytes)
+
+
+class LocalBatchBackend:
+    """
+    Stand-in for batch prediction: calls the summary client directly on a
+    thread pool and yields results as they complete (used for tests and
+    small runs)
+    """
+    name = "local"
+
+    def __init__(self, llm_client=None, max_workers: int = DEFAULT_LOCAL_WORKERS):
+        if llm_client is None:
+            from ai.llm_client import get_vertex_ai_client
+            llm_client = get_vertex_ai_client()
+        self.llm_client = llm_client
+        self.max_workers = max_workers
+
+    def run(self, items: List[BatchItem]) -> Iterator[Tuple[str, Optional[str], Optional[str]]]:
+        """Yields (id, markdown, error) in completion order"""
+        with ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="bulk-local") as pool:
+            futures = {
+                pool.submit(self.llm_client.generate_response, messages=item.messages, system_prompt=item.system_prompt): item.id
+                for item in items
+            }
+            for future in as_completed(futures):
+                try:
+                    yield futures[future], future.result(), None
+                except Exception as e:
+                    yield futures[future], None, f"{type(e).__name__}: {e}"
+
+
+class VertexBatchBackend:
+    """Vertex AI batch prediction: one job for all items, input and output on GCS"""
+    name = "vertex"
+
+    def __init__(self, gcs_prefix: str, llm_client=None, poll_seconds: float = DEFAULT_POLL_SECONDS):
+        if not gcs_prefix.startswith("gs://"):
+            raise ValueError("Batch prediction needs a gs:// prefix for its input and output files")
+        if llm_client is None:
+            from ai.llm_client import get_vertex_ai_client
+            llm_client = get_vertex_ai_client()
+        self.llm_client = llm_client
+        self.gcs_prefix = gcs_prefix.rstrip("/")
+        self.poll_seconds = poll_seconds
+
+    @staticmethod
+    def _request_key(request: Dict) -> str:
+        # Output lines echo the request, which is how results are matched back to ids
+        return hashlib.sha256(request["contents"][0]["parts"][0]["text"].encode("utf-8")).hexdigest()
+
+    def _storage(self):
+        from google.cloud import storage
+        return storage.Client(project=self.llm_client.project_id)
+
+    def _blob(self, client, uri: str):
+        bucket, _, name = uri[len("gs://"):].partition("/")
+        return client.bucket(bucket).blob(name)
+
+    def run(self, items: List[BatchItem]) -> Iterator[Tuple[str, Optional[str], Optional[str]]]:
+        from vertexai.batch_prediction import BatchPredictionJob
+        from ai.llm_client import estimate_cost
+        from ai.usage import get_usage_ledger
+
+        run_prefix = f"{self.gcs_prefix}/{datetime.now().strftime('%Y%m%d_%H%M%S')}"
+        ids_by_key = {}
+        lines = []
+        for item in items:
+            request = self.llm_client.batch_request(item.messages, item.system_prompt)
+            ids_by_key.setdefault(self._request_key(request), []).append(item.id)
+            lines.append(json.dumps({"request": request}, ensure_ascii=False))
+
+        storage = self._storage()
+        input_uri = f"{run_prefix}/input.jsonl"
+        self._blob(storage, input_uri).upload_from_string("\n".join(lines) + "\n", content_type="application/jsonl")
+        print(f"☁️ Uploaded {len(lines)} requests to {input_uri}")
+
+        job = BatchPredictionJob.submit(
+            source_model=self.llm_client.model_name,
+            input_dataset=input_uri,
+            output_uri_prefix=f"{run_prefix}/output"
+        )
+        print(f"🚀 Submitted batch prediction job {job.resource_name}")
+
+        while not job.has_ended:
+            time.sleep(self.poll_seconds)
+            job.refresh()
+            stats = getattr(job._gca_resource, "completion_stats", None)
+            done = f", {stats.successful_count} done, {stats.failed_count} failed" if stats else ""
+            print(f"⏳ Batch job {job.state.name}{done}")
+
+        if not job.has_succeeded:
+            raise RuntimeError(f"Batch prediction job failed: {job.error}")
+
+        output_bucket, _, output_path = job.output_location[len("gs://"):].partition("/")
+        for blob in storage.list_blobs(output_bucket, prefix=output_path):
+            if not blob.name.endswith(".jsonl"):
+                continue
+            # Shards are downloaded one at a time so PDFs start while later shards are read
+            for line in blob.download_as_text().splitlines():
+                if not line.strip():
+                    continue
+                record = json.loads(line)
+                ids = ids_by_key.get(self._request_key(record["request"])) or []
+                if not ids:
+                    continue
+                item_id = ids.pop(0)
+                if record.get("status"):
+                    yield item_id, None, record["status"]
+                    continue
+                try:
+                    text = "".join(part.get("text", "") for part in record["response"]["candidates"][0]["content"]["parts"])
+                except (KeyError, IndexError) as e:
+                    yield item_id, None, f"Malformed batch output: {e}"
+                    continue
+                usage = record["response"].get("usageMetadata", {})
+                prompt_tokens = usage.get("promptTokenCount", 0)
+                response_tokens = usage.get("candidatesTokenCount", 0)
+                get_usage_ledger().record(
+                    f"{self.llm_client.model_name}-batch",
+                    {"prompt_tokens": prompt_tokens, "response_tokens": response_tokens, "cached_tokens": 0},
+                    estimate_cost(self.llm_client.model_name, prompt_tokens, response_tokens) * BATCH_PRICE_FACTOR
+                )
+                yield item_id, text.strip(), None
+
+        for item_id in (item_id for ids in ids_by_key.values() for item_id in ids):
+            yield item_id, None, "No result in batch output"
+
+
+class BulkProgress:
+    """Append-only manifest of finished summaries and PDFs, for progress and resume"""
+
+    def __init__(self, output_dir: str, total: int):
+        self.path = os.path.join(output_dir, "manifest.jsonl")
+        self.total = total
+        self.counts = {"summaries": 0, "pdfs": 0, "failed": 0, "skipped": 0}
+        self.started = time.perf_counter()
+        self._lock = threading.Lock()
+
+    def completed_ids(self) -> set:
+        """Ids whose PDF was written by an earlier run"""
+        done = set()
+        if os.path.exists(self.path):
+            with open(self.path, 'r', encoding='utf-8') as f:
+                for line in f:
+                    entry = json.loads(line)
+                    if entry.get("stage") == "pdf":
+                        done.add(entry["id"])
+        return done
+
+    def pdf_finished(self, item_id: str, pdf_path: str, future):
+        """Done-callback for a PDF render"""
+        error = future.exception()
+        if error:
+            self.record(item_id, "failed", error=f"PDF: {error}")
+        else:
+            self.record(item_id, "pdf", pdf=pdf_path, bytes=future.result())
+
+    def record(self, item_id: str, stage: str, **details):
+        with self._lock:
+            counter = {"summary": "summaries", "pdf": "pdfs", "failed": "failed"}[stage]
+            self.counts[counter] += 1
+            with open(self.path, 'a', encoding='utf-8') as f:
+                f.write(json.dumps(dict(details, id=item_id, stage=stage, at=datetime.now().isoformat())) + "\n")
+            if stage == "failed" or self.counts[counter] % 10 == 0 or self.counts["pdfs"] == self.total:
+                elapsed = time.perf_counter() - self.started
+                print(f"📈 {self.counts['summaries']}/{self.total} summaries, {self.counts['pdfs']} PDFs, "
+                      f"{self.counts['failed']} failed ({elapsed:.0f}s)")
+
+
+def regenerate(
+    transcripts_path: str,
+    output_dir: str,
+    backend,
+    pdf_workers: int = DEFAULT_PDF_WORKERS,
+    conversation_manager=None
+) -> Dict:
+    """
+    Regenerate doctor summaries and PDFs for every transcript in a JSONL file
+
+    Args:
+        transcripts_path: JSONL of transcripts
+        output_dir: Receives <id>-<hash>.md, <id>-<hash>.pdf and manifest.jsonl
+        backend: VertexBatchBackend or LocalBatchBackend
+        pdf_workers: PDF rendering processes
+        conversation_manager: Builds the requests (default: a new ConversationManager)
+
+    Returns:
+        Counts of summaries, PDFs, failures and skipped transcripts
+    """
+    if conversation_manager is None:
+        from ai.conversation import ConversationManager
+        conversation_manager = ConversationManager()
+
+    os.makedirs(output_dir, exist_ok=True)
+    transcripts = list(load_transcripts(transcripts_path))
+    progress = BulkProgress(output_dir, len(transcripts))
+    done = progress.completed_ids()
+
+    items = []
+    seen = set()
+    for item_id, conversation in transcripts:
+        if item_id in done:
+            continue
+        if item_id in seen:
+            # Both would be written to the same files
+            print(f"⚠️ Duplicate transcript id {item_id!r} - only the first is regenerated")
+            progress.record(item_id, "failed", error="Duplicate id")
+            continue
+        seen.add(item_id)
+        # Same request as the online (single-pass) doctor summary
+        system_prompt, messages = conversation_manager.doctor_summary_request(conversation)
+        items.append(BatchItem(item_id, system_prompt, messages))
+    progress.counts["skipped"] = len(transcripts) - len(items) - progress.counts["failed"]
+    progress.total = len(items)
+    print(f"📚 {len(items)} transcripts to regenerate via {backend.name} "
+          f"({progress.counts['skipped']} already done)")
+
+    if items:
+        with ProcessPoolExecutor(max_workers=pdf_workers) as pdf_pool:
+            pending = []
+            for item_id, markdown_text, error in backend.run(items):
+                if error:
+                    print(f"❌ {item_id}: {error}")
+                    progress.record(item_id, "failed", error=error)
+                    continue
+
+                base = os.path.join(output_dir, safe_filename(item_id))
+                with open(f"{base}.md", 'w', encoding='utf-8') as f:
+                    f.write(markdown_text)
+                progress.record(item_id, "summary", markdown=f"{base}.md")
+
+                future = pdf_pool.submit(_render_pdf_file, markdown_text, f"{base}.pdf")
+                future.add_done_callback(partial(progress.pdf_finished, item_id, f"{base}.pdf"))
+                pending.append(future)
+
+            for future in pending:
+                future.exception()
+
+    elapsed = time.perf_counter() - progress.started
+    print(f"✅ Regeneration finished in {elapsed:.1f}s: {progress.counts}")
+    return dict(progress.counts, elapsed_s=round(elapsed, 2))
+
+
+def main(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(description="Regenerate doctor summaries and PDFs for archived transcripts")
+    parser.add_argument("transcripts", help="JSONL file of transcripts")
+    parser.add_argument("output_dir")
+    parser.add_argument("--backend", choices=["vertex", "local"], default="vertex")
+    parser.add_argument("--gcs", help="gs:// prefix for batch input/output (vertex backend)")
+    parser.add_argument("--workers", type=int, default=DEFAULT_LOCAL_WORKERS, help="Concurrent calls (local backend)")
+    parser.add_argument("--pdf-workers", type=int, default=DEFAULT_PDF_WORKERS)
+    parser.add_argument("--poll", type=float, default=DEFAULT_POLL_SECONDS, help="Seconds between job status checks")
+    args = parser.parse_args(argv)
+
+    if args.backend == "vertex":
+        if not args.gcs:
+            parser.error("--gcs is required for the vertex backend")
+        backend = VertexBatchBackend(args.gcs, poll_seconds=args.poll)
+    else:
+        backend = LocalBatchBackend(max_workers=args.workers)
+
+    regenerate(args.transcripts, args.output_dir, backend, args.pdf_workers)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,121 @@
+"""
+Email Delivery
+Builds the doctor email with the EmailMessage API and streams it to the
+SMTP socket. The PDF is taken as bytes or a memoryview and base64-encoded
+one chunk at a time while sending, so a send never holds more than the
+PDF itself plus one encoded chunk (the old path read the file back from
+disk and kept the encoded attachment, the flattened message and its
+SMTP-quoted copy in memory at once).
+"""
+
+from email.message import EmailMessage
+from email.policy import SMTP
+from typing import Iterator, Union
+import base64
+import re
+import smtplib
+
+# Raw bytes encoded per chunk; a multiple of 57 so every chunk is whole 76-column lines
+ATTACHMENT_CHUNK_BYTES = 57 * 1024
+
+# Chunks are encoded in pieces of this many raw bytes, so encoding never
+# holds more than the chunk being built plus one small piece
+_ENCODE_PIECE_BYTES = 57 * 64
+
+# Stands in for the attachment body while the rest of the message is serialized
+_ATTACHMENT_MARKER = "@@PDF-ATTACHMENT-BODY@@"
+
+_LEADING_PERIOD = re.compile(rb'(?m)^\.')
+
+PDFData = Union[bytes, bytearray, memoryview]
+
+
+def build_message(sender: str, recipient: str, subject: str, body: str, filename: str) -> EmailMessage:
+    """
+    The email with a text body and an application/pdf attachment part
+
+    The attachment part carries its headers only; its body is written by
+    message_chunks().
+    """
+    msg = EmailMessage()
+    msg['From'] = sender
+    msg['To'] = recipient
+    msg['Subject'] = subject
+    msg.set_content(body)
+    msg.add_attachment(b"", maintype='application', subtype='pdf', filename=filename)
+    next(msg.iter_attachments()).set_payload(_ATTACHMENT_MARKER)
+    return msg
+
+
+def message_chunks(msg: EmailMessage, pdf: PDFData) -> Iterator[bytes]:
+    """
+    The SMTP DATA payload of a build_message() email, CRLF line endings and
+    dot-stuffed, with the PDF base64-encoded chunk by chunk
+
+    Base64 lines never start with a period, so only the small envelope
+    around the attachment needs dot-stuffing.
+    """
+    head, tail = msg.as_bytes(policy=SMTP).split(_ATTACHMENT_MARKER.encode('ascii'), 1)
+    yield _LEADING_PERIOD.sub(b'..', head)
+
+    view = memoryview(pdf).cast('B')
+    for offset in range(0, len(view), ATTACHMENT_CHUNK_BYTES):
+        chunk = bytearray()
+        for start in range(offset, min(offset + ATTACHMENT_CHUNK_BYTES, len(view)), _ENCODE_PIECE_BYTES):
+            chunk += base64.encodebytes(view[start:min(start + _ENCODE_PIECE_BYTES, offset + ATTACHMENT_CHUNK_BYTES)]).replace(b'\n', b'\r\n')
+        yield chunk
+
+    # Encoded chunks already end their last line
+    if len(view) and tail.startswith(b'\r\n'):
+        tail = tail[2:]
+    if not tail.endswith(b'\r\n'):
+        tail += b'\r\n'
+    yield _LEADING_PERIOD.sub(b'..', tail)
+
+
+def send_streaming(server: smtplib.SMTP, sender: str, recipient: str, chunks: Iterator[bytes]):
+    """
+    Send one message over an open (and logged-in) SMTP connection,
+    writing the DATA payload chunk by chunk instead of as a single string
+
+    Raises:
+        smtplib.SMTPException: The server refused the sender, recipient or message
+    """
+    server.ehlo_or_helo_if_needed()
+    code, response = server.mail(sender)
+    if code != 250:
+        server.rset()
+        raise smtplib.SMTPSenderRefused(code, response, sender)
+    code, response = server.rcpt(recipient)
+    if code not in (250, 251):
+        server.rset()
+        raise smtplib.SMTPRecipientsRefused({recipient: (code, response)})
+
+    server.putcmd("data")
+    code, response = server.getreply()
+    if code != 354:
+        server.rset()
+        raise smtplib.SMTPDataError(code, response)
+    for chunk in chunks:
+        server.send(chunk)
+    server.send(b".\r\n")
+    code, response = server.getreply()
+    if code != 250:
+        server.rset()
+        raise smtplib.SMTPDataError(code, response)
+
+
+def send_pdf_email(host: str, port: int, username: str, password: str, recipient: str,
+                   subject: str, body: str, pdf: PDFData, filename: str):
+    """
+    Email a PDF over STARTTLS
+
+    Args:
+        pdf: PDF bytes or a memoryview of them (not copied)
+        filename: Attachment file name shown to the recipient
+    """
+    msg = build_message(username, recipient, subject, body, filename)
+    with smtplib.SMTP(host, port) as server:
+        server.starttls()
+        server.login(username, password)
+        send_streaming(server, username, recipient, message_chunks(msg, pdf))
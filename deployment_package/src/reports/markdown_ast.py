@@ -0,0 +1,406 @@
+"""
+Summary Markdown Document Tree
+Parses LLM summary markdown once into typed blocks shared by the PDF
+renderer, the review page HTML preview and structured job extraction
+"""
+
+from dataclasses import dataclass
+from functools import lru_cache
+from html import escape
+from typing import List, Dict, Optional, Tuple, Union
+import re
+
+# Markers the summary prompts use for bullets (`•`/`○` come from summary_prompt.md)
+BULLET_MARKERS = ('- ', '* ', '+ ', '• ', '○ ', '◦ ', '▪ ')
+HIGH_RISK_MARKER = '(!)'
+
+_SEPARATOR_CELL = re.compile(r'^:?-{3,}:?$')
+_RULE_LINE = re.compile(r'^(?:-{3,}|\*{3,}|_{3,})$')
+_HEADING_LINE = re.compile(r'^(#{1,6})\s+(.*)$')
+_JOB_HEADING = re.compile(r'^(?P<title>.*?)\s*\((?P<dates>[^()]*\d[^()]*)\)\s*$')
+
+
+@dataclass(frozen=True)
+class Heading:
+    """A `#`..`######` heading"""
+    level: int
+    text: str
+
+
+@dataclass(frozen=True)
+class Paragraph:
+    """A single line of body text"""
+    text: str
+
+    @property
+    def is_bold_line(self) -> bool:
+        """Whole line wrapped in `**...**` (used for job titles)"""
+        return self.text.startswith('**') and self.text.endswith('**') and len(self.text) > 4
+
+
+@dataclass(frozen=True)
+class Bullet:
+    """A bullet item; `high_risk` is set for `(!)` prefixed exposures"""
+    text: str
+    depth: int = 0
+    high_risk: bool = False
+
+
+@dataclass(frozen=True)
+class Table:
+    """A pipe table; every row is padded to the header width"""
+    header: Tuple[str, ...]
+    rows: Tuple[Tuple[str, ...], ...]
+
+    @property
+    def column_count(self) -> int:
+        return len(self.header)
+
+
+@dataclass(frozen=True)
+class Rule:
+    """A horizontal rule (`---`)"""
+
+
+@dataclass(frozen=True)
+class Blank:
+    """One or more blank lines between blocks"""
+
+
+Block = Union[Heading, Paragraph, Bullet, Table, Rule, Blank]
+
+
+@dataclass(frozen=True)
+class Document:
+    """Parsed summary: an ordered tuple of blocks"""
+    blocks: Tuple[Block, ...]
+
+    def sections(self, level: int = 2) -> List[Tuple[Optional[Heading], List[Block]]]:
+        """
+        Group blocks under headings of the given level
+
+        Returns:
+            List of (heading, blocks) pairs; blocks before the first heading
+            are grouped under None
+        """
+        sections = []
+        current_heading = None
+        current_blocks = []
+
+        for block in self.blocks:
+            if isinstance(block, Heading) and block.level <= level:
+                if current_heading is not None or current_blocks:
+                    sections.append((current_heading, current_blocks))
+                current_heading = block if block.level == level else None
+                current_blocks = [] if block.level == level else [block]
+            else:
+                current_blocks.append(block)
+
+        if current_heading is not None or current_blocks:
+            sections.append((current_heading, current_blocks))
+
+        return sections
+
+    def tables(self) -> List[Table]:
+        return [block for block in self.blocks if isinstance(block, Table)]
+
+
+def _split_row(line: str) -> List[str]:
+    """Split a pipe table row into stripped cells"""
+    cells = [cell.strip() for cell in line.split('|')]
+    # Remove empty cells at start/end
+    if cells and not cells[0]:
+        cells = cells[1:]
+    if cells and not cells[-1]:
+        cells = cells[:-1]
+    return cells
+
+
+def _is_separator_row(cells: List[str]) -> bool:
+    return bool(cells) and all(_SEPARATOR_CELL.match(cell.replace(' ', '')) for cell in cells)
+
+
+def _build_table(rows: List[List[str]]) -> Optional[Table]:
+    """Normalise parsed rows into a Table (header + padded body rows)"""
+    rows = [row for row in rows if not _is_separator_row(row)]
+    if len(rows) < 2:
+        return None
+
+    width = len(rows[0])
+    body = []
+    for row in rows[1:]:
+        if len(row) < width:
+            row = row + [''] * (width - len(row))
+        elif len(row) > width:
+            # Fold overflow cells into the last column rather than dropping them
+            row = row[:width - 1] + [' | '.join(row[width - 1:])]
+        body.append(tuple(row))
+
+    return Table(header=tuple(rows[0]), rows=tuple(body))
+
+
+def _parse_bullet(raw_line: str, line: str) -> Optional[Bullet]:
+    for marker in BULLET_MARKERS:
+        if line.startswith(marker):
+            text = line[len(marker):].strip()
+            indent = len(raw_line) - len(raw_line.lstrip(' \t'))
+            depth = indent // 2
+            if marker.startswith(('○', '◦', '▪')):
+                depth = max(depth, 1)
+
+            # `(!)` may sit before or inside the bold label
+            bare = text.replace('**', '').lstrip()
+            high_risk = bare.startswith(HIGH_RISK_MARKER)
+            if high_risk:
+                text = text.replace(HIGH_RISK_MARKER, '', 1).strip()
+                if text.startswith('** '):
+                    text = '**' + text[3:]
+            return Bullet(text=text, depth=depth, high_risk=high_risk)
+    return None
+
+
+@lru_cache(maxsize=128)
+def parse_markdown(markdown_text: str) -> Document:
+    """
+    Parse summary markdown into a Document in a single pass
+
+    Results are cached by text, so the PDF renderer, the review preview and
+    job extraction can all call this for the same summary at no extra cost.
+
+    Args:
+        markdown_text: Raw markdown text from AI summary
+
+    Returns:
+        Immutable Document tree
+    """
+    blocks = []
+    table_rows = []
+
+    def flush_table():
+        if table_rows:
+            table = _build_table(table_rows)
+            if table:
+                blocks.append(table)
+            else:
+                # A lone pipe row is just text
+                blocks.extend(Paragraph(' | '.join(row)) for row in table_rows
+                              if not _is_separator_row(row))
+            table_rows.clear()
+
+    for raw_line in markdown_text.strip().split('\n'):
+        line = raw_line.strip()
+
+        # Tables: consecutive lines containing pipes
+        if '|' in line and not _HEADING_LINE.match(line):
+            cells = _split_row(line)
+            if _is_separator_row(cells) and len(table_rows) > 1:
+                # A separator under a body row means that row heads a new table
+                header = table_rows.pop()
+                flush_table()
+                table_rows.append(header)
+            table_rows.append(cells)
+            continue
+
+        flush_table()
+
+        if not line:
+            if blocks and not isinstance(blocks[-1], Blank):
+                blocks.append(Blank())
+            continue
+
+        heading = _HEADING_LINE.match(line)
+        if heading:
+            blocks.append(Heading(level=len(heading.group(1)), text=heading.group(2).strip()))
+        elif _RULE_LINE.match(line):
+            blocks.append(Rule())
+        else:
+            bullet = _parse_bullet(raw_line, line)
+            blocks.append(bullet if bullet else Paragraph(line))
+
+    flush_table()
+
+    while blocks and isinstance(blocks[-1], Blank):
+        blocks.pop()
+
+    return Document(blocks=tuple(blocks))
+
+
+class SectionStreamer:
+    """
+    Splits streamed markdown into complete sections
+
+    A section ends where the next `#`/`##` heading begins, so each emitted
+    section can be parsed and rendered on its own while generation continues.
+    """
+
+    def __init__(self, max_level: int = 2):
+        self.max_level = max_level
+        self._buffer = ""
+
+    def _is_boundary(self, line: str) -> bool:
+        heading = _HEADING_LINE.match(line.strip())
+        return bool(heading) and len(heading.group(1)) <= self.max_level
+
+    def feed(self, chunk: str) -> List[str]:
+        """Add a chunk; return any sections completed by it"""
+        self._buffer += chunk
+        sections = []
+
+        # Only look at complete lines; the last partial line stays buffered
+        lines = self._buffer.split('\n')
+        start = 0
+        for index in range(1, len(lines) - 1):
+            if self._is_boundary(lines[index]) and '\n'.join(lines[start:index]).strip():
+                sections.append('\n'.join(lines[start:index]).strip('\n'))
+                start = index
+
+        self._buffer = '\n'.join(lines[start:])
+        return sections
+
+    def flush(self) -> Optional[str]:
+        """Return the final (possibly partial) section"""
+        remainder = self._buffer.strip('\n')
+        self._buffer = ""
+        return remainder if remainder.strip() else None
+
+
+def _inline_to_html(text: str) -> str:
+    """Convert inline markdown (bold, italic, code) to escaped HTML"""
+    text = escape(text, quote=False)
+    text = re.sub(r'\*\*(.*?)\*\*', r'<strong>\1</strong>', text)
+    text = re.sub(r'(?<![\w*])\*(?!\s)(.+?)(?<!\s)\*(?![\w*])', r'<em>\1</em>', text)
+    text = re.sub(r'`(.*?)`', r'<code>\1</code>', text)
+    return text
+
+
+def render_html(document: Document) -> str:
+    """
+    Render a Document as an HTML fragment for the review page
+
+    Args:
+        document: Parsed summary document
+
+    Returns:
+        HTML string (inline content escaped)
+    """
+    html = []
+    open_lists = 0
+
+    def close_lists(depth: int):
+        nonlocal open_lists
+        while open_lists > depth:
+            html.append('</ul>')
+            open_lists -= 1
+
+    for block in document.blocks:
+        if isinstance(block, Bullet):
+            target = block.depth + 1
+            if target > open_lists:
+                while open_lists < target:
+                    html.append('<ul>')
+                    open_lists += 1
+            else:
+                close_lists(target)
+
+            css_class = ' class="high-risk"' if block.high_risk else ''
+            prefix = '⚠️ ' if block.high_risk else ''
+            html.append(f'<li{css_class}>{prefix}{_inline_to_html(block.text)}</li>')
+            continue
+
+        close_lists(0)
+
+        if isinstance(block, Heading):
+            level = min(block.level, 6)
+            html.append(f'<h{level}>{_inline_to_html(block.text)}</h{level}>')
+        elif isinstance(block, Table):
+            html.append('<table><thead><tr>')
+            html.extend(f'<th>{_inline_to_html(cell)}</th>' for cell in block.header)
+            html.append('</tr></thead><tbody>')
+            for row in block.rows:
+                html.append('<tr>')
+                html.extend(f'<td>{_inline_to_html(cell)}</td>' for cell in row)
+                html.append('</tr>')
+            html.append('</tbody></table>')
+        elif isinstance(block, Rule):
+            html.append('<hr>')
+        elif isinstance(block, Paragraph):
+            html.append(f'<p>{_inline_to_html(block.text)}</p>')
+
+    close_lists(0)
+    return '\n'.join(html)
+
+
+def _strip_label(text: str) -> Tuple[str, str]:
+    """Split `**Label:** value` into (label, value)"""
+    plain = text.replace('**', '').strip()
+    if ':' in plain:
+        label, value = plain.split(':', 1)
+        return label.strip().lower(), value.strip()
+    return plain.lower(), ''
+
+
+def extract_jobs(document: Document) -> List[Dict]:
+    """
+    Extract structured jobs from a patient summary document
+
+    Each `## Job Title (Year Range)` section becomes a job; its labelled
+    bullets (Company & Industry, Key Tasks, Potential Exposures) fill the
+    remaining fields, and `(!)` exposures are listed in `risk_flags`.
+
+    Args:
+        document: Parsed patient summary
+
+    Returns:
+        List of job dictionaries
+    """
+    jobs = []
+
+    for heading, blocks in document.sections(level=2):
+        if heading is None:
+            continue
+
+        title_text = heading.text.replace('**', '').strip()
+        if 'hobbies' in title_text.lower() or 'military' in title_text.lower():
+            continue
+
+        match = _JOB_HEADING.match(title_text)
+        job = {
+            'title': match.group('title').strip() if match else title_text,
+            'dates': match.group('dates').strip() if match else '',
+            'industry': '',
+            'tasks': [],
+            'exposures': [],
+            'risk_flags': [],
+        }
+
+        current_field = None
+        for block in blocks:
+            if not isinstance(block, Bullet):
+                continue
+
+            label, value = _strip_label(block.text)
+            if block.depth == 0 or current_field is None:
+                if label.startswith('company') or 'industry' in label:
+                    current_field = 'industry'
+                    job['industry'] = value
+                elif 'task' in label:
+                    current_field = 'tasks'
+                elif 'exposure' in label:
+                    current_field = 'exposures'
+                else:
+                    current_field = None
+                continue
+
+            item = block.text.replace('**', '').strip()
+            if current_field == 'industry' and not job['industry']:
+                job['industry'] = item
+            elif current_field == 'tasks':
+                job['tasks'].append(item)
+            elif current_field == 'exposures':
+                job['exposures'].append(item)
+                if block.high_risk:
+                    job['risk_flags'].append(item)
+
+        jobs.append(job)
+
+    return jobs
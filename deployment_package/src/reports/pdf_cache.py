@@ -0,0 +1,130 @@
+"""
+PDF Artifact Cache
+Content-addressed, size-bounded in-memory cache of rendered PDFs, backed
+by the shared cache tier (when configured) so every worker process can
+serve a PDF rendered by another
+"""
+
+from collections import OrderedDict
+from typing import Callable, Dict, Optional, Tuple
+import hashlib
+import os
+import threading
+
+# Default total size of cached PDFs (bytes)
+DEFAULT_MAX_BYTES = int(os.getenv("PDF_CACHE_MAX_BYTES", str(32 * 1024 * 1024)))
+
+# Bump whenever the PDF layout changes, so PDFs rendered by older code
+# (in memory or in the shared tier) are no longer served
+RENDERER_VERSION = "2"
+
+
+def content_key(markdown_text: str, compact: bool = False) -> str:
+    """
+    Hash of the final markdown and how it is rendered; identical summaries
+    rendered the same way share one PDF
+
+    Args:
+        markdown_text: Final markdown (including any appended notes)
+        compact: Whether the PDF is rendered in compact mode
+    """
+    digest = hashlib.sha256(f"pdf-v{RENDERER_VERSION}:{'compact' if compact else 'default'}\n".encode('utf-8'))
+    digest.update(markdown_text.encode('utf-8'))
+    return digest.hexdigest()
+
+
+class PDFCache:
+    """
+    LRU cache of PDF bytes keyed by the hash of their source markdown
+
+    Args:
+        shared: Optional SharedCache consulted on local misses and written
+            through on every put
+    """
+
+    def __init__(self, max_bytes: int = DEFAULT_MAX_BYTES, shared=None):
+        self.max_bytes = max_bytes
+        self.shared = shared
+        self._entries = OrderedDict()
+        self._total_bytes = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.shared_hits = 0
+
+    def get(self, key: str) -> Optional[bytes]:
+        """Return cached PDF bytes for a key, or None"""
+        with self._lock:
+            pdf_bytes = self._entries.get(key)
+            if pdf_bytes is not None:
+                self._entries.move_to_end(key)
+                return pdf_bytes
+
+        if self.shared is not None:
+            pdf_bytes = self.shared.get(f"pdf:{key}")
+            if pdf_bytes is not None:
+                self._put_local(key, pdf_bytes)
+                with self._lock:
+                    self.shared_hits += 1
+        return pdf_bytes
+
+    def put(self, key: str, pdf_bytes: bytes):
+        """Store PDF bytes locally and in the shared tier"""
+        self._put_local(key, pdf_bytes)
+        if self.shared is not None:
+            self.shared.put(f"pdf:{key}", pdf_bytes)
+
+    def _put_local(self, key: str, pdf_bytes: bytes):
+        """Store PDF bytes in memory, evicting least recently used entries over budget"""
+        if len(pdf_bytes) > self.max_bytes:
+            return
+
+        with self._lock:
+            if key in self._entries:
+                self._total_bytes -= len(self._entries.pop(key))
+            self._entries[key] = pdf_bytes
+            self._total_bytes += len(pdf_bytes)
+
+            while self._total_bytes > self.max_bytes:
+                _, evicted = self._entries.popitem(last=False)
+                self._total_bytes -= len(evicted)
+                self.evictions += 1
+
+    def get_or_render(self, markdown_text: str, render: Callable[[str], bytes],
+                      compact: bool = False) -> Tuple[str, bytes]:
+        """
+        Return (key, PDF bytes) for markdown, rendering only on a cache miss
+
+        Args:
+            markdown_text: Final markdown (including any appended notes)
+            render: Function converting markdown to PDF bytes
+            compact: Whether render produces compact PDFs (part of the key)
+
+        Returns:
+            Tuple of content key and PDF bytes
+        """
+        key = content_key(markdown_text, compact)
+        pdf_bytes = self.get(key)
+        if pdf_bytes is not None:
+            self.hits += 1
+            return key, pdf_bytes
+
+        self.misses += 1
+        pdf_bytes = render(markdown_text)
+        self.put(key, pdf_bytes)
+        return key, pdf_bytes
+
+    def stats(self) -> Dict:
+        """Cache occupancy and hit statistics"""
+        with self._lock:
+            return {
+                "entries": len(self._entries),
+                "total_bytes": self._total_bytes,
+                "max_bytes": self.max_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "shared_hits": self.shared_hits,
+                "shared": self.shared.stats() if self.shared is not None else None
+            }
@@ -11,16 +11,26 @@ from reportlab.lib.colors import red, black, orange, blue, green, HexColor
 from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer, PageBreak, Table, TableStyle
 from reportlab.lib.enums import TA_LEFT, TA_CENTER, TA_JUSTIFY
 from reportlab.lib import colors
+import os
 import re
 from io import BytesIO
 from datetime import datetime
 
+from .markdown_ast import parse_markdown, Heading, Bullet, Rule, Blank, Table as MarkdownTable
+from .pdf_cache import PDFCache
+from sessions.shared_cache import get_shared_cache
+
+# Opt in to compact rendering of served reports (see manual_table_converter.render_pdf)
+PDF_COMPACT = os.getenv("PDF_COMPACT", "false").lower() in ("1", "true", "yes")
+
 class PDFGenerator:
     """Generates PDF reports from markdown summaries"""
     
-    def __init__(self):
+    def __init__(self, cache: PDFCache = None, compact: bool = PDF_COMPACT):
         self.styles = getSampleStyleSheet()
         self._setup_custom_styles()
+        self.cache = cache or PDFCache(shared=get_shared_cache())
+        self.compact = compact
     
     def _setup_custom_styles(self):
         """Set up custom styles for the PDF"""
@@ -101,70 +111,58 @@ class PDFGenerator:
             List of ReportLab flowable elements
         """
         elements = []
-        lines = markdown_text.strip().split('\n')
         
-        i = 0
-        while i < len(lines):
-            line = lines[i].strip()
-            
-            if not line:
+        for block in parse_markdown(markdown_text).blocks:
+            if isinstance(block, Blank):
                 elements.append(Spacer(1, 6))
-                i += 1
-                continue
             
             # Handle main titles
-            if line.startswith('# '):
-                title_text = self._clean_markdown(line[2:])
+            elif isinstance(block, Heading) and block.level == 1:
+                title_text = self._clean_markdown(block.text)
                 elements.append(Paragraph(title_text, self.styles['CustomTitle']))
                 elements.append(Spacer(1, 12))
                 
             # Handle section headings
-            elif line.startswith('## '):
-                heading_text = self._clean_markdown(line[3:])
+            elif isinstance(block, Heading) and block.level == 2:
+                heading_text = self._clean_markdown(block.text)
                 elements.append(Paragraph(heading_text, self.styles['SectionHeading']))
                 
             # Handle subsections
-            elif line.startswith('### '):
-                heading_text = self._clean_markdown(line[4:])
+            elif isinstance(block, Heading):
+                heading_text = self._clean_markdown(block.text)
                 elements.append(Paragraph(heading_text, self.styles['SubHeading']))
                 
             # Handle tables
-            elif '|' in line and not line.startswith('---'):
-                table_data, i = self._parse_table(lines, i)
-                if table_data:
-                    table = self._create_table(table_data)
-                    elements.append(table)
-                    elements.append(Spacer(1, 12))
-                continue
+            elif isinstance(block, MarkdownTable):
+                table = self._create_table([list(block.header)] + [list(row) for row in block.rows])
+                elements.append(table)
+                elements.append(Spacer(1, 12))
                 
             # Handle horizontal rules
-            elif line.startswith('---'):
+            elif isinstance(block, Rule):
                 elements.append(Spacer(1, 12))
                 
             # Handle bullet points
-            elif line.startswith('- '):
-                bullet_text = self._clean_markdown(line[2:])
-                if bullet_text.startswith('(!)'):
+            elif isinstance(block, Bullet):
+                bullet_text = self._clean_markdown(block.text)
+                if block.high_risk:
                     # High-risk exposure
-                    risk_text = bullet_text[3:].strip()
-                    formatted_text = f"⚠️ {risk_text}"
+                    formatted_text = f"⚠️ {bullet_text}"
                     elements.append(Paragraph(formatted_text, self.styles['HighRisk']))
                 else:
                     formatted_text = f"• {bullet_text}"
                     elements.append(Paragraph(formatted_text, self.styles['BulletPoint']))
                     
             # Handle bold text
-            elif line.startswith('**') and line.endswith('**'):
-                bold_text = self._clean_markdown(line)
+            elif block.is_bold_line:
+                bold_text = self._clean_markdown(block.text)
                 elements.append(Paragraph(bold_text, self.styles['JobTitle']))
                 
             # Handle regular paragraphs
             else:
-                cleaned_text = self._clean_markdown(line)
+                cleaned_text = self._clean_markdown(block.text)
                 if cleaned_text:
                     elements.append(Paragraph(cleaned_text, self.styles['Normal']))
-            
-            i += 1
         
         return elements
     
@@ -178,38 +176,6 @@ class PDFGenerator:
         text = re.sub(r'`(.*?)`', r'<font name="Courier">\1</font>', text)
         return text
     
-    def _parse_table(self, lines: list, start_index: int) -> tuple:
-        """Parse markdown table into data structure"""
-        table_data = []
-        i = start_index
-        
-        # Find the end of the table
-        while i < len(lines):
-            line = lines[i].strip()
-            if not line or '|' not in line:
-                break
-            if line.startswith('---'):
-                i += 1
-                continue
-            table_data.append(line)
-            i += 1
-        
-        if not table_data:
-            return None, i
-        
-        # Parse table rows
-        parsed_data = []
-        for row in table_data:
-            cells = [cell.strip() for cell in row.split('|')]
-            # Remove empty cells at start/end
-            if cells and not cells[0]:
-                cells = cells[1:]
-            if cells and not cells[-1]:
-                cells = cells[:-1]
-            parsed_data.append(cells)
-        
-        return parsed_data, i - 1
-    
     def _create_table(self, table_data: list) -> Table:
         """Create a ReportLab Table from parsed data"""
         if not table_data:
@@ -257,40 +223,40 @@ class PDFGenerator:
         Returns:
             PDF file as bytes
         """
-        try:
-            # Use the final converter that shows table data in structured format
-            from manual_table_converter import convert_markdown_to_pdf
-            
-            # Create temporary files for both markdown and PDF
-            import tempfile
-            import os
-            
-            # Create temporary markdown file
-            with tempfile.NamedTemporaryFile(mode='w', suffix='.md', delete=False, encoding='utf-8') as md_file:
-                md_file.write(markdown_summary)
-                temp_md_filename = md_file.name
-            
-            # Create temporary PDF file
-            with tempfile.NamedTemporaryFile(suffix='.pdf', delete=False) as pdf_file:
-                temp_pdf_filename = pdf_file.name
-            
-            # Convert markdown to PDF (now with correct parameters)
-            convert_markdown_to_pdf(temp_md_filename, temp_pdf_filename)
-            
-            # Read the PDF bytes
-            with open(temp_pdf_filename, 'rb') as f:
-                pdf_bytes = f.read()
-            
-            # Clean up temp files
-            os.unlink(temp_md_filename)
-            os.unlink(temp_pdf_filename)
+        return self.generate_pdf_with_key(markdown_summary)[1]
+    
+    def generate_pdf_with_key(self, markdown_summary: str) -> tuple:
+        """
+        Generate (or fetch from cache) a PDF and its content key
+        
+        Identical markdown always yields the same PDF, so it is rendered
+        once and served from the content-addressed cache afterwards.
+        
+        Args:
+            markdown_summary: Final markdown, including any appended notes
             
-            return pdf_bytes
+        Returns:
+            Tuple of (content key, PDF bytes); the key doubles as the ETag
+        """
+        try:
+            return self.cache.get_or_render(markdown_summary, self._render_pdf, self.compact)
             
         except Exception as e:
             print(f"❌ PDF generation error: {e}")
             raise
     
+    def get_cached_pdf(self, key: str):
+        """Return cached PDF bytes for a content key, or None"""
+        return self.cache.get(key)
+    
+    def _render_pdf(self, markdown_summary: str) -> bytes:
+        """Render markdown to PDF bytes (uncached)"""
+        # Use the final converter that shows table data in structured format
+        from manual_table_converter import markdown_to_pdf_bytes
+        
+        # Render in memory from the shared (cached) document tree
+        return markdown_to_pdf_bytes(markdown_summary, compact=self.compact)
+    
     def save_pdf_to_file(self, markdown_summary: str, filename: str) -> str:
         """
         Save PDF to a file (for testing purposes)
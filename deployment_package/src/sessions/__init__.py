@@ -0,0 +1 @@
+# Session Storage
@@ -0,0 +1,139 @@
+"""
+Local Redis Stand-in
+In-process substitute for a redis-py client, covering the commands the
+Redis session store and shared cache use (rpush, lrange, llen, delete,
+expire, hset, hsetnx, hgetall, get, set and pipeline). Values come back as
+bytes and keys expire, as with a real server, so both backends can be
+exercised without one:
+
+    store = RedisSessionStore(LocalRedis())
+"""
+
+from typing import Any, Dict, List, Optional
+import threading
+import time
+
+
+def _encode(value: Any) -> bytes:
+    """Value as redis-py sends it: bytes unchanged, everything else as UTF-8 text"""
+    if isinstance(value, bytes):
+        return value
+    return str(value).encode("utf-8")
+
+
+class LocalRedis:
+    """
+    Thread-safe in-memory key space with per-key expiry
+
+    Only the commands listed above are implemented; using one on a key of
+    another type raises TypeError, as a WRONGTYPE reply would.
+    """
+
+    def __init__(self):
+        self._data = {}     # key -> bytes, list of bytes or dict of bytes
+        self._expires = {}  # key -> monotonic deadline
+        self._lock = threading.RLock()
+
+    def _live(self, key: str, kind: Optional[type] = None):
+        """The key's value, or None once missing or expired"""
+        deadline = self._expires.get(key)
+        if deadline is not None and deadline <= time.monotonic():
+            self._data.pop(key, None)
+            self._expires.pop(key, None)
+        value = self._data.get(key)
+        if value is not None and kind is not None and not isinstance(value, kind):
+            raise TypeError(f"WRONGTYPE Operation against a key holding the wrong kind of value: {key}")
+        return value
+
+    def get(self, key: str) -> Optional[bytes]:
+        with self._lock:
+            return self._live(key, bytes)
+
+    def set(self, key: str, value: Any, ex: Optional[int] = None) -> bool:
+        with self._lock:
+            self._data[key] = _encode(value)
+            self._expires.pop(key, None)
+            if ex is not None:
+                self._expires[key] = time.monotonic() + ex
+            return True
+
+    def rpush(self, key: str, *values: Any) -> int:
+        with self._lock:
+            items = self._live(key, list)
+            if items is None:
+                items = self._data[key] = []
+            items.extend(_encode(value) for value in values)
+            return len(items)
+
+    def lrange(self, key: str, start: int, end: int) -> List[bytes]:
+        with self._lock:
+            items = self._live(key, list) or []
+            # Redis ranges are inclusive and accept negative indexes
+            end = len(items) + end if end < 0 else end
+            return list(items[start:end + 1])
+
+    def llen(self, key: str) -> int:
+        with self._lock:
+            return len(self._live(key, list) or [])
+
+    def hset(self, key: str, field: str, value: Any) -> int:
+        with self._lock:
+            fields = self._live(key, dict)
+            if fields is None:
+                fields = self._data[key] = {}
+            added = _encode(field) not in fields
+            fields[_encode(field)] = _encode(value)
+            return int(added)
+
+    def hsetnx(self, key: str, field: str, value: Any) -> int:
+        with self._lock:
+            fields = self._live(key, dict)
+            if fields is not None and _encode(field) in fields:
+                return 0
+            return self.hset(key, field, value)
+
+    def hgetall(self, key: str) -> Dict[bytes, bytes]:
+        with self._lock:
+            return dict(self._live(key, dict) or {})
+
+    def expire(self, key: str, seconds: int) -> bool:
+        with self._lock:
+            if self._live(key) is None:
+                return False
+            self._expires[key] = time.monotonic() + seconds
+            return True
+
+    def delete(self, *keys: str) -> int:
+        with self._lock:
+            deleted = 0
+            for key in keys:
+                if self._live(key) is not None:
+                    del self._data[key]
+                    deleted += 1
+                self._expires.pop(key, None)
+            return deleted
+
+    def pipeline(self, transaction: bool = True) -> "LocalPipeline":
+        return LocalPipeline(self)
+
+
+class LocalPipeline:
+    """Queues commands and runs them together (atomically) on execute()"""
+
+    def __init__(self, client: LocalRedis):
+        self._client = client
+        self._commands = []
+
+    def __getattr__(self, name: str):
+        command = getattr(self._client, name)
+
+        def queue(*args, **kwargs):
+            self._commands.append((command, args, kwargs))
+            return self
+        return queue
+
+    def execute(self) -> List[Any]:
+        with self._client._lock:
+            results = [command(*args, **kwargs) for command, args, kwargs in self._commands]
+        self._commands = []
+        return results
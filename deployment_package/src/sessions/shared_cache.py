@@ -0,0 +1,266 @@
+"""
+Shared Cache Tier
+Byte-value cache shared by every worker process of a multi-worker server,
+for rendered PDFs and generated summaries. Each process keeps its own
+small in-memory LRU in front of it; this tier makes a result produced by
+one worker visible to the others.
+
+Configured with SHARED_CACHE_URL:
+
+    sqlite:///var/tmp/ohs_cache.sqlite3   (one host: WAL-mode SQLite, reads via mmap)
+    redis://host:6379/0                   (any Redis-compatible server)
+
+Unset, every process caches on its own.
+"""
+
+from abc import ABC, abstractmethod
+from contextlib import contextmanager
+from typing import Any, Dict, Optional
+import os
+import sqlite3
+import threading
+import time
+
+# Defaults (override with environment variables)
+SHARED_CACHE_URL = os.getenv("SHARED_CACHE_URL", "")
+DEFAULT_MAX_BYTES = int(os.getenv("SHARED_CACHE_MAX_BYTES", str(256 * 1024 * 1024)))
+DEFAULT_TTL_SECONDS = int(os.getenv("SHARED_CACHE_TTL_SECONDS", str(24 * 60 * 60)))
+
+# Memory-mapped read window for SQLite databases
+SQLITE_MMAP_BYTES = 256 * 1024 * 1024
+
+# A read refreshes an entry's LRU position at most this often, to keep reads from writing
+ACCESS_REFRESH_SECONDS = 60
+
+
+def sqlite_connect(path: str) -> sqlite3.Connection:
+    """
+    A connection tuned for many processes sharing one database file:
+    write-ahead log (readers never block the writer), a busy timeout
+    instead of immediate lock errors, and memory-mapped reads
+    """
+    connection = sqlite3.connect(path, timeout=10.0, isolation_level=None)
+    connection.execute("PRAGMA journal_mode=WAL")
+    connection.execute("PRAGMA synchronous=NORMAL")
+    connection.execute(f"PRAGMA mmap_size={SQLITE_MMAP_BYTES}")
+    return connection
+
+
+class SQLiteConnections:
+    """
+    One connection per thread and process
+
+    Connections must not cross a fork, so a worker forked from a preloaded
+    master opens its own on first use.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._local = threading.local()
+
+    def get(self) -> sqlite3.Connection:
+        connection = getattr(self._local, "connection", None)
+        if connection is None or self._local.pid != os.getpid():
+            connection = self._local.connection = sqlite_connect(self.path)
+            self._local.pid = os.getpid()
+        return connection
+
+    @contextmanager
+    def transaction(self):
+        """A write transaction that takes the database lock up front (no upgrade deadlocks)"""
+        connection = self.get()
+        connection.execute("BEGIN IMMEDIATE")
+        try:
+            yield connection
+        except BaseException:
+            connection.execute("ROLLBACK")
+            raise
+        connection.execute("COMMIT")
+
+
+class SharedCache(ABC):
+    """Interface for the shared tier; keys are namespaced strings such as 'pdf:<hash>'"""
+
+    @abstractmethod
+    def get(self, key: str) -> Optional[bytes]:
+        """Return the cached value, or None if missing or expired"""
+
+    @abstractmethod
+    def put(self, key: str, value: bytes):
+        """Store a value for every process to read"""
+
+    @abstractmethod
+    def stats(self) -> Dict[str, Any]:
+        """Occupancy and hit statistics"""
+
+
+class SQLiteSharedCache(SharedCache):
+    """
+    Shared cache in one SQLite file, bounded by total value size and a TTL
+
+    Eviction is least recently used, by an access time that reads refresh
+    at most once per ACCESS_REFRESH_SECONDS.
+    """
+
+    def __init__(self, path: str, max_bytes: int = DEFAULT_MAX_BYTES, ttl_seconds: int = DEFAULT_TTL_SECONDS):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.ttl_seconds = ttl_seconds
+        self._connections = SQLiteConnections(path)
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self._connections.get().executescript("""
+            CREATE TABLE IF NOT EXISTS cache (
+                key TEXT PRIMARY KEY,
+                value BLOB NOT NULL,
+                size INTEGER NOT NULL,
+                expires_at REAL NOT NULL,
+                accessed_at REAL NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS cache_accessed_at ON cache (accessed_at);
+        """)
+
+    def _count(self, counter: str):
+        with self._lock:
+            setattr(self, counter, getattr(self, counter) + 1)
+
+    def get(self, key: str) -> Optional[bytes]:
+        connection = self._connections.get()
+        now = time.time()
+        row = connection.execute(
+            "SELECT value, expires_at, accessed_at FROM cache WHERE key = ?", (key,)
+        ).fetchone()
+        if row is None or row[1] <= now:
+            self._count("misses")
+            return None
+        if now - row[2] > ACCESS_REFRESH_SECONDS:
+            connection.execute("UPDATE cache SET accessed_at = ? WHERE key = ?", (now, key))
+        self._count("hits")
+        return bytes(row[0])
+
+    def put(self, key: str, value: bytes):
+        if len(value) > self.max_bytes:
+            return
+        now = time.time()
+        evicted = 0
+        with self._connections.transaction() as connection:
+            connection.execute(
+                "INSERT OR REPLACE INTO cache (key, value, size, expires_at, accessed_at) VALUES (?, ?, ?, ?, ?)",
+                (key, sqlite3.Binary(value), len(value), now + self.ttl_seconds, now)
+            )
+            connection.execute("DELETE FROM cache WHERE expires_at <= ?", (now,))
+            total = connection.execute("SELECT COALESCE(SUM(size), 0) FROM cache").fetchone()[0]
+            while total > self.max_bytes:
+                oldest = connection.execute(
+                    "SELECT key, size FROM cache WHERE key != ? ORDER BY accessed_at LIMIT 1", (key,)
+                ).fetchone()
+                if oldest is None:
+                    break
+                connection.execute("DELETE FROM cache WHERE key = ?", (oldest[0],))
+                total -= oldest[1]
+                evicted += 1
+        if evicted:
+            with self._lock:
+                self.evictions += evicted
+
+    def stats(self) -> Dict[str, Any]:
+        entries, total = self._connections.get().execute(
+            "SELECT COUNT(*), COALESCE(SUM(size), 0) FROM cache WHERE expires_at > ?", (time.time(),)
+        ).fetchone()
+        with self._lock:
+            return {
+                "backend": "sqlite",
+                "path": self.path,
+                "entries": entries,
+                "total_bytes": total,
+                "max_bytes": self.max_bytes,
+                "ttl_seconds": self.ttl_seconds,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions
+            }
+
+
+class RedisSharedCache(SharedCache):
+    """
+    Shared cache on a Redis-compatible server; entries expire after the
+    TTL and the server's maxmemory policy bounds the total size
+
+    Only get and set are used, so LocalRedis (local_redis.py) can stand in.
+    """
+
+    def __init__(self, client, ttl_seconds: int = DEFAULT_TTL_SECONDS, prefix: str = "ohs:cache:"):
+        self.client = client
+        self.ttl_seconds = ttl_seconds
+        self.prefix = prefix
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key: str) -> Optional[bytes]:
+        value = self.client.get(f"{self.prefix}{key}")
+        with self._lock:
+            if value is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+        return value
+
+    def put(self, key: str, value: bytes):
+        self.client.set(f"{self.prefix}{key}", value, ex=self.ttl_seconds)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {"backend": "redis", "prefix": self.prefix, "ttl_seconds": self.ttl_seconds,
+                    "hits": self.hits, "misses": self.misses}
+
+
+def sqlite_path(url: str) -> Optional[str]:
+    """File path of a sqlite:// URL (sqlite:///abs/path or sqlite://relative/path), else None"""
+    if not url.startswith("sqlite://"):
+        return None
+    return url[len("sqlite://"):] or None
+
+
+def create_shared_cache(url: Optional[str] = None) -> Optional[SharedCache]:
+    """
+    Create the configured shared cache, or None when there is none
+
+    Redis URLs require the optional `redis` package.
+    """
+    url = url if url is not None else SHARED_CACHE_URL
+
+    path = sqlite_path(url)
+    if path:
+        print(f"🗄️ Using SQLite shared cache: {path}")
+        return SQLiteSharedCache(path)
+
+    if url.startswith(("redis://", "rediss://", "unix://")):
+        try:
+            import redis
+        except ImportError:
+            print("⚠️ SHARED_CACHE_URL is set but the redis package is not installed - caches are per process")
+        else:
+            print("🗄️ Using Redis shared cache")
+            return RedisSharedCache(redis.Redis.from_url(url))
+    return None
+
+
+# Process-wide shared cache, created from SHARED_CACHE_URL on first use
+_shared_cache = None
+_configured = False
+_configure_lock = threading.Lock()
+
+
+def get_shared_cache() -> Optional[SharedCache]:
+    """The process-wide shared cache, or None when SHARED_CACHE_URL is unset"""
+    global _shared_cache, _configured
+    with _configure_lock:
+        if not _configured:
+            _shared_cache = create_shared_cache(os.getenv("SHARED_CACHE_URL", SHARED_CACHE_URL))
+            _configured = True
+    return _shared_cache
@@ -0,0 +1,487 @@
+"""
+Session Transcript Store
+Server-side interview transcripts for the delta chat protocol, with a
+bounded in-memory TTL/LRU backend, a SQLite backend shared by the worker
+processes of one host, and a Redis-compatible backend
+"""
+
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from typing import Any, List, Dict, Optional
+import json
+import os
+import sys
+import threading
+import time
+
+from .shared_cache import SQLiteConnections, sqlite_path
+
+# Defaults (override with environment variables)
+DEFAULT_MAX_SESSIONS = int(os.getenv("SESSION_STORE_MAX_SESSIONS", "1000"))
+DEFAULT_MAX_BYTES = int(os.getenv("SESSION_STORE_MAX_BYTES", str(64 * 1024 * 1024)))
+DEFAULT_TTL_SECONDS = int(os.getenv("SESSION_STORE_TTL_SECONDS", str(6 * 60 * 60)))
+
+# Approximate fixed cost of one stored message (slotted object + list slot)
+MESSAGE_OVERHEAD = 64
+
+
+class SessionStore(ABC):
+    """
+    Interface for transcript storage
+
+    A transcript is the ordered list of {"role", "content"} messages; its
+    length is the sequence number the client echoes back on the next turn.
+    """
+
+    @abstractmethod
+    def get_messages(self, session_id: str) -> Optional[List[Dict[str, str]]]:
+        """Return the transcript, or None if the session is unknown"""
+
+    @abstractmethod
+    def length(self, session_id: str) -> Optional[int]:
+        """Return the transcript length, or None if the session is unknown"""
+
+    @abstractmethod
+    def append(self, session_id: str, messages: List[Dict[str, str]]) -> int:
+        """Append messages; returns the new transcript length"""
+
+    @abstractmethod
+    def replace(self, session_id: str, messages: List[Dict[str, str]]) -> int:
+        """Overwrite the transcript (browser resync); returns its length"""
+
+    @abstractmethod
+    def delete(self, session_id: str):
+        """Forget the session and its metadata"""
+
+    @abstractmethod
+    def info(self, session_id: str) -> Optional[Dict[str, Any]]:
+        """Return length, timestamps and metadata, or None if the session is unknown"""
+
+    @abstractmethod
+    def set_metadata(self, session_id: str, key: str, value: Any) -> bool:
+        """Attach a JSON-serialisable value to a known session; returns False if unknown"""
+
+    @abstractmethod
+    def stats(self) -> Dict[str, Any]:
+        """Occupancy statistics"""
+
+
+class Message:
+    """Compact stored message; roles are interned so every transcript shares them"""
+    __slots__ = ("role", "content")
+
+    def __init__(self, role: str, content: str):
+        self.role = sys.intern(role)
+        self.content = content
+
+    @property
+    def size(self) -> int:
+        return MESSAGE_OVERHEAD + sys.getsizeof(self.content)
+
+    def to_dict(self) -> Dict[str, str]:
+        return {"role": self.role, "content": self.content}
+
+
+class SessionRecord:
+    """One session's transcript plus bookkeeping"""
+    __slots__ = ("messages", "size", "created_at", "last_access", "metadata")
+
+    def __init__(self, now: float):
+        self.messages = []
+        self.size = 0
+        self.created_at = time.time()
+        self.last_access = now
+        self.metadata = None  # allocated on first set_metadata
+
+
+class InMemorySessionStore(SessionStore):
+    """
+    Per-process bounded store
+
+    - At most `max_sessions` sessions and roughly `max_bytes` of message text
+    - Sessions idle for longer than the TTL are expired
+    - Otherwise the least recently used session is evicted first
+
+    Sessions are kept in access order, so expiry and eviction only ever
+    look at the head of the index.
+    """
+
+    def __init__(
+        self,
+        max_sessions: int = DEFAULT_MAX_SESSIONS,
+        max_bytes: int = DEFAULT_MAX_BYTES,
+        ttl_seconds: int = DEFAULT_TTL_SECONDS
+    ):
+        self.max_sessions = max_sessions
+        self.max_bytes = max_bytes
+        self.ttl_seconds = ttl_seconds
+
+        self._sessions = OrderedDict()  # least recently used first
+        self._total_bytes = 0
+        self._lock = threading.Lock()
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = {"count": 0, "bytes": 0, "ttl": 0}
+
+    def _drop(self, session_id: str, reason: Optional[str] = None):
+        record = self._sessions.pop(session_id)
+        self._total_bytes -= record.size
+        if reason:
+            self.evictions[reason] += 1
+
+    def _expire(self, now: float):
+        cutoff = now - self.ttl_seconds
+        while self._sessions:
+            session_id, record = next(iter(self._sessions.items()))
+            if record.last_access > cutoff:
+                break
+            self._drop(session_id, reason="ttl")
+
+    def _evict(self, keep: str):
+        # Never evict the session being written, even if it alone exceeds the quota
+        while len(self._sessions) > self.max_sessions or self._total_bytes > self.max_bytes:
+            session_id = next(iter(self._sessions))
+            if session_id == keep:
+                break
+            self._drop(session_id, reason="count" if len(self._sessions) > self.max_sessions else "bytes")
+
+    def _touch(self, session_id: str) -> Optional[SessionRecord]:
+        now = time.monotonic()
+        self._expire(now)
+        record = self._sessions.get(session_id)
+        if record is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        record.last_access = now
+        self._sessions.move_to_end(session_id)
+        return record
+
+    def _extend(self, record: SessionRecord, messages: List[Dict[str, str]]):
+        for message in messages:
+            stored = Message(message["role"], message["content"])
+            record.messages.append(stored)
+            record.size += stored.size
+            self._total_bytes += stored.size
+
+    def get_messages(self, session_id: str) -> Optional[List[Dict[str, str]]]:
+        with self._lock:
+            record = self._touch(session_id)
+            return [message.to_dict() for message in record.messages] if record is not None else None
+
+    def length(self, session_id: str) -> Optional[int]:
+        with self._lock:
+            record = self._touch(session_id)
+            return len(record.messages) if record is not None else None
+
+    def append(self, session_id: str, messages: List[Dict[str, str]]) -> int:
+        with self._lock:
+            record = self._touch(session_id)
+            if record is None:
+                record = self._sessions[session_id] = SessionRecord(time.monotonic())
+            self._extend(record, messages)
+            self._evict(keep=session_id)
+            return len(record.messages)
+
+    def replace(self, session_id: str, messages: List[Dict[str, str]]) -> int:
+        with self._lock:
+            record = self._touch(session_id)
+            if record is None:
+                record = self._sessions[session_id] = SessionRecord(time.monotonic())
+            else:
+                self._total_bytes -= record.size
+                record.messages = []
+                record.size = 0
+            self._extend(record, messages)
+            self._evict(keep=session_id)
+            return len(record.messages)
+
+    def delete(self, session_id: str):
+        with self._lock:
+            if session_id in self._sessions:
+                self._drop(session_id)
+
+    def info(self, session_id: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            record = self._touch(session_id)
+            if record is None:
+                return None
+            return {
+                "length": len(record.messages),
+                "bytes": record.size,
+                "created_at": record.created_at,
+                "metadata": dict(record.metadata or {})
+            }
+
+    def set_metadata(self, session_id: str, key: str, value: Any) -> bool:
+        with self._lock:
+            record = self._touch(session_id)
+            if record is None:
+                return False
+            if record.metadata is None:
+                record.metadata = {}
+            record.metadata[key] = value
+            return True
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            self._expire(time.monotonic())
+            return {
+                "backend": "memory",
+                "sessions": len(self._sessions),
+                "max_sessions": self.max_sessions,
+                "messages": sum(len(record.messages) for record in self._sessions.values()),
+                "total_bytes": self._total_bytes,
+                "max_bytes": self.max_bytes,
+                "occupancy": round(self._total_bytes / self.max_bytes, 4) if self.max_bytes else 0.0,
+                "ttl_seconds": self.ttl_seconds,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": dict(self.evictions)
+            }
+
+
+class RedisSessionStore(SessionStore):
+    """
+    Transcripts as Redis lists (one JSON message per element)
+
+    Works with any client exposing the redis-py commands used here
+    (rpush, lrange, llen, delete, expire, hset, hsetnx, hgetall, pipeline),
+    so the in-process LocalRedis stand-in (local_redis.py) can replace a
+    real server in development and checks. Creation
+    time and metadata live in a companion hash; both keys expire together
+    after `ttl_seconds` without writes.
+    """
+
+    def __init__(self, client, ttl_seconds: int = DEFAULT_TTL_SECONDS, prefix: str = "ohs:session:"):
+        self.client = client
+        self.ttl_seconds = ttl_seconds
+        self.prefix = prefix
+
+    def _key(self, session_id: str) -> str:
+        return f"{self.prefix}{session_id}"
+
+    def _meta_key(self, session_id: str) -> str:
+        return f"{self.prefix}{session_id}:meta"
+
+    def _touch_meta(self, pipe, session_id: str):
+        meta_key = self._meta_key(session_id)
+        pipe.hsetnx(meta_key, "created_at", json.dumps(time.time()))
+        pipe.expire(meta_key, self.ttl_seconds)
+
+    def get_messages(self, session_id: str) -> Optional[List[Dict[str, str]]]:
+        items = self.client.lrange(self._key(session_id), 0, -1)
+        if not items:
+            return None
+        return [json.loads(item) for item in items]
+
+    def length(self, session_id: str) -> Optional[int]:
+        length = self.client.llen(self._key(session_id))
+        return length or None
+
+    def append(self, session_id: str, messages: List[Dict[str, str]]) -> int:
+        key = self._key(session_id)
+        pipe = self.client.pipeline()
+        pipe.rpush(key, *[json.dumps(message) for message in messages])
+        pipe.expire(key, self.ttl_seconds)
+        self._touch_meta(pipe, session_id)
+        return pipe.execute()[0]
+
+    def replace(self, session_id: str, messages: List[Dict[str, str]]) -> int:
+        key = self._key(session_id)
+        pipe = self.client.pipeline()
+        pipe.delete(key)
+        if messages:
+            pipe.rpush(key, *[json.dumps(message) for message in messages])
+            pipe.expire(key, self.ttl_seconds)
+            self._touch_meta(pipe, session_id)
+        pipe.execute()
+        return len(messages)
+
+    def delete(self, session_id: str):
+        self.client.delete(self._key(session_id), self._meta_key(session_id))
+
+    def info(self, session_id: str) -> Optional[Dict[str, Any]]:
+        pipe = self.client.pipeline()
+        pipe.llen(self._key(session_id))
+        pipe.hgetall(self._meta_key(session_id))
+        length, raw_meta = pipe.execute()
+        if not length:
+            return None
+
+        metadata = {}
+        for field, value in (raw_meta or {}).items():
+            field = field.decode() if isinstance(field, bytes) else field
+            metadata[field] = json.loads(value)
+        created_at = metadata.pop("created_at", None)
+
+        return {"length": length, "created_at": created_at, "metadata": metadata}
+
+    def set_metadata(self, session_id: str, key: str, value: Any) -> bool:
+        if not self.client.llen(self._key(session_id)):
+            return False
+        meta_key = self._meta_key(session_id)
+        pipe = self.client.pipeline()
+        pipe.hset(meta_key, key, json.dumps(value))
+        pipe.expire(meta_key, self.ttl_seconds)
+        pipe.execute()
+        return True
+
+    def stats(self) -> Dict[str, Any]:
+        # Occupancy is bounded by Redis itself (maxmemory + key TTLs)
+        return {"backend": "redis", "ttl_seconds": self.ttl_seconds, "prefix": self.prefix}
+
+
+class SQLiteSessionStore(SessionStore):
+    """
+    Transcripts in a SQLite file, one row per message
+
+    Lets every worker process on a host see the same sessions. Like the
+    Redis store, a session expires `ttl_seconds` after its last write;
+    expired sessions read as unknown and are purged by later writes.
+    """
+
+    # Expired sessions are deleted at most this often per process
+    PURGE_INTERVAL_SECONDS = 60
+
+    def __init__(self, path: str, ttl_seconds: int = DEFAULT_TTL_SECONDS):
+        self.path = path
+        self.ttl_seconds = ttl_seconds
+        self._connections = SQLiteConnections(path)
+        self._last_purge = 0.0
+
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self._connections.get().executescript("""
+            CREATE TABLE IF NOT EXISTS sessions (
+                id TEXT PRIMARY KEY,
+                length INTEGER NOT NULL,
+                created_at REAL NOT NULL,
+                expires_at REAL NOT NULL,
+                metadata TEXT
+            );
+            CREATE INDEX IF NOT EXISTS sessions_expires_at ON sessions (expires_at);
+            CREATE TABLE IF NOT EXISTS messages (
+                session_id TEXT NOT NULL,
+                seq INTEGER NOT NULL,
+                role TEXT NOT NULL,
+                content TEXT NOT NULL,
+                PRIMARY KEY (session_id, seq)
+            ) WITHOUT ROWID;
+        """)
+
+    def _session(self, connection, session_id: str):
+        """(length, created_at, metadata) of a live session, or None"""
+        return connection.execute(
+            "SELECT length, created_at, metadata FROM sessions WHERE id = ? AND expires_at > ?",
+            (session_id, time.time())
+        ).fetchone()
+
+    def _write(self, session_id: str, messages: List[Dict[str, str]], replace: bool) -> int:
+        now = time.time()
+        with self._connections.transaction() as connection:
+            self._purge(connection, now)
+            row = self._session(connection, session_id)
+            if row is None or replace:
+                connection.execute("DELETE FROM messages WHERE session_id = ?", (session_id,))
+                start = 0
+            else:
+                start = row[0]
+            connection.executemany(
+                "INSERT INTO messages (session_id, seq, role, content) VALUES (?, ?, ?, ?)",
+                [(session_id, start + i, m["role"], m["content"]) for i, m in enumerate(messages)]
+            )
+            length = start + len(messages)
+            if row is None:
+                connection.execute(
+                    "INSERT OR REPLACE INTO sessions (id, length, created_at, expires_at, metadata) VALUES (?, ?, ?, ?, NULL)",
+                    (session_id, length, now, now + self.ttl_seconds)
+                )
+            else:
+                connection.execute("UPDATE sessions SET length = ?, expires_at = ? WHERE id = ?",
+                                   (length, now + self.ttl_seconds, session_id))
+        return length
+
+    def _purge(self, connection, now: float):
+        if now - self._last_purge < self.PURGE_INTERVAL_SECONDS:
+            return
+        self._last_purge = now
+        connection.execute(
+            "DELETE FROM messages WHERE session_id IN (SELECT id FROM sessions WHERE expires_at <= ?)", (now,)
+        )
+        connection.execute("DELETE FROM sessions WHERE expires_at <= ?", (now,))
+
+    def get_messages(self, session_id: str) -> Optional[List[Dict[str, str]]]:
+        connection = self._connections.get()
+        if self._session(connection, session_id) is None:
+            return None
+        rows = connection.execute(
+            "SELECT role, content FROM messages WHERE session_id = ? ORDER BY seq", (session_id,)
+        ).fetchall()
+        return [{"role": role, "content": content} for role, content in rows]
+
+    def length(self, session_id: str) -> Optional[int]:
+        row = self._session(self._connections.get(), session_id)
+        return row[0] if row is not None else None
+
+    def append(self, session_id: str, messages: List[Dict[str, str]]) -> int:
+        return self._write(session_id, messages, replace=False)
+
+    def replace(self, session_id: str, messages: List[Dict[str, str]]) -> int:
+        return self._write(session_id, messages, replace=True)
+
+    def delete(self, session_id: str):
+        with self._connections.transaction() as connection:
+            connection.execute("DELETE FROM messages WHERE session_id = ?", (session_id,))
+            connection.execute("DELETE FROM sessions WHERE id = ?", (session_id,))
+
+    def info(self, session_id: str) -> Optional[Dict[str, Any]]:
+        row = self._session(self._connections.get(), session_id)
+        if row is None:
+            return None
+        length, created_at, metadata = row
+        return {"length": length, "created_at": created_at, "metadata": json.loads(metadata) if metadata else {}}
+
+    def set_metadata(self, session_id: str, key: str, value: Any) -> bool:
+        with self._connections.transaction() as connection:
+            row = self._session(connection, session_id)
+            if row is not None:
+                metadata = json.loads(row[2]) if row[2] else {}
+                metadata[key] = value
+                connection.execute("UPDATE sessions SET metadata = ? WHERE id = ?", (json.dumps(metadata), session_id))
+        return row is not None
+
+    def stats(self) -> Dict[str, Any]:
+        sessions, messages = self._connections.get().execute(
+            "SELECT COUNT(*), COALESCE(SUM(length), 0) FROM sessions WHERE expires_at > ?", (time.time(),)
+        ).fetchone()
+        return {"backend": "sqlite", "path": self.path, "sessions": sessions, "messages": messages,
+                "ttl_seconds": self.ttl_seconds}
+
+
+def create_session_store(url: Optional[str] = None) -> SessionStore:
+    """
+    Create the configured session store
+
+    Uses SQLite when SESSION_STORE_URL is a sqlite:// URL, Redis when it is
+    a redis:// URL (requires the optional `redis` package), otherwise a
+    bounded in-memory TTL/LRU store.
+    """
+    url = url if url is not None else os.getenv("SESSION_STORE_URL", "")
+
+    path = sqlite_path(url)
+    if path:
+        print(f"🗄️ Using SQLite session store: {path}")
+        return SQLiteSessionStore(path)
+
+    if url.startswith(("redis://", "rediss://", "unix://")):
+        try:
+            import redis
+        except ImportError:
+            print("⚠️ SESSION_STORE_URL is set but the redis package is not installed - using in-memory sessions")
+        else:
+            print("🗄️ Using Redis session store")
+            return RedisSessionStore(redis.Redis.from_url(url))
+
+    print("🗄️ Using in-memory session store")
+    return InMemorySessionStore()
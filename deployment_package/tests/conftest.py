@@ -0,0 +1,14 @@
+"""
+Test configuration: tests import modules the way the app does, from src/
+and the package root
+"""
+
+import os
+import sys
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'src'))
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+
+# Clients connect lazily; these only let them be constructed offline
+os.environ.setdefault("GEMINI_API_KEY", "test")
+os.environ.setdefault("GOOGLE_CLOUD_PROJECT", "test")
@@ -0,0 +1,111 @@
+"""
+Streaming email delivery: the DATA payload is produced chunk by chunk, so a
+send holds little more than the PDF itself, and the message still parses
+back to the original attachment
+"""
+
+from email import message_from_bytes
+from email.policy import default
+import os
+import smtplib
+import tempfile
+import tracemalloc
+
+import pytest
+
+from reports.email_delivery import ATTACHMENT_CHUNK_BYTES, build_message, message_chunks, send_streaming
+
+# Base64 grows data by 4/3, plus a CRLF per 76-column line
+ENCODED_CHUNK_BYTES = ATTACHMENT_CHUNK_BYTES * 4 // 3 + ATTACHMENT_CHUNK_BYTES // 57 * 2
+
+# Interpreter and smtplib bookkeeping allowed on top of the PDF and one encoded chunk
+OVERHEAD_BYTES = 256 * 1024
+
+
+class FakeSMTPSocket:
+    """
+    Socket stand-in for smtplib: answers every command with success and
+    spools the DATA payload to a file, so received bytes are not counted
+    as memory held by the sender
+    """
+
+    def __init__(self, spool):
+        self.spool = spool
+        self.replies = []
+        self.in_data = False
+        self.tail = b""
+
+    def sendall(self, data: bytes):
+        if self.in_data:
+            self.spool.write(data)
+            self.tail = (self.tail + bytes(data[-5:]))[-5:]
+            if self.tail == b"\r\n.\r\n":
+                self.in_data = False
+                self.replies.append(b"250 Queued\r\n")
+            return
+        command = bytes(data).split(b" ", 1)[0].strip().upper()
+        if command == b"DATA":
+            self.in_data = True
+            self.replies.append(b"354 Go ahead\r\n")
+        else:
+            self.replies.append(b"250 OK\r\n")
+
+    def makefile(self, mode: str = "rb"):
+        return self
+
+    def readline(self, size: int = -1) -> bytes:
+        return self.replies.pop(0)
+
+    def close(self):
+        pass
+
+
+def _fake_server(spool) -> smtplib.SMTP:
+    server = smtplib.SMTP()
+    server.sock = FakeSMTPSocket(spool)
+    return server
+
+
+def _received_message(spool):
+    """The message as the server would store it: dot-stuffing and the terminator removed"""
+    spool.seek(0)
+    payload = spool.read()
+    assert payload.endswith(b"\r\n.\r\n")
+    lines = payload[:-len(b".\r\n")].split(b"\r\n")
+    return message_from_bytes(b"\r\n".join(line[1:] if line.startswith(b".") else line for line in lines), policy=default)
+
+
+@pytest.mark.parametrize("pdf_megabytes", [0.0, 0.3, 4.0])
+def test_streaming_send_round_trips_the_pdf(pdf_megabytes):
+    pdf = b"%PDF-1.4\n" + os.urandom(int(pdf_megabytes * 1024 * 1024))
+    body = "Dear Doctor,\n.\n.a line starting with a period\nRegards"
+    msg = build_message("team@example.org", "doctor@example.org", "Summary", body, "summary.pdf")
+
+    with tempfile.TemporaryFile() as spool:
+        send_streaming(_fake_server(spool), "team@example.org", "doctor@example.org", message_chunks(msg, pdf))
+        received = _received_message(spool)
+
+    attachment = next(received.iter_attachments())
+    assert attachment.get_content_type() == "application/pdf"
+    assert attachment.get_filename() == "summary.pdf"
+    assert attachment.get_content() == pdf
+    assert received.get_body(preferencelist=("plain",)).get_content().replace("\r\n", "\n").rstrip("\n") == body
+
+
+def test_peak_memory_is_the_pdf_plus_one_chunk():
+    pdf_size = 4 * 1024 * 1024
+    msg = build_message("team@example.org", "doctor@example.org", "Summary", "Body", "summary.pdf")
+
+    with tempfile.TemporaryFile() as spool:
+        server = _fake_server(spool)
+        tracemalloc.start()
+        try:
+            pdf = os.urandom(pdf_size)
+            send_streaming(server, "team@example.org", "doctor@example.org", message_chunks(msg, pdf))
+            _, peak = tracemalloc.get_traced_memory()
+        finally:
+            tracemalloc.stop()
+
+    assert peak <= pdf_size + ENCODED_CHUNK_BYTES + OVERHEAD_BYTES, (
+        f"peak {peak} B for a {pdf_size} B PDF (encoded chunk {ENCODED_CHUNK_BYTES} B)"
+    )
@@ -0,0 +1,98 @@
+"""
+Session store and shared cache backends answer the delta-protocol
+operations identically; the Redis backends run against LocalRedis
+"""
+
+import time
+
+import pytest
+
+from sessions.store import InMemorySessionStore, SQLiteSessionStore, RedisSessionStore
+from sessions.shared_cache import SQLiteSharedCache, RedisSharedCache
+from sessions.local_redis import LocalRedis
+
+FIRST = [{"role": "assistant", "content": "What was your job?"}, {"role": "user", "content": "Welder"}]
+LATER = [{"role": "assistant", "content": "Which years?"}]
+
+
+@pytest.fixture(params=["memory", "sqlite", "redis"])
+def make_store(request, tmp_path):
+    """Factory for the parametrised backend, taking a TTL"""
+    def make(ttl_seconds: int = 3600):
+        if request.param == "memory":
+            return InMemorySessionStore(ttl_seconds=ttl_seconds)
+        if request.param == "sqlite":
+            return SQLiteSessionStore(str(tmp_path / "sessions.sqlite3"), ttl_seconds=ttl_seconds)
+        return RedisSessionStore(LocalRedis(), ttl_seconds=ttl_seconds)
+    return make
+
+
+@pytest.fixture(params=["sqlite", "redis"])
+def make_cache(request, tmp_path):
+    def make(ttl_seconds: int = 3600):
+        if request.param == "sqlite":
+            return SQLiteSharedCache(str(tmp_path / "cache.sqlite3"), ttl_seconds=ttl_seconds)
+        return RedisSharedCache(LocalRedis(), ttl_seconds=ttl_seconds)
+    return make
+
+
+def test_unknown_session(make_store):
+    store = make_store()
+    assert store.get_messages("missing") is None
+    assert store.length("missing") is None
+    assert store.info("missing") is None
+    assert store.set_metadata("missing", "summary_key", "k") is False
+
+
+def test_append_and_read_back(make_store):
+    store = make_store()
+    assert store.append("s1", FIRST) == 2
+    assert store.append("s1", LATER) == 3
+    assert store.get_messages("s1") == FIRST + LATER
+    assert store.length("s1") == 3
+
+
+def test_metadata_and_info(make_store):
+    store = make_store()
+    store.append("s1", FIRST)
+    assert store.set_metadata("s1", "summary_key", "abc") is True
+    info = store.info("s1")
+    assert info["length"] == 2
+    assert info["created_at"] is not None
+    assert info["metadata"] == {"summary_key": "abc"}
+
+
+def test_replace_keeps_metadata(make_store):
+    store = make_store()
+    store.append("s1", FIRST + LATER)
+    store.set_metadata("s1", "summary_key", "abc")
+    assert store.replace("s1", LATER) == 1
+    assert store.get_messages("s1") == LATER
+    assert store.info("s1")["metadata"] == {"summary_key": "abc"}
+
+
+def test_delete(make_store):
+    store = make_store()
+    store.append("s1", FIRST)
+    store.delete("s1")
+    assert store.get_messages("s1") is None
+    assert store.info("s1") is None
+
+
+def test_sessions_expire_after_ttl(make_store):
+    store = make_store(ttl_seconds=1)
+    store.append("short", FIRST)
+    time.sleep(1.1)
+    assert store.get_messages("short") is None
+    assert store.info("short") is None
+
+
+def test_shared_cache_round_trip_and_ttl(make_cache):
+    cache = make_cache(ttl_seconds=1)
+    cache.put("pdf:key", b"%PDF-1.4 bytes")
+    assert cache.get("pdf:key") == b"%PDF-1.4 bytes"
+    assert cache.get("pdf:other") is None
+    time.sleep(1.1)
+    assert cache.get("pdf:key") is None
+    stats = cache.stats()
+    assert (stats["hits"], stats["misses"]) == (1, 2)